@@ -0,0 +1,265 @@
+# api.py
+# Headless HTTP API over services/* (the Streamlit UI in app.py is unchanged):
+#   GET    /episodes/lookup?topic=&minutes=   cached 5-star episode (404 if none)
+#   GET    /episodes?search=&limit=&offset=   saved episodes, alphabetical
+#   GET    /episodes/audio?topic=&minutes=    saved episode MP3, streamed through from Storage
+#   POST   /generate                          start (or join) a generation job -> 202 + job id + subscription
+#   GET    /jobs/{id}                         job status / progress / partial results
+#   DELETE /jobs/{id}?subscription=           cancel: drops that submission's subscription (once)
+#   GET    /jobs/{id}/audio                   finished job's audio (MP3 or Ogg Opus), streamed from disk
+#
+#   pip install -r requirements-api.txt
+#   uvicorn api:app --host 0.0.0.0 --port 8000
+#
+# Concurrency limits: blocking service calls (DB, Wikipedia) run on a bounded thread pool
+# (API_BLOCKING_THREADS); generations go through the JobManager (JOB_WORKERS running,
+# JOB_MAX_PENDING queued -> 429); concurrent audio streams are capped by API_MAX_STREAMS (-> 503).
+# Jobs live in the process that accepted them, so route /jobs/* to the same instance.
+
+import os
+import uuid
+import asyncio
+import secrets
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Iterator, Optional
+
+# --- Load .env early so services can read keys ---
+from dotenv import load_dotenv, find_dotenv
+load_dotenv(find_dotenv(usecwd=True), override=True)
+
+import anyio
+import httpx
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from services.audio_cache import get_audio_cache
+from services.audio_profiles import DEFAULT_PROFILE, mime_for_path, negotiate
+from services.jobs import get_job_manager, JobQueueFull
+from services.metrics import tts_avoided
+from services.store import get_cached_podcast, list_saved_podcasts_cached
+from services.wiki import is_mixed_he_en
+
+API_BLOCKING_THREADS = int(os.getenv("API_BLOCKING_THREADS", "16"))
+API_MAX_STREAMS = int(os.getenv("API_MAX_STREAMS", "32"))
+API_STREAM_CHUNK = 64 * 1024
+API_MAX_SUBSCRIPTIONS = 10_000  # remembered cancel tokens; the oldest are forgotten first
+DEFAULT_HE_VOICE = "he-IL-Wavenet-B"
+
+_blocking = anyio.CapacityLimiter(API_BLOCKING_THREADS)
+_streams = asyncio.Semaphore(API_MAX_STREAMS)
+_http: Optional[httpx.AsyncClient] = None  # pooled client for streaming saved audio from Storage
+
+# subscription token -> [job id, still subscribed]. Each /generate hands out its own token, so
+# one client can only drop its own single-flight subscription, not everyone else's.
+_subscriptions: "OrderedDict[str, list]" = OrderedDict()
+_subscriptions_lock = threading.Lock()
+
+
+def _subscribe(job_id: str) -> str:
+    token = secrets.token_urlsafe(16)
+    with _subscriptions_lock:
+        _subscriptions[token] = [job_id, True]
+        while len(_subscriptions) > API_MAX_SUBSCRIPTIONS:
+            _subscriptions.popitem(last=False)
+    return token
+
+
+@asynccontextmanager
+async def _lifespan(app):
+    global _http
+    _http = httpx.AsyncClient(timeout=httpx.Timeout(10, read=60), follow_redirects=True)
+    try:
+        yield
+    finally:
+        await _http.aclose()
+
+
+app = FastAPI(title="WikiPodKids API", version="1", lifespan=_lifespan)
+
+
+async def _run(fn, *args):
+    """Call a blocking service function off the event loop, within the shared thread limit."""
+    return await anyio.to_thread.run_sync(fn, *args, limiter=_blocking)
+
+
+class GenerateRequest(BaseModel):
+    topic: str = Field(min_length=1, max_length=200)
+    minutes: float = Field(2.5, gt=0, le=30)
+    age_label: str = Field("7-12", pattern="^(3-6|7-12)$")
+    voice_name: str = DEFAULT_HE_VOICE
+    use_cache: bool = True
+    # None -> TTS_AUDIO_PROFILE; Opus profiles fall back to MP3 unless Accept/User-Agent says Opus plays
+    audio_profile: Optional[str] = Field(None, pattern="^(mp3|mp3_16k|opus|opus_16k|auto)$")
+
+
+def _public_job(snap: dict) -> dict:
+    """Job snapshot without server-side details (local paths, the prefetched summary tuple)."""
+    result = dict(snap["result"])
+    has_audio = bool(result.pop("audio_path", None))
+    params = {k: v for k, v in snap["params"].items() if k != "summary"}
+    return {
+        "id": snap["id"],
+        "status": snap["status"],
+        "stage": snap["stage"],
+        "progress": snap["progress"],
+        "params": params,
+        "result": result,
+        "audio_url": f"/jobs/{snap['id']}/audio" if has_audio and snap["status"] == "done" else None,
+        "error": snap["error"],
+    }
+
+
+def _job_or_404(job_id: str) -> dict:
+    snap = get_job_manager().get(job_id)
+    if snap is None:
+        raise HTTPException(404, "job not found")
+    return snap
+
+
+async def _acquire_stream_slot() -> None:
+    if _streams.locked():
+        raise HTTPException(503, "too many concurrent audio streams", headers={"Retry-After": "5"})
+    await _streams.acquire()
+
+
+@app.get("/healthz")
+async def healthz():
+    return {"ok": True}
+
+
+@app.get("/episodes/lookup")
+async def lookup(topic: str, minutes: float = Query(2.5, gt=0)):
+    cached = await _run(get_cached_podcast, topic, minutes)
+    if not cached:
+        raise HTTPException(404, "no saved episode for this topic and length")
+    return {"topic": topic, "minutes": minutes, **cached}
+
+
+@app.get("/episodes")
+async def episodes(
+    search: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    rows = await _run(list_saved_podcasts_cached, limit, offset, True, search)
+    return {"items": [{k: v for k, v in r.items() if k != "script"} for r in rows], "limit": limit, "offset": offset}
+
+
+@app.get("/episodes/audio")
+async def episode_audio(topic: str, minutes: float = Query(2.5, gt=0)):
+    cached = await _run(get_cached_podcast, topic, minutes)
+    if not cached or not cached.get("public_url"):
+        raise HTTPException(404, "no saved audio for this topic and length")
+    await _acquire_stream_slot()
+    try:
+        upstream = await _http.send(_http.build_request("GET", cached["public_url"]), stream=True)
+    except httpx.HTTPError as e:
+        _streams.release()
+        raise HTTPException(502, f"storage unavailable: {e}")
+    if upstream.status_code != 200:
+        await upstream.aclose()
+        _streams.release()
+        raise HTTPException(502, f"storage returned {upstream.status_code}")
+
+    async def body() -> AsyncIterator[bytes]:
+        try:
+            async for chunk in upstream.aiter_bytes(API_STREAM_CHUNK):
+                yield chunk
+        finally:
+            await upstream.aclose()
+            _streams.release()
+
+    headers = {k: upstream.headers[k] for k in ("content-length", "etag", "cache-control") if k in upstream.headers}
+    return StreamingResponse(body(), media_type=upstream.headers.get("content-type", "audio/mpeg"), headers=headers)
+
+
+@app.post("/generate", status_code=202)
+async def generate(req: GenerateRequest, request: Request):
+    if is_mixed_he_en(req.topic):
+        raise HTTPException(422, "הטקסט מכיל עברית ואנגלית — נסו בעברית בלבד.")
+    if req.use_cache:
+        cached = await _run(get_cached_podcast, req.topic, req.minutes)
+        if cached:
+            tts_avoided(True)
+            return JSONResponse({"cached": True, "topic": req.topic, "minutes": req.minutes, **cached}, status_code=200)
+    try:
+        profile = negotiate(
+            request.headers.get("user-agent"),
+            req.audio_profile or DEFAULT_PROFILE,
+            accept=request.headers.get("accept"),
+        )
+        job_id = get_job_manager().submit(
+            req.topic, req.minutes, req.age_label, req.voice_name, audio_profile=profile
+        )
+    except JobQueueFull as e:
+        raise HTTPException(429, str(e), headers={"Retry-After": "30"})
+    return {"cached": False, "subscription": _subscribe(job_id), "job": _public_job(_job_or_404(job_id))}
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    return _public_job(_job_or_404(job_id))
+
+
+@app.delete("/jobs/{job_id}")
+async def job_cancel(job_id: str, subscription: str):
+    """Drop the subscription /generate returned; repeating it is a no-op."""
+    _job_or_404(job_id)
+    with _subscriptions_lock:
+        sub = _subscriptions.get(subscription)
+        if sub is None or sub[0] != job_id:
+            raise HTTPException(403, "unknown subscription for this job")
+        active, sub[1] = sub[1], False
+    if not active:
+        return {"cancelled": False, "unsubscribed": False}
+    return {"cancelled": get_job_manager().cancel(job_id), "unsubscribed": True}
+
+
+def _iter_file(path: str) -> Iterator[bytes]:
+    with open(path, "rb") as fh:
+        while True:
+            chunk = fh.read(API_STREAM_CHUNK)
+            if not chunk:
+                return
+            yield chunk
+
+
+@app.get("/jobs/{job_id}/audio")
+async def job_audio(job_id: str):
+    snap = _job_or_404(job_id)
+    path = snap["result"].get("audio_path")
+    if snap["status"] != "done" or not path:
+        raise HTTPException(409, f"job is {snap['status']}, audio not ready")
+    await _acquire_stream_slot()
+    owner = f"api-stream:{uuid.uuid4().hex}"
+    get_audio_cache().pin(owner, path)  # before the stat: not evicted between it and the stream
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        get_audio_cache().pin(owner, None)
+        _streams.release()
+        raise HTTPException(410, "audio was evicted from the local cache")
+
+    async def body() -> AsyncIterator[bytes]:
+        # file reads happen on worker threads; the event loop only forwards chunks
+        it = _iter_file(path)
+        try:
+            while True:
+                chunk = await _run(next, it, None)
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            it.close()
+            get_audio_cache().pin(owner, None)
+            _streams.release()
+
+    ext = os.path.splitext(path)[1] or ".mp3"
+    return StreamingResponse(
+        body(),
+        media_type=mime_for_path(path),
+        headers={"Content-Length": str(size), "Content-Disposition": f'inline; filename="{job_id}{ext}"'},
+    )
@@ -1,32 +1,51 @@
 # app.py
 import html
+import time
+import uuid
 import os, streamlit as st
-import mutagen.mp3
 
 # --- Load .env early so services can read keys ---
 from dotenv import load_dotenv, find_dotenv
 load_dotenv(find_dotenv(usecwd=True), override=True)
 
 # ---------- Services ----------
-from services.wiki import get_hebrew_summary
-from services.generator import generate_kids_podcast_script
-from services.tts import split_text_safe, synthesize_chunks_to_file
+from services.jobs import get_job_manager, JobQueueFull
+from services.search_flow import run_search
+from services.audio_cache import get_audio_cache
+from services.tracing import span, recent_traces, waterfall
+from services.metrics import start_http_server as start_metrics_server
 from services.store import (
-    get_cached_podcast,
     save_on_five_stars,
     delete_episode_admin,
     upload_mp3_to_supabase,
-    list_saved_podcasts_alphabetical,  # NEW
+    list_saved_podcasts_cached,  # memoized until the catalog changes
 )
 
 # ---------- NEW: persistent counter + push + shutdown ----------
 # Uses Supabase + Pushover (PUSHOVER_APP_TOKEN, PUSHOVER_USER_KEY) and the app_state table
 import services.app_state as app_state
+from services.config import config_problems
+from services import ratelimit
+from services.metering import usage_by_day, usage_totals
+from services.audio_profiles import mime_for_path, negotiate as negotiate_audio_profile, supports_opus
+
+# Prometheus /metrics on a side port (METRICS_PORT); started once per process, no-op if unset
+start_metrics_server()
 
 # ---------- Settings & page ----------
 DEFAULT_HE_VOICE = "he-IL-Wavenet-B"  # more natural; try B as well
 
+
+def _user_agent() -> str:
+    try:
+        return st.context.headers.get("User-Agent", "") or ""
+    except Exception:
+        return ""
+
 st.set_page_config(page_title="פודקאסט ילדים מוויקיפדיה", layout="wide", initial_sidebar_state="collapsed")
+# Missing keys are reported here instead of failing the import; the affected step errors when used.
+for _problem in config_problems():
+    st.warning(_problem)
 st.markdown(
     """
     <div style="
@@ -161,6 +180,7 @@ st.markdown("""
 st.caption("⭐ כל פרק חדש נשמר למאגר רק אם הדירוג הוא ⭐⭐⭐⭐⭐.")
 
 # ---------- Session state ----------
+jobs = get_job_manager()  # process-wide background generation pool
 ss = st.session_state
 ss.setdefault("topic", "")
 ss.setdefault("minutes", 2.5)
@@ -170,6 +190,17 @@ ss.setdefault("public_url_saved", None)
 ss.setdefault("storage_key_saved", None)
 ss.setdefault("using_cached", False)
 ss.setdefault("last_summary", None)
+ss.setdefault("job_id", None)
+ss.setdefault("generation_id", None)     # job id of the generated episode; its usage row is linked on save
+ss.setdefault("audio_duration_sec", None)  # measured from the MP3 by the job
+ss.setdefault("session_id", uuid.uuid4().hex)
+if "audio_profile" not in ss:
+    # Output encoding for this browser (TTS_AUDIO_PROFILE, falling back to MP3 where Opus can't play)
+    ss["audio_profile"] = negotiate_audio_profile(_user_agent())
+
+# Keep this session's local MP3 out of audio/ eviction while it is on screen (lease renewed per rerun)
+audio_cache = get_audio_cache()
+audio_cache.pin(ss["session_id"], ss.get("audio_path"))
 # Sidebar state
 ss.setdefault("sb_page", 1)
 ss.setdefault("sb_search", "")
@@ -187,6 +218,44 @@ with st.sidebar.expander("⚙️ ניהול אפליקציה (כיבוי/הפע
             if c2.button("🔴 כבה אפליקציה"):
                 app_state.set_enabled(False); st.toast("האפליקציה כובתה", icon="🛑")
             st.caption(f"סה\"כ חיפושים מצטבר: {app_state.get_state().get('searches_total', 0)}")
+            fl = jobs.flights.stats()
+            st.caption(f"יצירות פעילות: {fl['inflight']} · בקשות זהות שאוחדו: {fl['coalesced']} מתוך {fl['calls']}")
+            for name, lim in (("OpenAI", ratelimit.OPENAI), ("TTS", ratelimit.TTS)):
+                rl = lim.stats()
+                st.caption(
+                    f"{name}: עוכבו {rl['delayed']} ({rl['waited_sec']:.0f} שנ׳) · נדחו {rl['rejected']} מתוך {rl['admitted'] + rl['rejected']}"
+                )
+
+            # Per-search waterfall (services/tracing.py): where did the time go?
+            traces = recent_traces(limit=10)
+            if traces:
+                labels = [f"{t['attrs'].get('topic', t['name'])} · {t['duration_ms']:.0f}ms" for t in traces]
+                pick = st.selectbox("מעקב חיפוש", range(len(traces)), format_func=lambda i: labels[i], key="trace_pick")
+                rows = waterfall(traces[pick]["spans"])
+                st.code(
+                    "\n".join(
+                        f"{r['name']:<30} {r['offset_ms']:>8.0f} {r['duration_ms']:>8.0f}ms "
+                        f"|{r['bar']:<40}|{' !' if r['status'] != 'ok' else ''}"
+                        for r in rows
+                    ),
+                    language=None,
+                )
+
+            # Cost per generation (services/metering.py): only queried when asked for
+            if st.checkbox("עלויות (30 יום)", key="usage_show"):
+                days = usage_by_day(30)
+                tot = usage_totals(30)
+                per_min = f"${tot['cost_per_audio_min']:.4f}" if tot["cost_per_audio_min"] is not None else "—"
+                st.caption(
+                    f"{int(tot['generations'])} יצירות ({int(tot['saved'])} נשמרו) · "
+                    f"{tot['audio_sec'] / 60:.1f} דקות אודיו · ${tot['cost_usd']:.2f} · {per_min} לדקת אודיו"
+                )
+                if days:
+                    st.line_chart(
+                        {"day": [d["day"] for d in days], "$/audio min": [d["cost_per_audio_min"] for d in days]},
+                        x="day",
+                    )
+                    st.dataframe(days, hide_index=True)
         else:
             st.caption("הכנס/י סיסמה כדי לשלוט בהדלקה/כיבוי ולהציג מונה חיפושים.")
     else:
@@ -225,7 +294,7 @@ with st.sidebar:
 
     try:
         with st.spinner("טוען פרקים (א-ת)…"):
-            rows = list_saved_podcasts_alphabetical(
+            rows = list_saved_podcasts_cached(
                 limit=sb_limit,
                 offset=sb_offset,
                 collapse_by_minutes=True,
@@ -268,7 +337,10 @@ def render_episode_view(*, script: str, public_url: str, is_cached: bool):
     if is_cached:
         st.success("נמצא פרק שמור ⭐⭐⭐⭐⭐ — משתמשים בו אוטומטית.")
     st.markdown("## האזנה לפרק:")
-    st.audio(public_url)
+    if mime_for_path(public_url) == "audio/ogg" and not supports_opus(_user_agent()):
+        st.info("הפרק שמור בפורמט Opus שהדפדפן הזה לא מנגן — אפשר להוריד ולהאזין בנגן אחר.")
+    else:
+        st.audio(public_url, format=mime_for_path(public_url))
     st.markdown(f"[🔗 הורדה/פתיחה]({public_url})")
     st.markdown("## התסריט 🧾")
     st.markdown(
@@ -321,75 +393,116 @@ ss["minutes"] = minutes
 
 # ---------- Fetch on search click ----------
 if search_clicked and ss["topic"]:
-
-    # Count this search persistently + push on every 10th (10,20,30…)
-    try:
-        total_searches = app_state.increment_searches_and_maybe_notify(every=10)
-        st.caption(f"(מידע למפתחת) חיפושים מצטבר: {total_searches}")
-    except Exception:
-        # never break the app if push/counter fails
-        st.caption("(מידע למפתחת) לא ניתן לעדכן מונה חיפושים כרגע.")
-
-    # Try to use a cached episode first
-    try:
-        cached = get_cached_podcast(ss["topic"], ss["minutes"])
-    except Exception as e:
-        cached = None
-        st.warning(f"לא ניתן לטעון פרק שמור כרגע: {e}")
-
-    if cached:
-        ss["using_cached"] = True
-        ss["script"] = cached.get("script")
-        ss["audio_path"] = None
-        ss["public_url_saved"] = cached.get("public_url")
-        ss["storage_key_saved"] = None
-        ss["last_summary"] = None
-    else:
-        ss["using_cached"] = False
-        ss["public_url_saved"] = None
-        ss["storage_key_saved"] = None
-
-        st.toast("מחפשת מידע ראשוני…", icon="🔎")
-        with st.spinner("מביאה תקציר מוויקיפדיה…"):
-            ok, summary_or_msg = get_hebrew_summary(ss["topic"])
-        if not ok:
-            st.error(summary_or_msg)
+    # One trace per search: fan-out steps and the background job nest under this span
+    with span("search", topic=ss["topic"], minutes=ss["minutes"], age=age_label):
+        # Counter, cache lookup and a speculative wiki fetch run concurrently, each with a deadline
+        search = run_search(ss["topic"], ss["minutes"])
+
+        # Count this search persistently + push on every 10th (10,20,30…)
+        if search["searches_total"] is not None:
+            st.caption(f"(מידע למפתחת) חיפושים מצטבר: {search['searches_total']}")
         else:
-            ss["last_summary"] = summary_or_msg
-
+            # never break the app if push/counter fails
+            st.caption("(מידע למפתחת) לא ניתן לעדכן מונה חיפושים כרגע.")
+
+        # Use a cached episode if there is one
+        cached = search["cached"]
+        if search["cache_error"]:
+            st.warning(f"לא ניתן לטעון פרק שמור כרגע: {search['cache_error']}")
+
+        # Whatever this session was generating no longer feeds the view: release it below,
+        # on a hit as well, or it would later overwrite the cached episode's script/audio.
+        prev_job = ss.get("job_id")
+        if cached:
+            ss["job_id"] = None
+            ss["using_cached"] = True
+            ss["script"] = cached.get("script")
+            ss["audio_path"] = None
+            ss["public_url_saved"] = cached.get("public_url")
+            ss["storage_key_saved"] = None
+            ss["last_summary"] = None
+        else:
+            ss["using_cached"] = False
+            ss["public_url_saved"] = None
+            ss["storage_key_saved"] = None
+            ss["script"] = None
+            ss["audio_path"] = None
+            ss["last_summary"] = None
+
+            # Generation runs in the background job pool; below we poll it on every rerun.
+            # Submit before releasing the previous job: a repeat click on the same request
+            # re-attaches to it instead of cancelling and starting over.
+            prefetched = search["summary"]
+            if prefetched and not prefetched[0]:
+                # Wikipedia already said no (no page / mixed languages): nothing to generate
+                ss["job_id"] = None
+                st.error(prefetched[1])
+            else:
+                try:
+                    ss["job_id"] = jobs.submit(
+                        topic=ss["topic"],
+                        minutes=ss["minutes"],
+                        age_label=age_label,
+                        voice_name=DEFAULT_HE_VOICE,
+                        summary=prefetched,
+                        audio_profile=ss["audio_profile"],
+                    )
+                    st.toast("מחפשת מידע ראשוני…", icon="🔎")
+                except JobQueueFull as e:
+                    ss["job_id"] = None
+                    st.error(str(e))
+        if prev_job:
+            jobs.cancel(prev_job)  # only stops it if no other session is waiting on it
+
+# ---------- Poll background generation ----------
+JOB_STAGE_LABELS = {
+    None: "ממתינה בתור…",
+    "wiki": "מביאה תקציר מוויקיפדיה…",
+    "script": "מייצרת תסריט…",
+    "split": "מכינה קטעים להקראה…",
+    "tts": "טקסט לדיבור (TTS)…",
+}
+
+if ss.get("job_id"):
+    job = jobs.get(ss["job_id"])
+    if job is None:
+        ss["job_id"] = None
+    elif job["status"] not in ("done", "failed", "cancelled"):
+        st.progress(job["progress"], text=JOB_STAGE_LABELS.get(job["stage"], "…"))
+        partial = job["result"]
+        if partial.get("summary"):
             with st.expander("📘 תקציר מוויקיפדיה (לחצי להצגה)", expanded=False):
-                st.write(summary_or_msg)
-            #st.toast("✍️ כותבת תסריט מותאם לילדים…", icon="✍️")
-            with st.spinner("מייצרת תסריט…"):
-                ss["script"] = generate_kids_podcast_script(
-                    summary=summary_or_msg,
-                    topic=ss["topic"],
-                    minutes=ss["minutes"],
-                    age_label=age_label,
-                )
+                st.write(partial["summary"])
+        if st.button("✖️ בטל יצירה", key="cancel_job_btn"):
+            jobs.cancel(ss["job_id"])
+        time.sleep(0.7)
+        st.rerun()
+    else:
+        ss["job_id"] = None
+        result = job["result"]
+        ss["last_summary"] = result.get("summary")
+        ss["script"] = result.get("script")
+        ss["audio_path"] = result.get("audio_path")
+        ss["generation_id"] = job["id"]
+        ss["audio_duration_sec"] = result.get("duration_sec")
+        audio_cache.pin(ss["session_id"], ss["audio_path"])
+        if job["status"] == "cancelled":
+            st.info("היצירה בוטלה.")
+        elif job["status"] == "failed":
+            if ss["script"] and not ss["audio_path"]:
+                st.error(f"שגיאה ביצירת אודיו: {job['error']}")
+            else:
+                st.error(job["error"])
 
-            # TTS and save
-            try:
-                st.toast("🎙️ מסנתזת קריינות…", icon="🎙️")
-                with st.spinner("טקסט לדיבור (TTS)…"):
-                    segments = split_text_safe(ss["script"], max_chars=1200)
-                    audio_path = synthesize_chunks_to_file(
-                        segments, voice_name=DEFAULT_HE_VOICE, filename="podcast.mp3"
-                    )
-                ss["audio_path"] = str(audio_path)
+        if ss.get("last_summary"):
+            with st.expander("📘 תקציר מוויקיפדיה (לחצי להצגה)", expanded=False):
+                st.write(ss["last_summary"])
 
-                # --- Length calibration (CHARS_PER_MIN) ---
-                try:
-                    from mutagen.mp3 import MP3  # make sure 'mutagen' is in requirements.txt
-                    audio = MP3(ss["audio_path"])
-                    dur_min = max(0.01, audio.info.length / 60.0)
-                    cpm = int(len(ss["script"]) / dur_min)
-                    st.caption(f"מדידה: {len(ss['script'])} תווים • {dur_min:.2f} דקות • ≈{cpm} תווים/דקה (CHARS_PER_MIN)")
-                except Exception:
-                    pass
-            except Exception as e:
-                st.error(f"שגיאה ביצירת אודיו: {e}")
-                ss["audio_path"] = None
+        # --- Length calibration (CHARS_PER_MIN) ---
+        if ss.get("audio_duration_sec") and ss.get("script"):
+            dur_min = max(0.01, ss["audio_duration_sec"] / 60.0)
+            cpm = int(len(ss["script"]) / dur_min)
+            st.caption(f"מדידה: {len(ss['script'])} תווים • {dur_min:.2f} דקות • ≈{cpm} תווים/דקה (CHARS_PER_MIN)")
 
 # ---------- Render / Actions ----------
 # 1) Cached episode → render + admin delete form
@@ -432,15 +545,17 @@ if ss.get("using_cached") and ss.get("public_url_saved") and ss.get("script"):
 if ss.get("script") and not ss.get("using_cached"):
     st.markdown("## האזנה לפרק:")
     if ss.get("audio_path"):
-        st.audio(ss["audio_path"])
         try:
-            with open(ss["audio_path"], "rb") as fh:
-                mp3_bytes = fh.read()
+            # memoized: reruns don't re-read the file from disk
+            audio_bytes = audio_cache.read_bytes(ss["audio_path"])
+            mime = mime_for_path(ss["audio_path"])
+            ext = "ogg" if mime == "audio/ogg" else "mp3"
+            st.audio(audio_bytes, format=mime)
             st.download_button(
-                "⬇️ הורד MP3 (מקומי)",
-                mp3_bytes,
-                file_name=f"{ss['topic']}_{int(ss['minutes']*60)}s.mp3",
-                mime="audio/mpeg",
+                f"⬇️ הורד {ext.upper()} (מקומי)",
+                audio_bytes,
+                file_name=f"{ss['topic']}_{int(ss['minutes']*60)}s.{ext}",
+                mime=mime,
             )
         except Exception as e:
             st.warning(f"שגיאה בהכנת הורדה מקומית: {e}")
@@ -473,6 +588,8 @@ if st.button("שמור דירוג"):
                     stars=5,
                     public_url=public_url,
                     storage_key=storage_key,
+                    duration_sec=ss.get("audio_duration_sec"),
+                    usage_id=ss.get("generation_id"),
                 )
             if ok:
                 ss["public_url_saved"] = public_url
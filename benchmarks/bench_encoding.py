@@ -0,0 +1,91 @@
+# benchmarks/bench_encoding.py
+# Bytes per episode minute for each TTS audio profile (services/audio_profiles.py).
+# Synthesizes the same Hebrew script once per profile through the real pipeline
+# (iter_synthesized_audio, incl. Ogg remuxing), so it needs Google TTS credentials
+# (GCP_SERVICE_ACCOUNT_JSON / GOOGLE_APPLICATION_CREDENTIALS) and is billed per character.
+# Or measure files you already have with --files.
+#
+#   python benchmarks/bench_encoding.py [--minutes 2.5] [--profiles mp3,opus,opus_16k] [--keep out/]
+#   python benchmarks/bench_encoding.py --files audio/*.mp3 audio/*.ogg
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+
+def measure(path: str) -> dict:
+    from services.metering import measure_audio
+
+    size, duration = measure_audio(path)
+    minutes = (duration or 0) / 60
+    return {
+        "bytes": size,
+        "duration_sec": duration,
+        "bytes_per_min": size / minutes if minutes else None,
+        "kbps": size * 8 / 1000 / duration if duration else None,
+    }
+
+
+def synthesize(profile: str, script: str, voice: str, out_dir: str) -> dict:
+    from services import tts
+    from services.audio_profiles import get_profile
+
+    chunks = tts.split_text_safe(script, max_chars=1200)
+    path = os.path.join(out_dir, f"bench_{profile}.{get_profile(profile).ext}")
+    t0 = time.perf_counter()
+    with open(path, "wb") as f:
+        for piece in tts.iter_synthesized_audio(chunks, voice, profile=profile):
+            f.write(piece)
+    out = measure(path)
+    out["synth_sec"] = time.perf_counter() - t0
+    out["path"] = path
+    return out
+
+
+def report(rows: dict) -> None:
+    base = next((r["bytes_per_min"] for r in rows.values() if r["bytes_per_min"]), None)
+    print(f"{'profile':28s} {'bytes':>10s} {'sec':>8s} {'KB/min':>9s} {'kbps':>7s} {'vs first':>9s} {'GB/1k ep-h':>11s}")
+    for name, r in rows.items():
+        bpm = r["bytes_per_min"]
+        print(
+            f"{name:28s} {r['bytes'] or 0:10d} {r['duration_sec'] or 0:8.1f} "
+            f"{(bpm or 0) / 1024:9.1f} {r['kbps'] or 0:7.1f} "
+            f"{(bpm / base if bpm and base else 0):8.2f}x {(bpm or 0) * 60 * 1000 / 1e9:11.2f}"
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare bytes per episode minute across TTS audio profiles.")
+    parser.add_argument("--minutes", type=float, default=2.5, help="length of the sample script")
+    parser.add_argument("--profiles", default="mp3,mp3_16k,opus,opus_16k")
+    parser.add_argument("--voice", default="he-IL-Wavenet-B")
+    parser.add_argument("--keep", help="write the synthesized files here instead of a temp dir")
+    parser.add_argument("--files", nargs="+", help="measure existing audio files instead of synthesizing")
+    args = parser.parse_args(argv)
+
+    if args.files:
+        report({Path(p).name: measure(p) for p in args.files})
+        return 0
+
+    from benchmarks.bench_text import hebrew_script
+
+    script = hebrew_script(args.minutes)
+    out_dir = args.keep or tempfile.mkdtemp(prefix="bench_encoding_")
+    os.makedirs(out_dir, exist_ok=True)
+    rows = {}
+    for profile in args.profiles.split(","):
+        rows[profile] = synthesize(profile.strip(), script, args.voice, out_dir)
+        print(f"{profile}: {rows[profile]['synth_sec']:.1f}s -> {rows[profile]['path']}", file=sys.stderr)
+    print(f"script: {len(script)} chars (~{args.minutes:g} min target)")
+    report(rows)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
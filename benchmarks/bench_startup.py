@@ -0,0 +1,123 @@
+# benchmarks/bench_startup.py
+# Cold-start cost of importing the service layer that app.py pulls in before first paint.
+# Each sample is a fresh interpreter run with `python -X importtime`. We report:
+# - wall time of the import;
+# - the slowest modules by cumulative import time;
+# - which provider SDKs got loaded (should be none: they load on first use);
+# - sockets opened during import (should be 0: the DB engine and clients are built lazily).
+#
+#   python benchmarks/bench_startup.py [--runs 10] [--module services.store,services.jobs]
+#   python benchmarks/bench_startup.py --out startup.json --max-ms 400   # exit 1 when slower
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# The service modules app.py imports at the top.
+APP_MODULES = (
+    "services.jobs,services.search_flow,services.audio_cache,services.tracing,"
+    "services.metrics,services.store,services.app_state"
+)
+# Loaded on first use only; any of these showing up here is a cold-start regression.
+PROVIDERS = ("openai", "google.cloud.texttospeech", "google.oauth2", "supabase", "sqlalchemy", "mutagen", "wikipedia", "requests")
+
+_PROBE = r"""
+import json, socket, sys, time
+opened = []
+_orig = socket.socket.connect
+def _connect(self, addr, *a, **kw):
+    opened.append(str(addr))
+    return _orig(self, addr, *a, **kw)
+socket.socket.connect = _connect
+t0 = time.perf_counter()
+for name in sys.argv[1].split(","):
+    __import__(name)
+dt = time.perf_counter() - t0
+print(json.dumps({"import_sec": dt, "connections": opened, "modules": sorted(sys.modules)}))
+"""
+
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _parse_importtime(stderr: str) -> dict:
+    """module -> cumulative microseconds, from `-X importtime` output."""
+    out = {}
+    for line in stderr.splitlines():
+        m = _IMPORTTIME.match(line)
+        if m:
+            out[m.group(4)] = int(m.group(2))
+    return out
+
+
+def _sample(modules: str) -> dict:
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "bench-key")
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE, modules],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - t0
+    out = json.loads(proc.stdout.strip().splitlines()[-1])
+    out["process_sec"] = wall
+    out["cumulative_us"] = _parse_importtime(proc.stderr)
+    return out
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure cold-start import time of the service layer.")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--module", default=APP_MODULES, help="comma-separated modules to import")
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    parser.add_argument("--out", help="write a JSON summary here")
+    parser.add_argument("--max-ms", type=float, help="exit 1 if the median import time exceeds this")
+    args = parser.parse_args(argv)
+
+    samples = [_sample(args.module) for _ in range(args.runs)]
+    imports = [s["import_sec"] * 1000 for s in samples]
+    procs = [s["process_sec"] * 1000 for s in samples]
+    conns = max(len(s["connections"]) for s in samples)
+    loaded = sorted({p for s in samples for p in PROVIDERS if p in s["modules"]})
+
+    names = set().union(*(s["cumulative_us"] for s in samples))
+    cumulative = {n: statistics.median(s["cumulative_us"].get(n, 0) for s in samples) / 1000 for n in names}
+    slowest = sorted(cumulative.items(), key=lambda kv: -kv[1])[: args.top]
+
+    print(f"modules:           {args.module}  ({args.runs} runs)")
+    print(f"import  median ms: {statistics.median(imports):8.1f}   min {min(imports):8.1f}   max {max(imports):8.1f}")
+    print(f"process median ms: {statistics.median(procs):8.1f}   min {min(procs):8.1f}   max {max(procs):8.1f}")
+    print(f"sockets opened on import (max): {conns}")
+    print(f"provider SDKs loaded on import: {', '.join(loaded) or 'none'}")
+    print(f"slowest imports (cumulative, median ms):")
+    for name, ms in slowest:
+        print(f"  {ms:8.1f}  {name}")
+
+    summary = {
+        "modules": args.module,
+        "runs": args.runs,
+        "import_ms_median": round(statistics.median(imports), 1),
+        "process_ms_median": round(statistics.median(procs), 1),
+        "connections": conns,
+        "providers_loaded": loaded,
+        "slowest_ms": {n: round(ms, 1) for n, ms in slowest},
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+            f.write("\n")
+    if args.max_ms is not None and summary["import_ms_median"] > args.max_ms:
+        print(f"cold start {summary['import_ms_median']} ms > --max-ms {args.max_ms}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
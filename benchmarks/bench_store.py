@@ -0,0 +1,138 @@
+# benchmarks/bench_store.py
+# services.store latency at catalog scale: lookup, sidebar listing, search, insert.
+# Runs on a throwaway SQLite file by default; point it at TiDB to compare.
+#
+#   python benchmarks/bench_store.py                      # SQLite, 10k and 100k rows
+#   python benchmarks/bench_store.py --rows 10000 --explain
+#   DB_BACKEND=mysql python benchmarks/bench_store.py --no-seed --explain   # plans on TiDB
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+TOPICS = ["דינוזאורים", "חלל", "איינשטיין", "ליאו מסי", "הר געש", "דבורים", "פירמידות", "לווייתנים"]
+MINUTES = [2.5, 5.0, 7.5]
+
+
+def _timeit(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return {
+        "p50": statistics.median(samples),
+        "p95": samples[min(len(samples) - 1, int(0.95 * len(samples)))],
+        "min": samples[0],
+    }
+
+
+def _seed(engine, rows: int, batch: int = 5000):
+    from sqlalchemy import text
+
+    rnd = random.Random(42)
+    sql = text(
+        "INSERT INTO episodes (id, topic, minutes, lang, script, duration_sec, storage_key, public_url, rating) "
+        "VALUES (:id, :topic, :minutes, 'he', :script, :dur, :key, :url, :rating)"
+    )
+    done = 0
+    while done < rows:
+        n = min(batch, rows - done)
+        params = []
+        for _ in range(n):
+            topic = f"{rnd.choice(TOPICS)} {rnd.randrange(rows // 4 or 1)}"
+            minutes = rnd.choice(MINUTES)
+            key = f"audio/{uuid.uuid4().hex}.mp3"
+            params.append({
+                "id": str(uuid.uuid4()), "topic": topic, "minutes": minutes,
+                "script": "תסריט " * 200, "dur": int(minutes * 60), "key": key,
+                "url": f"https://example.supabase.co/storage/v1/object/public/podkids-audio/{key}",
+                "rating": 5 if rnd.random() < 0.8 else 4,
+            })
+        with engine.begin() as conn:
+            conn.execute(sql, params)
+        done += n
+
+
+def _explain(engine, sql: str, params: dict) -> str:
+    from sqlalchemy import text
+
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    with engine.connect() as conn:
+        rows = conn.execute(text(prefix + sql), params).fetchall()
+    return "\n".join("    " + " | ".join(str(c) for c in r) for r in rows)
+
+
+def run(rows: int, repeat: int, seed: bool, explain: bool):
+    from services import db, store
+
+    engine = db.get_engine()
+    if engine is None:
+        raise SystemExit("No database available (check DB_BACKEND / MYSQL_* settings).")
+    if seed:
+        t0 = time.perf_counter()
+        _seed(engine, rows)
+        dt = time.perf_counter() - t0
+        print(f"\n== {engine.dialect.name}: seeded {rows} rows in {dt:.1f}s ({rows / dt:.0f} rows/s)")
+    else:
+        print(f"\n== {engine.dialect.name}: existing data")
+
+    topic = f"{TOPICS[0]} 1"
+    cases = {
+        "get_cached_podcast (hit/miss)": lambda: store.get_cached_podcast(topic, 5.0),
+        "listing page 1": lambda: store.list_saved_podcasts_alphabetical(limit=10, offset=0),
+        "listing page 50": lambda: store.list_saved_podcasts_alphabetical(limit=10, offset=490),
+        "listing search": lambda: store.list_saved_podcasts_alphabetical(limit=10, search="חלל"),
+        "save_on_five_stars": lambda: store.save_on_five_stars(topic, 5.0, "תסריט", stars=5),
+    }
+    for name, fn in cases.items():
+        r = _timeit(fn, repeat)
+        print(f"  {name:32s} p50 {r['p50']:8.2f} ms   p95 {r['p95']:8.2f} ms   min {r['min']:8.2f} ms")
+
+    if explain:
+        print("\n  plan: get_cached_podcast")
+        print(_explain(engine, store.CACHED_PODCAST_SQL, {"topic": topic, "minutes": 5.0}))
+        sql, params = store.listing_query(limit=10, offset=0)
+        print("  plan: listing")
+        print(_explain(engine, sql, params))
+        sql, params = store.listing_query(limit=10, offset=0, search="חלל")
+        print("  plan: listing search")
+        print(_explain(engine, sql, params))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark services.store queries.")
+    parser.add_argument("--rows", type=int, action="append", help="catalog sizes (default 10000, 100000)")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--no-seed", action="store_true", help="use the configured DB as-is")
+    parser.add_argument("--explain", action="store_true", help="print query plans")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+    from services import db
+
+    if args.no_seed:
+        run(0, args.repeat, seed=False, explain=args.explain)
+        return 0
+
+    for rows in args.rows or [10_000, 100_000]:
+        with tempfile.TemporaryDirectory() as tmp:
+            db.DB_BACKEND = "sqlite"
+            db.SQLITE_PATH = os.path.join(tmp, "bench.db")
+            db.reset_engine()
+            run(rows, args.repeat, seed=True, explain=args.explain)
+            db.reset_engine()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,124 @@
+# benchmarks/bench_supabase_clients.py
+# Count TCP connections and wall time per simulated Streamlit rerun
+# (is_enabled + get_state + increment_searches_and_maybe_notify) against a local
+# PostgREST stand-in, with the shared client vs. a fresh client per call (the old behaviour).
+#
+#   python benchmarks/bench_supabase_clients.py [--reruns 20] [--latency-ms 0]
+
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+class _Stub(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    state = {"id": "main", "app_enabled": True, "searches_total": 0, "last_notified_at": None}
+    connections = 0
+    latency = 0.0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        # headers and body are separate writes; avoid Nagle/delayed-ACK stalls on keep-alive
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with _Stub.lock:
+            _Stub.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status: int, body):
+        time.sleep(_Stub.latency)
+        raw = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _body(self):
+        n = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(n) or b"{}") if n else {}
+
+    def do_GET(self):
+        single = "vnd.pgrst.object" in (self.headers.get("Accept") or "")
+        self._reply(200, dict(_Stub.state) if single else [dict(_Stub.state)])
+
+    def do_POST(self):
+        body = self._body()
+        if self.path.split("?", 1)[0].endswith("/rpc/increment_searches"):
+            with _Stub.lock:
+                _Stub.state["searches_total"] += int(body.get("p_by", 1))
+                total = _Stub.state["searches_total"]
+            self._reply(200, total)
+            return
+        # insert of the "main" row: it already exists
+        self._reply(409, {"code": "23505", "message": "duplicate key", "details": None, "hint": None})
+
+    def do_PATCH(self):
+        _Stub.state.update(self._body())
+        self._reply(200, [dict(_Stub.state)])
+
+
+def _rerun(app_state):
+    app_state.is_enabled()
+    app_state.get_state()
+    app_state.increment_searches_and_maybe_notify(every=0)
+
+
+def _measure(label: str, reruns: int, fresh_client_per_call: bool):
+    from services import app_state, supabase_client
+
+    supabase_client.reset()
+    if fresh_client_per_call:
+        orig = app_state._client
+
+        def _fresh():
+            supabase_client.reset()
+            return orig()
+
+        app_state._client = _fresh
+    try:
+        _rerun(app_state)  # warm-up (first connection is unavoidable)
+        start_conns = _Stub.connections
+        t0 = time.perf_counter()
+        for _ in range(reruns):
+            _rerun(app_state)
+        dt = time.perf_counter() - t0
+    finally:
+        if fresh_client_per_call:
+            app_state._client = orig
+    conns = _Stub.connections - start_conns
+    print(f"{label:28s} {conns / reruns:6.2f} connections/rerun   {dt / reruns * 1000:7.2f} ms/rerun")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Connections opened per Streamlit rerun.")
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="server think time per request")
+    args = parser.parse_args(argv)
+
+    _Stub.latency = args.latency_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Stub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    os.environ["SUPABASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ["SUPABASE_SERVICE_ROLE_KEY"] = "bench-service-key"
+    os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+    _measure("fresh client per call", args.reruns, fresh_client_per_call=True)
+    _measure("shared client (registry)", args.reruns, fresh_client_per_call=False)
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
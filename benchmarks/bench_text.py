@@ -0,0 +1,222 @@
+# benchmarks/bench_text.py
+# Micro-benchmarks for the text/script hot paths (tts text prep, generator helpers, wiki check)
+# over realistic Hebrew scripts from 2.5 to 30 minutes, with JSON baselines and a regression check.
+# generate_kids_podcast_script runs against a fake LLM, so only our own code is timed.
+#
+#   python benchmarks/bench_text.py run                          # print results
+#   python benchmarks/bench_text.py run --out current.json
+#   python benchmarks/bench_text.py run --save-baseline          # write benchmarks/baselines/bench_text.json
+#   python benchmarks/bench_text.py run --compare                # run + compare against that baseline
+#   python benchmarks/bench_text.py compare baseline.json current.json [--threshold 0.25]
+
+import argparse
+import datetime as dt
+import json
+import os
+import platform
+import random
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+
+BASELINE = Path(__file__).resolve().parent / "baselines" / "bench_text.json"
+MINUTES = (2.5, 5, 10, 20, 30)
+
+_WORDS = (
+    "ילדים יקרים היום נצא למסע מרתק אל עולם הדינוזאורים שחיו על כדור הארץ לפני מיליוני שנים "
+    "האם ידעתם שחלקם היו גדולים יותר מאוטובוס ואחרים קטנים כמו תרנגולת המדענים מגלים עצמות "
+    "ומאובנים ולומדים מהם איך הדינוזאורים אכלו התנהגו וגידלו את הגוזלים שלהם"
+).split()
+_EXTRAS = ["T-Rex", "NASA", "1990", "65", "&", "<3"]  # mixed scripts, digits and SSML-sensitive chars
+
+
+def hebrew_script(minutes: float, seed: int = 0) -> str:
+    """Deterministic LLM-shaped script: headings, bold, short paragraphs, punctuation (~CHARS_PER_MIN/min)."""
+    from services.config import CHARS_PER_MIN
+
+    rnd = random.Random(seed)
+    target = int(minutes * CHARS_PER_MIN)
+    parts, size, section = [], 0, 1
+    while size < target:
+        if rnd.random() < 0.08:
+            line = f"## חלק {section}: {rnd.choice(_WORDS)}" if rnd.random() < 0.5 else f"**{rnd.choice(_WORDS)} {rnd.choice(_WORDS)}**"
+            section += 1
+        else:
+            words = [rnd.choice(_WORDS) for _ in range(rnd.randint(8, 22))]
+            if rnd.random() < 0.3:
+                words.insert(rnd.randrange(len(words)), rnd.choice(_EXTRAS))
+            if rnd.random() < 0.3:
+                i = rnd.randrange(len(words))
+                words[i] = f"**{words[i]}**"
+            line = " ".join(words) + rnd.choice([".", ".", "!", "?"])
+        parts.append(line)
+        size += len(line) + 1
+    return "\n".join(parts)
+
+
+def _fake_llm(script: str):
+    """Stand-in for oai: the first call returns a short body so the continuation path runs too."""
+    calls = {"n": 0}
+
+    def create(**kwargs):
+        calls["n"] += 1
+        content = script[: len(script) // 2] if calls["n"] % 2 else script[len(script) // 2:]
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+def _time(fn, repeat: int, budget_sec: float):
+    """Per-call microseconds: auto-scale the inner loop to ~budget/repeat, keep min and median."""
+    fn()  # warm-up: first-call costs (regex compiles, lazy imports) would shrink the loop count
+    number, t0 = 1, time.perf_counter()
+    fn()
+    once = time.perf_counter() - t0
+    if once > 0:
+        number = max(1, int(budget_sec / repeat / once))
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - t0) / number * 1e6)
+    samples.sort()
+    return {"min_us": round(samples[0], 2), "median_us": round(samples[len(samples) // 2], 2), "loops": number}
+
+
+def cases():
+    """(name, callable) for every benchmark, built once so setup cost is not timed."""
+    from services import generator, tts, wiki
+
+    out = []
+    for m in MINUTES:
+        script = hebrew_script(m)
+        cleaned = tts._clean_for_tts(script)
+        chunk = tts.split_text_safe(script)[0]
+        tag = f"[{m:g}min]"
+        out += [
+            (f"split_text_safe{tag}", lambda s=script: tts.split_text_safe(s, max_chars=1200)),
+            (f"_clean_for_tts{tag}", lambda s=script: tts._clean_for_tts(s)),
+            (f"_build_ssml{tag}", lambda c=chunk: tts._build_ssml(c)),
+            (f"_trim_to_sentence{tag}", lambda s=cleaned: generator._trim_to_sentence(s, int(len(s) * 0.8))),
+            (f"generate_kids_podcast_script{tag}", _generate_case(generator, script, m)),
+        ]
+    out += [
+        ("_token_cap", lambda: [generator._token_cap(n) for n in (600, 1650, 6600, 19800)]),
+        ("is_mixed_he_en[he]", lambda: wiki.is_mixed_he_en("דינוזאורים בעולם העתיק")),
+        ("is_mixed_he_en[mixed]", lambda: wiki.is_mixed_he_en("דינוזאורים T-Rex")),
+    ]
+    return out
+
+
+def _generate_case(generator, script: str, minutes: float):
+    from services import ratelimit
+
+    fake = _fake_llm(script)
+    # Thousands of calls per second would exhaust any real per-minute quota, and this case
+    # should time our code, not rate-limit sleeps.
+    unlimited = ratelimit.Limiter("openai", {})
+
+    def run():
+        real, generator.oai = generator.oai, fake
+        real_limiter, ratelimit.OPENAI = ratelimit.OPENAI, unlimited
+        try:
+            return generator.generate_kids_podcast_script("תקציר", "דינוזאורים", minutes=minutes)
+        finally:
+            generator.oai = real
+            ratelimit.OPENAI = real_limiter
+
+    return run
+
+
+def run(repeat: int, budget_sec: float, only: str = ""):
+    results = {}
+    for name, fn in cases():
+        if only and only not in name:
+            continue
+        results[name] = _time(fn, repeat, budget_sec)
+        print(f"{name:42s} {results[name]['min_us']:12.1f} µs (min)  {results[name]['median_us']:12.1f} µs (median)")
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "created": dt.datetime.utcnow().isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> int:
+    """Print per-case ratios (current / baseline, on min time). Returns the number of regressions."""
+    regressions = 0
+    for name, cur in sorted(current["results"].items()):
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:42s} {'new':>10s}")
+            continue
+        ratio = cur["min_us"] / base["min_us"] if base["min_us"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag, regressions = "REGRESSION", regressions + 1
+        elif ratio < 1 / (1 + threshold):
+            flag = "faster"
+        print(f"{name:42s} {base['min_us']:12.1f} -> {cur['min_us']:12.1f} µs  x{ratio:5.2f}  {flag}")
+    missing = set(baseline["results"]) - set(current["results"])
+    if missing:
+        print(f"({len(missing)} baseline case(s) not run)")
+    print(f"{regressions} regression(s) over +{threshold:.0%}")
+    return regressions
+
+
+def _load(path) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _dump(data: dict, path) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Text/script hot-path micro-benchmarks.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_run = sub.add_parser("run", help="run the suite")
+    p_run.add_argument("--repeat", type=int, default=7)
+    p_run.add_argument("--budget", type=float, default=0.3, help="seconds of timing per case")
+    p_run.add_argument("-k", dest="only", default="", help="only cases whose name contains this")
+    p_run.add_argument("--out", help="write results JSON here")
+    p_run.add_argument("--save-baseline", action="store_true", help=f"write results to {BASELINE.name}")
+    p_run.add_argument("--compare", action="store_true", help="compare against the saved baseline")
+    p_run.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before flagging")
+
+    p_cmp = sub.add_parser("compare", help="compare two results files")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("current")
+    p_cmp.add_argument("--threshold", type=float, default=0.25)
+
+    args = parser.parse_args(argv)
+    if args.cmd == "compare":
+        return 1 if compare(_load(args.baseline), _load(args.current), args.threshold) else 0
+
+    current = run(args.repeat, args.budget, args.only)
+    if args.out:
+        _dump(current, args.out)
+    if args.save_baseline:
+        _dump(current, BASELINE)
+        print(f"baseline saved to {BASELINE}")
+    if args.compare:
+        print()
+        return 1 if compare(_load(BASELINE), current, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
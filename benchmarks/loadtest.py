@@ -0,0 +1,366 @@
+# benchmarks/loadtest.py
+# N concurrent virtual users driving the real search pipeline (run_search -> JobManager ->
+# wiki/generator/tts -> upload_mp3_to_supabase -> save_on_five_stars) against in-process
+# stand-ins for OpenAI, Google TTS, Wikipedia, Supabase and the DB, each with its own latency
+# distribution. Reports throughput, latency percentiles (cache hits vs. generations) and
+# peak threads / RSS.
+#
+#   python benchmarks/loadtest.py --users 8 --duration 30 --hit-ratio 0.7
+#   python benchmarks/loadtest.py --users 32 --scale 0.1 --job-workers 4 --json out.json
+#   python benchmarks/loadtest.py --openai lognormal:2500,0.4 --tts fixed:400 --db uniform:2,20
+#
+# Distributions (milliseconds): fixed:MS | uniform:LO,HI | lognormal:MEDIAN,SIGMA | normal:MEAN,SD
+
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import itertools
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+_TMP = tempfile.mkdtemp(prefix="podkids-load-")
+# Read at import time by services.*, so set before anything imports them.
+os.environ.setdefault("OPENAI_API_KEY", "loadtest-key")
+os.environ["DB_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(_TMP, "podkids.db")
+os.environ["AUDIO_CACHE_DIR"] = os.path.join(_TMP, "audio")
+os.environ["SUPABASE_URL"] = "http://supabase.local"
+os.environ.setdefault("TRACE_ENABLED", "0")
+
+BYTES_PER_CHAR = 360  # ~32 kbps MP3 at CHARS_PER_MIN=660
+TOPICS = ["דינוזאורים", "חלל", "איינשטיין", "הר געש", "דבורים", "פירמידות", "לווייתנים", "ברקים"]
+
+
+# ---------- latency distributions ----------
+class Dist:
+    def __init__(self, spec: str, scale: float = 1.0, seed: int = 0):
+        kind, _, args = spec.partition(":")
+        self.spec, self.kind, self.scale = spec, kind, scale
+        self.args = [float(a) for a in args.split(",") if a]
+        self.rnd = random.Random(seed)
+        self._lock = threading.Lock()
+        if kind not in ("fixed", "uniform", "lognormal", "normal"):
+            raise ValueError(f"unknown distribution {spec!r}")
+
+    def sample_ms(self) -> float:
+        a = self.args
+        with self._lock:
+            if self.kind == "fixed":
+                ms = a[0]
+            elif self.kind == "uniform":
+                ms = self.rnd.uniform(a[0], a[1])
+            elif self.kind == "lognormal":
+                ms = self.rnd.lognormvariate(math.log(a[0]), a[1])
+            else:
+                ms = self.rnd.gauss(a[0], a[1])
+        return max(0.0, ms) * self.scale
+
+    def sleep(self) -> None:
+        time.sleep(self.sample_ms() / 1000)
+
+
+# ---------- stand-ins ----------
+class FakeOpenAI:
+    """chat.completions.create: sleeps, then returns roughly max_tokens worth of Hebrew text."""
+
+    def __init__(self, dist: Dist):
+        self.dist = dist
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, max_tokens, **kw):
+        self.dist.sleep()
+        from services.config import AVG_CHARS_PER_TOKEN
+
+        sentence = "ילדים יקרים, היום נלמד דבר חדש ומרתק על העולם שסביבנו. "
+        text = (sentence * (int(max_tokens * AVG_CHARS_PER_TOKEN / 1.3) // len(sentence) + 1)).strip()
+        usage = SimpleNamespace(prompt_tokens=sum(len(m["content"]) for m in messages) // 3, completion_tokens=max_tokens)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))], usage=usage)
+
+
+class FakeTTSClient:
+    def __init__(self, dist: Dist):
+        self.dist = dist
+
+    def synthesize_speech(self, input, voice, audio_config):
+        self.dist.sleep()
+        # unique prefix per call: content-addressed uploads must not dedupe across users
+        return SimpleNamespace(audio_content=os.urandom(16) + b"\0" * (len(input.ssml) * BYTES_PER_CHAR // 2))
+
+
+class FakeBucket:
+    def __init__(self, store: "FakeSupabase", name: str):
+        self.s, self.name = store, name
+
+    def exists(self, key):
+        self.s.dist.sleep()
+        with self.s.lock:
+            return (self.name, key) in self.s.objects
+
+    def upload(self, key, body, file_options=None):
+        self.s.dist.sleep()
+        time.sleep(len(body) / self.s.bytes_per_sec)
+        with self.s.lock:
+            self.s.objects[(self.name, key)] = len(body)
+
+    def get_public_url(self, key):
+        return f"{os.environ['SUPABASE_URL']}/storage/v1/object/public/{self.name}/{key}"
+
+    def remove(self, keys):
+        with self.s.lock:
+            for k in keys:
+                self.s.objects.pop((self.name, k), None)
+
+
+class FakeSupabase:
+    """Just enough of the Storage client for upload_mp3_to_supabase; plus the search counter."""
+
+    def __init__(self, dist: Dist, upload_mbps: float):
+        self.dist = dist
+        self.bytes_per_sec = upload_mbps * 1024 * 1024 / 8
+        self.objects = {}
+        self.searches = 0
+        self.lock = threading.Lock()
+        self.storage = SimpleNamespace(from_=lambda bucket: FakeBucket(self, bucket))
+
+    def increment_searches(self) -> int:
+        self.dist.sleep()
+        with self.lock:
+            self.searches += 1
+            return self.searches
+
+
+def install_stand_ins(args):
+    """Point the service modules at the stand-ins. Returns (supabase stand-in, JobManager)."""
+    from sqlalchemy import event
+    from services import db, generator, jobs, store, tts, wiki
+
+    seed = args.seed
+    generator.oai = FakeOpenAI(Dist(args.openai, args.scale, seed + 1))
+    tts_client = FakeTTSClient(Dist(args.tts, args.scale, seed + 2))
+    tts.get_tts_client = lambda: tts_client
+
+    wiki_dist = Dist(args.wiki, args.scale, seed + 3)
+
+    def summary(topic, sentences=6):
+        wiki_dist.sleep()
+        return f"{topic} הוא נושא מעניין. " * sentences
+
+    wiki._wikipedia().summary = summary
+
+    sb = FakeSupabase(Dist(args.supabase, args.scale, seed + 4), args.upload_mbps)
+    store._sb = lambda: sb
+    store.RESUMABLE_THRESHOLD = float("inf")  # TUS goes over raw HTTP; keep every upload on the stand-in
+
+    db_dist = Dist(args.db, args.scale, seed + 5)
+    engine = db.get_engine()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _db_latency(*a):
+        db_dist.sleep()
+
+    manager = jobs.JobManager(workers=args.job_workers, max_pending=args.max_pending)
+    return sb, manager
+
+
+def seed_catalog(n_topics: int, minutes: float):
+    """Saved 5-star episodes that the cache-hit share of searches will find."""
+    from services import store
+
+    topics = [f"{TOPICS[i % len(TOPICS)]} {i}" for i in range(n_topics)]
+    for t in topics:
+        store.save_on_five_stars(t, minutes, "תסריט שמור", stars=5, public_url="u", storage_key=None)
+    return topics
+
+
+# ---------- virtual users ----------
+_FRESH = itertools.count(10**6)  # digits only: a Latin suffix would trip is_mixed_he_en
+class Results:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latency = {"hit": [], "generated": []}
+        self.errors = {}
+
+    def ok(self, kind: str, sec: float) -> None:
+        with self.lock:
+            self.latency[kind].append(sec)
+
+    def error(self, what: str) -> None:
+        with self.lock:
+            self.errors[what] = self.errors.get(what, 0) + 1
+
+
+def one_search(topic, minutes, sb, manager, results, poll_sec):
+    from services import store
+    from services.jobs import JobQueueFull
+    from services.search_flow import run_search
+
+    t0 = time.perf_counter()
+    search = run_search(topic, minutes, count=sb.increment_searches)
+    if search["cached"]:
+        results.ok("hit", time.perf_counter() - t0)
+        return
+    if search["summary"] and not search["summary"][0]:
+        results.error("wiki_rejected")  # app.py shows the message without queueing a job
+        return
+    try:
+        job_id = manager.submit(topic, minutes, "7-12", "he-IL-Wavenet-B", summary=search["summary"])
+    except JobQueueFull:
+        results.error("queue_full")
+        return
+    while True:  # the Streamlit page polls like this on every rerun
+        snap = manager.get(job_id)
+        if snap["status"] in ("done", "failed", "cancelled"):
+            break
+        time.sleep(poll_sec)
+    if snap["status"] != "done":
+        results.error(f"job_{snap['status']}: {(snap['error'] or '')[:80]}")
+        return
+    try:
+        public_url, key = store.upload_mp3_to_supabase(snap["result"]["audio_path"])
+        if not store.save_on_five_stars(topic, minutes, snap["result"]["script"], 5, public_url, key):
+            results.error("save")
+            return
+    except Exception as e:
+        results.error(type(e).__name__)
+        return
+    results.ok("generated", time.perf_counter() - t0)
+
+
+def virtual_user(uid, args, hot_topics, sb, manager, results, stop_at):
+    rnd = random.Random(args.seed * 1000 + uid)
+    n = 0
+    while time.monotonic() < stop_at and (not args.searches or n < args.searches):
+        if rnd.random() < args.hit_ratio:
+            topic = rnd.choice(hot_topics)
+        else:
+            topic = f"{rnd.choice(TOPICS)} {next(_FRESH)}"  # never cached, never coalesced
+        one_search(topic, args.minutes, sb, manager, results, args.poll_ms / 1000)
+        n += 1
+        time.sleep(rnd.uniform(0, args.think_ms / 1000) if args.think_ms else 0)
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        import resource  # peak, not current, where /proc is unavailable
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Sampler(threading.Thread):
+    def __init__(self, every: float = 0.2):
+        super().__init__(daemon=True)
+        self.every, self.peak_threads, self.peak_rss = every, 0, 0.0
+        self.rss_start = _rss_mb()
+        self._halt = threading.Event()
+
+    def run(self):
+        while not self._halt.is_set():
+            self.peak_threads = max(self.peak_threads, threading.active_count())
+            self.peak_rss = max(self.peak_rss, _rss_mb())
+            self._halt.wait(self.every)
+
+    def stop(self):
+        self._halt.set()
+        self.join()
+
+
+def _pct(samples, q):
+    if not samples:
+        return None
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(q * len(s)))]
+
+
+def report(results: Results, elapsed: float, sampler: Sampler, args) -> dict:
+    out = {"config": vars(args), "elapsed_sec": round(elapsed, 2), "errors": results.errors}
+    total = 0
+    for kind, samples in results.latency.items():
+        total += len(samples)
+        out[kind] = {
+            "count": len(samples),
+            "p50_ms": _ms(_pct(samples, 0.50)),
+            "p95_ms": _ms(_pct(samples, 0.95)),
+            "p99_ms": _ms(_pct(samples, 0.99)),
+            "mean_ms": _ms(statistics.fmean(samples)) if samples else None,
+        }
+    out["throughput_per_sec"] = round(total / elapsed, 3) if elapsed else 0.0
+    out["peak_threads"] = sampler.peak_threads
+    out["rss_mb"] = {"start": round(sampler.rss_start, 1), "peak": round(sampler.peak_rss, 1)}
+    return out
+
+
+def _ms(sec):
+    return None if sec is None else round(sec * 1000, 1)
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Concurrent-session load test against local service stand-ins.")
+    p.add_argument("--users", type=int, default=8, help="concurrent virtual users")
+    p.add_argument("--duration", type=float, default=20.0, help="seconds to keep starting searches")
+    p.add_argument("--searches", type=int, default=0, help="stop each user after this many (0 = duration only)")
+    p.add_argument("--hit-ratio", type=float, default=0.7, help="share of searches for an already-saved episode")
+    p.add_argument("--hot-topics", type=int, default=50, help="saved episodes seeded for cache hits")
+    p.add_argument("--minutes", type=float, default=2.5)
+    p.add_argument("--think-ms", type=float, default=500, help="max random pause between a user's searches")
+    p.add_argument("--poll-ms", type=float, default=700, help="job polling interval (app.py reruns every 0.7s)")
+    p.add_argument("--job-workers", type=int, default=2)
+    p.add_argument("--max-pending", type=int, default=20)
+    p.add_argument("--openai", default="lognormal:2000,0.4", help="per completion call")
+    p.add_argument("--tts", default="lognormal:600,0.3", help="per TTS chunk")
+    p.add_argument("--wiki", default="lognormal:300,0.5")
+    p.add_argument("--supabase", default="lognormal:80,0.3", help="per Storage/REST request")
+    p.add_argument("--upload-mbps", type=float, default=50.0)
+    p.add_argument("--db", default="lognormal:8,0.5", help="per SQL statement")
+    p.add_argument("--scale", type=float, default=1.0, help="multiply every latency (e.g. 0.1 for a quick run)")
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--json", help="also write the report here")
+    args = p.parse_args(argv)
+
+    sb, manager = install_stand_ins(args)
+    hot = seed_catalog(args.hot_topics, args.minutes)
+    results = Results()
+    sampler = Sampler()
+    sampler.start()
+
+    t0 = time.monotonic()
+    stop_at = t0 + args.duration
+    users = [
+        threading.Thread(target=virtual_user, args=(i, args, hot, sb, manager, results, stop_at), daemon=True)
+        for i in range(args.users)
+    ]
+    for u in users:
+        u.start()
+    for u in users:
+        u.join()
+    elapsed = time.monotonic() - t0
+    sampler.stop()
+    manager.shutdown(wait=False)
+
+    out = report(results, elapsed, sampler, args)
+    print(f"users={args.users} hit_ratio={args.hit_ratio} job_workers={args.job_workers} elapsed={out['elapsed_sec']}s")
+    print(f"throughput: {out['throughput_per_sec']} searches/s")
+    for kind in ("hit", "generated"):
+        r = out[kind]
+        print(f"{kind:10s} n={r['count']:<5d} p50={r['p50_ms']} ms  p95={r['p95_ms']} ms  p99={r['p99_ms']} ms")
+    print(f"errors: {out['errors'] or 'none'}")
+    print(f"peak threads: {out['peak_threads']}   RSS: {out['rss_mb']['start']} -> {out['rss_mb']['peak']} MB (peak)")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(out, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,6 +1,8 @@
 # init_db.py
-from services.schema import ensure_schema
+from services.migrations import main
 
 if __name__ == "__main__":
-    ensure_schema()
-    print("✅ Database schema ensured.")
+    code = main()
+    if code == 0:
+        print("✅ Database schema ensured.")
+    raise SystemExit(code)
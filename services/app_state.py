@@ -1,26 +1,23 @@
 import os
+import time
+import atexit
+import threading
 import datetime as dt
-import requests
-import streamlit as st
-from supabase import create_client, Client
+from typing import TYPE_CHECKING
 
-PUSHOVER_APP_TOKEN = os.getenv("PUSHOVER_APP_TOKEN")
-PUSHOVER_USER_KEY = os.getenv("PUSHOVER_USER_KEY")
+from services import notify, supabase_client
+from services.tracing import traced
 
+if TYPE_CHECKING:
+    from supabase import Client
 
-def _client() -> Client | None:
-    """Lazy-init Supabase client; return None if creds are missing so UI stays up."""
-    url = os.getenv("SUPABASE_URL") or st.secrets.get("SUPABASE_URL", None)
-    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or st.secrets.get("SUPABASE_SERVICE_ROLE_KEY", None)
-    if not (url and key):
-        return None
-    try:
-        return create_client(url, key)
-    except Exception:
-        return None
 
+def _client() -> "Client | None":
+    """Shared Supabase client; return None if creds are missing so UI stays up."""
+    return supabase_client.try_get_client(allow_anon=False)
 
-def _ensure_row(sb: Client):
+
+def _ensure_row(sb: "Client"):
     try:
         sb.table("app_state").insert({"id": "main"}).execute()
     except Exception:
@@ -28,48 +25,209 @@ def _ensure_row(sb: Client):
 
 
 def _send_push(msg: str):
-    if not (PUSHOVER_APP_TOKEN and PUSHOVER_USER_KEY):
-        return
-    try:
-        requests.post(
-            "https://api.pushover.net/1/messages.json",
-            data={"token": PUSHOVER_APP_TOKEN, "user": PUSHOVER_USER_KEY, "message": msg},
-            timeout=5,
-        )
-    except Exception:
-        pass
+    # Queued for a background worker (services/notify.py); never waits on Pushover.
+    notify.send_async(msg)
 
 
+@traced("app_state.get_state")
 def get_state() -> dict:
     sb = _client()
     if sb is None:
         return {"app_enabled": True, "searches_total": 0}
-    _ensure_row(sb)
+    rows = sb.table("app_state").select("*").eq("id", "main").limit(1).execute().data
+    if rows:
+        return rows[0]
+    _ensure_row(sb)  # first run only
     return sb.table("app_state").select("*").eq("id", "main").single().execute().data
 
 
+# ---------- Kill-switch ----------
+# app.py asks is_enabled() on every rerun, so serve it from a process-wide cache that a
+# daemon thread refreshes every ENABLED_TTL_SEC. If Supabase is unreachable we keep the
+# last known value (default: enabled) rather than blocking or flapping the UI.
+ENABLED_TTL_SEC = float(os.getenv("APP_ENABLED_TTL_SEC", "10"))
+
+
+class _EnabledFlag:
+    def __init__(self, ttl_sec: float):
+        self.ttl_sec = ttl_sec
+        self.value = True
+        self.fetched_at = 0.0  # monotonic; 0 = never fetched
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def refresh(self) -> None:
+        try:
+            value = bool(get_state().get("app_enabled", True))
+        except Exception:
+            return  # last-known-good
+        self.set(value)
+
+    def set(self, value: bool) -> None:
+        with self._lock:
+            self.value = value
+            self.fetched_at = time.monotonic()
+
+    def _run(self):
+        while True:
+            time.sleep(self.ttl_sec)
+            self.refresh()
+
+    def get(self) -> bool:
+        if self._thread is None:
+            with self._lock:
+                start = self._thread is None
+                if start:
+                    self._thread = threading.Thread(target=self._run, name="app-enabled", daemon=True)
+            if start:
+                self.refresh()  # first call in this process: fetch once, synchronously
+                self._thread.start()
+        return self.value
+
+
+_ENABLED = _EnabledFlag(ENABLED_TTL_SEC)
+
+
+@traced("app_state.is_enabled")
 def is_enabled() -> bool:
-    return bool(get_state().get("app_enabled", True))
+    return _ENABLED.get()
 
 
+@traced("app_state.set_enabled")
 def set_enabled(enabled: bool):
     sb = _client()
     if sb is None:
         return
     sb.table("app_state").update({"app_enabled": enabled}).eq("id", "main").execute()
+    _ENABLED.set(bool(enabled))  # this process sees it now; others within ENABLED_TTL_SEC
 
 
-def increment_searches_and_maybe_notify(every: int = 10) -> int:
-    sb = _client()
-    if sb is None:
-        return 0
+# ---------- Search counter ----------
+# Atomic server-side increment: one RPC round-trip, no lost updates across sessions.
+# Deploy supabase/migrations/*_increment_searches.sql; until then we fall back to the
+# old read-modify-write path so the app keeps working.
+COUNTER_BUFFERED = os.getenv("SEARCH_COUNTER_BUFFERED", "0").lower() in ("1", "true", "yes")
+COUNTER_FLUSH_SEC = float(os.getenv("SEARCH_COUNTER_FLUSH_SEC", "5"))
+COUNTER_FLUSH_EVENTS = int(os.getenv("SEARCH_COUNTER_FLUSH_EVENTS", "20"))
+
+
+def _increment_legacy(sb: "Client", by: int) -> int:
     _ensure_row(sb)
     cur = sb.table("app_state").select("searches_total").eq("id", "main").single().execute().data["searches_total"]
-    new_total = cur + 1
+    new_total = cur + by
     sb.table("app_state").update(
         {"searches_total": new_total, "last_notified_at": dt.datetime.utcnow().isoformat()}
     ).eq("id", "main").execute()
+    return new_total
 
-    if every > 0 and new_total % every == 0:
-        _send_push(f"App reached {new_total} searches.")
+
+def _increment(sb: "Client", by: int) -> int:
+    """Add `by` to searches_total server-side and return the new total."""
+    try:
+        data = sb.rpc("increment_searches", {"p_id": "main", "p_by": by}).execute().data
+    except Exception as e:
+        # Only fall back when the function isn't deployed; other errors may have committed.
+        if "PGRST202" in str(e) or "Could not find the function" in str(e):
+            return _increment_legacy(sb, by)
+        raise
+    if isinstance(data, list):
+        data = data[0] if data else 0
+    if isinstance(data, dict):
+        data = data.get("increment_searches", data.get("searches_total", 0))
+    return int(data)
+
+
+def _notify_crossings(new_total: int, by: int, every: int) -> None:
+    """Push once for every multiple of `every` in (new_total - by, new_total].
+    Server-side increments hand out disjoint ranges, so each multiple is pushed exactly once."""
+    if every <= 0:
+        return
+    first = (new_total - by) // every + 1
+    for n in range(first, new_total // every + 1):
+        _send_push(f"App reached {n * every} searches.")
+
+
+class _CounterBuffer:
+    """Collects increments in-process and flushes them in one RPC every N seconds or N events."""
+
+    def __init__(self, flush_sec: float, flush_events: int):
+        self.flush_sec = flush_sec
+        self.flush_events = flush_events
+        self.pending = 0
+        self.last_total = None  # stored total, read once on first use so estimates start from it
+        self.every = 10
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def _seed(self) -> None:
+        try:
+            total = int(get_state().get("searches_total") or 0)
+        except Exception:
+            total = 0  # the first flush corrects it
+        with self._lock:
+            if self.last_total is None:
+                self.last_total = total
+
+    def add(self, every: int) -> int:
+        if self.last_total is None:
+            self._seed()
+        with self._lock:
+            self.pending += 1
+            self.every = every
+            estimate = self.last_total + self.pending
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="search-counter", daemon=True)
+                self._thread.start()
+        if self.pending >= self.flush_events:
+            self._wake.set()
+        return estimate
+
+    def flush(self) -> None:
+        with self._lock:
+            by, self.pending = self.pending, 0
+            every = self.every
+        if not by:
+            return
+        sb = _client()
+        if sb is None:
+            with self._lock:
+                self.pending += by  # keep them until a client is available
+            return
+        try:
+            new_total = _increment(sb, by)
+        except Exception:
+            with self._lock:
+                self.pending += by  # retry on the next flush
+            return
+        with self._lock:
+            self.last_total = max(self.last_total or 0, new_total)
+        _notify_crossings(new_total, by, every)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_sec)
+            self._wake.clear()
+            self.flush()
+
+
+_BUFFER = _CounterBuffer(COUNTER_FLUSH_SEC, COUNTER_FLUSH_EVENTS)
+atexit.register(_BUFFER.flush)
+
+
+@traced("app_state.increment_searches_and_maybe_notify")
+def increment_searches_and_maybe_notify(every: int = 10, buffered: bool | None = None) -> int:
+    """
+    Count one search and push on every `every`-th total.
+    buffered=True (or SEARCH_COUNTER_BUFFERED=1) returns immediately with an estimate and
+    lets a background thread flush the increments; the push still fires exactly once.
+    """
+    if COUNTER_BUFFERED if buffered is None else buffered:
+        return _BUFFER.add(every)
+
+    sb = _client()
+    if sb is None:
+        return 0
+    new_total = _increment(sb, 1)
+    _notify_crossings(new_total, 1, every)
     return new_total
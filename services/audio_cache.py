@@ -0,0 +1,163 @@
+# services/audio_cache.py
+# Local audio artifacts (MP3 / Ogg Opus) under audio/: where synthesize_chunks_to_file writes, how long files live,
+# and how the UI reads them back.
+#
+# - Total size cap (AUDIO_CACHE_MAX_MB) and max age (AUDIO_CACHE_MAX_AGE_SEC); eviction is
+#   least-recently-used first and never touches a file pinned by a live session.
+# - Pins are leases: each rerun re-pins the session's current file, so a closed tab's pin
+#   simply expires after AUDIO_CACHE_PIN_TTL_SEC.
+# - read_bytes() memoizes file contents (bounded by AUDIO_CACHE_MEMO_MB), so st.audio and
+#   st.download_button don't re-read megabytes from disk on every rerun.
+
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from services.metrics import cache_result
+from services.audio_profiles import AUDIO_EXTENSIONS
+
+AUDIO_DIR = os.getenv("AUDIO_CACHE_DIR", "audio")
+MAX_BYTES = int(float(os.getenv("AUDIO_CACHE_MAX_MB", "500")) * 1024 * 1024)
+MAX_AGE_SEC = float(os.getenv("AUDIO_CACHE_MAX_AGE_SEC", "86400"))
+PIN_TTL_SEC = float(os.getenv("AUDIO_CACHE_PIN_TTL_SEC", "3600"))
+MEMO_MAX_BYTES = int(float(os.getenv("AUDIO_CACHE_MEMO_MB", "64")) * 1024 * 1024)
+
+
+class AudioCache:
+    def __init__(
+        self,
+        directory: str = AUDIO_DIR,
+        max_bytes: int = MAX_BYTES,
+        max_age_sec: float = MAX_AGE_SEC,
+        pin_ttl_sec: float = PIN_TTL_SEC,
+        memo_max_bytes: int = MEMO_MAX_BYTES,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_sec = max_age_sec
+        self.pin_ttl_sec = pin_ttl_sec
+        self.memo_max_bytes = memo_max_bytes
+        self._access: Dict[str, float] = {}                # path -> last use (wall clock)
+        self._pins: Dict[str, Tuple[str, float]] = {}      # owner -> (path, lease expiry)
+        self._memo: "OrderedDict[Tuple[str, float, int], bytes]" = OrderedDict()
+        self._memo_bytes = 0
+        self._stats = {"memo_hits": 0, "memo_misses": 0, "evicted": 0, "evicted_bytes": 0}
+        self._lock = threading.Lock()
+
+    # ---------- writing ----------
+    def new_path(self, filename: str = "podcast.mp3") -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, f"{uuid.uuid4()}_{filename}")
+
+    def register(self, path: str) -> List[str]:
+        """Call after a file was written; marks it as fresh and evicts to stay under the caps."""
+        with self._lock:
+            self._access[path] = time.time()
+        return self.evict()
+
+    # ---------- pins ----------
+    def pin(self, owner: str, path: Optional[str]) -> None:
+        """Set (or refresh) the one file `owner` (a session) is using; None releases it."""
+        with self._lock:
+            if path:
+                self._pins[owner] = (path, time.time() + self.pin_ttl_sec)
+                self._access[path] = time.time()
+            else:
+                self._pins.pop(owner, None)
+
+    def _pinned(self, now: float) -> set:
+        for owner in [o for o, (_, exp) in self._pins.items() if exp < now]:
+            del self._pins[owner]
+        return {p for p, _ in self._pins.values()}
+
+    # ---------- reading ----------
+    def read_bytes(self, path: str) -> bytes:
+        """File contents, memoized by (path, mtime, size) so an overwritten file isn't served stale."""
+        st = os.stat(path)
+        key = (path, st.st_mtime, st.st_size)
+        with self._lock:
+            self._access[path] = time.time()
+            data = self._memo.get(key)
+            if data is not None:
+                self._memo.move_to_end(key)
+                self._stats["memo_hits"] += 1
+                cache_result("audio", True)
+                return data
+            self._stats["memo_misses"] += 1
+        cache_result("audio", False)
+        with open(path, "rb") as fh:
+            data = fh.read()
+        if len(data) <= self.memo_max_bytes:
+            with self._lock:
+                if key not in self._memo:
+                    self._memo[key] = data
+                    self._memo_bytes += len(data)
+                while self._memo_bytes > self.memo_max_bytes:
+                    _, old = self._memo.popitem(last=False)
+                    self._memo_bytes -= len(old)
+        return data
+
+    def _drop_memo(self, path: str) -> None:
+        for key in [k for k in self._memo if k[0] == path]:
+            self._memo_bytes -= len(self._memo.pop(key))
+
+    # ---------- eviction ----------
+    def evict(self) -> List[str]:
+        """
+        Remove files older than max_age_sec, then least-recently-used files until the directory
+        is under max_bytes. Pinned files are skipped. Returns the removed paths.
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        now = time.time()
+        files = []  # (last_used, size, path); files from before a restart fall back to mtime
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(AUDIO_EXTENSIONS):
+                    st = entry.stat()
+                    path = os.path.join(self.directory, entry.name)
+                    files.append((self._access.get(path, st.st_mtime), st.st_size, path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+
+        removed = []
+        with self._lock:
+            pinned = self._pinned(now)
+            for last_used, size, path in files:
+                if path in pinned:
+                    continue
+                if now - last_used <= self.max_age_sec and total <= self.max_bytes:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError:
+                    continue
+                total -= size
+                removed.append(path)
+                self._access.pop(path, None)
+                self._drop_memo(path)
+                self._stats["evicted"] += 1
+                self._stats["evicted_bytes"] += size
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, memo_bytes=self._memo_bytes, pinned=len(self._pins))
+
+
+_CACHE: Optional[AudioCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_audio_cache() -> AudioCache:
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = AudioCache()
+    return _CACHE
@@ -0,0 +1,77 @@
+# services/audio_profiles.py
+# TTS output encodings and how the player picks one.
+#
+# Google TTS returns MP3 at a fixed ~32 kbps regardless of sample rate; OGG_OPUS at a speech
+# sample rate is the compact option (measure with benchmarks/bench_encoding.py). Opus in Ogg
+# plays in Chrome, Edge, Firefox and Android, but only in recent Safari (18.4+), so
+# negotiation falls back to MP3 whenever the browser is unknown or too old.
+#
+# TTS_AUDIO_PROFILE: mp3 (default, plays everywhere), mp3_16k, opus, opus_16k, or auto
+# (opus_16k on phones, opus on desktop, mp3 where Opus can't play).
+
+import os
+import re
+from typing import Dict, NamedTuple, Optional
+
+DEFAULT_PROFILE = os.getenv("TTS_AUDIO_PROFILE", "mp3").strip().lower()
+
+AUDIO_EXTENSIONS = (".mp3", ".ogg")  # what the audio cache, bucket listings and reconcile treat as episodes
+
+
+class AudioProfile(NamedTuple):
+    name: str
+    encoding: str                  # texttospeech.AudioEncoding member name
+    sample_rate_hz: Optional[int]  # None -> provider default (24 kHz for WaveNet)
+    ext: str
+    mime: str
+
+
+PROFILES: Dict[str, AudioProfile] = {
+    "mp3": AudioProfile("mp3", "MP3", None, "mp3", "audio/mpeg"),
+    "mp3_16k": AudioProfile("mp3_16k", "MP3", 16000, "mp3", "audio/mpeg"),
+    "opus": AudioProfile("opus", "OGG_OPUS", 24000, "ogg", "audio/ogg"),
+    "opus_16k": AudioProfile("opus_16k", "OGG_OPUS", 16000, "ogg", "audio/ogg"),
+}
+
+_MOBILE = re.compile(r"Mobile|Android|iPhone|iPad|iPod", re.I)
+_WEBKIT_ONLY = re.compile(r"iPhone|iPad|iPod|CriOS|FxiOS|EdgiOS")  # every iOS browser is Safari underneath
+_SAFARI_VERSION = re.compile(r"Version/(\d+)(?:\.(\d+))?.*Safari")
+
+
+def get_profile(name: Optional[str]) -> AudioProfile:
+    """The named profile; unknown names (and "auto" without a browser to ask) fall back to MP3."""
+    return PROFILES.get((name or "").lower(), PROFILES["mp3"])
+
+
+def supports_opus(user_agent: Optional[str], accept: Optional[str] = None) -> bool:
+    """Can this client play Ogg Opus? An explicit Accept header wins; otherwise judge the User-Agent."""
+    if accept and re.search(r"audio/(ogg|opus)|codecs=\"?opus", accept, re.I):
+        return True
+    ua = user_agent or ""
+    if not ua:
+        return False
+    safari = _SAFARI_VERSION.search(ua)
+    if _WEBKIT_ONLY.search(ua) or (safari and not re.search(r"Chrome|Chromium|Edg/|Firefox|OPR/", ua)):
+        if not safari:
+            return False
+        major, minor = int(safari.group(1)), int(safari.group(2) or 0)
+        return (major, minor) >= (18, 4)
+    return bool(re.search(r"Chrome/|Chromium/|Firefox/|Edg/|OPR/", ua))
+
+
+def negotiate(user_agent: Optional[str], preferred: str = DEFAULT_PROFILE, accept: Optional[str] = None) -> str:
+    """Profile name to generate for this client: `preferred`, unless the client can't play it."""
+    preferred = (preferred or "mp3").lower()
+    opus_ok = supports_opus(user_agent, accept)
+    if preferred == "auto":
+        if not opus_ok:
+            return "mp3"
+        return "opus_16k" if _MOBILE.search(user_agent or "") else "opus"
+    profile = get_profile(preferred)
+    if profile.encoding == "OGG_OPUS" and not opus_ok:
+        return "mp3"
+    return profile.name
+
+
+def mime_for_path(path: str) -> str:
+    return "audio/ogg" if str(path).lower().endswith(".ogg") else "audio/mpeg"
@@ -0,0 +1,197 @@
+# services/bucket_mirror.py
+# Local mirror of Supabase Storage object metadata (name, size, updated_at, public URL) so
+# list_bucket_mp3s can page/search without a Storage API call per render.
+#
+# - Incremental refresh: list newest-first (sortBy updated_at desc) and stop at the high-water mark.
+# - Full refresh (every BUCKET_MIRROR_FULL_SEC): re-list by name and sweep rows that disappeared.
+# - Public URLs are built locally from SUPABASE_URL; no get_public_url call per file.
+# Backed by sqlite3 (":memory:" by default, or a file via BUCKET_MIRROR_PATH).
+
+import os
+import time
+import sqlite3
+import threading
+from urllib.parse import quote
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services.audio_profiles import AUDIO_EXTENSIONS
+
+MIRROR_PATH = os.getenv("BUCKET_MIRROR_PATH", ":memory:")
+TTL_SEC = float(os.getenv("BUCKET_MIRROR_TTL_SEC", "60"))           # serve without refreshing
+MAX_STALE_SEC = float(os.getenv("BUCKET_MIRROR_MAX_STALE_SEC", "900"))  # beyond this, use the live API
+FULL_REFRESH_SEC = float(os.getenv("BUCKET_MIRROR_FULL_SEC", "3600"))
+PAGE_SIZE = 100
+
+# list_raw(prefix, limit, offset, sort_column, order) -> raw Storage list items
+RawLister = Callable[[str, int, int, str, str], List[Dict[str, Any]]]
+
+
+def public_url_for(base_url: str, bucket: str, storage_key: str) -> str:
+    """Same URL get_public_url returns for a public bucket, built without a client call."""
+    return f"{base_url.rstrip('/')}/storage/v1/object/public/{bucket}/{quote(storage_key)}"
+
+
+class BucketMirror:
+    def __init__(self, bucket: str, prefix: str, list_raw: RawLister, base_url: str, path: str = MIRROR_PATH):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.list_raw = list_raw
+        self.base_url = base_url
+        self.refreshed_at = 0.0       # monotonic; 0 = never
+        self.full_refreshed_at = 0.0
+        self._high_water = ""          # max updated_at seen (ISO strings sort chronologically)
+        self._generation = 0           # re-seeded from the table on each full refresh
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        cols = [r[1] for r in self._db.execute("PRAGMA table_info(objects)")]
+        if cols and "prefix" not in cols:
+            self._db.execute("DROP TABLE objects")  # pre-prefix layout; it's only a cache
+        # Several mirrors (one per prefix) may share one BUCKET_MIRROR_PATH file.
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS objects (
+              bucket TEXT, prefix TEXT, storage_key TEXT, name TEXT, size INTEGER, updated_at TEXT,
+              public_url TEXT, generation INTEGER,
+              PRIMARY KEY (bucket, prefix, storage_key)
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_objects_name ON objects(bucket, prefix, name)")
+
+    # ---------- writes ----------
+    def _row(self, item: Dict[str, Any]) -> Optional[Tuple]:
+        name = item.get("name", "")
+        if not name.lower().endswith(AUDIO_EXTENSIONS):
+            return None
+        key = f"{self.prefix}/{name}" if self.prefix else name
+        size = (item.get("metadata") or {}).get("size") or item.get("size")
+        updated = item.get("updated_at") or item.get("created_at") or ""
+        url = public_url_for(self.base_url, self.bucket, key)
+        return (self.bucket, self.prefix, key, name, size, updated, url, self._generation)
+
+    def _upsert(self, items: List[Dict[str, Any]]) -> None:
+        rows = [r for r in (self._row(i) for i in items) if r]
+        if not rows:
+            return
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._db.commit()
+        self._high_water = max([self._high_water] + [r[5] for r in rows])
+
+    def record(self, storage_key: str, size: Optional[int] = None, updated_at: str = "") -> None:
+        """Write-through after our own upload, so a fresh save shows up before the next refresh."""
+        prefix, _, name = storage_key.rpartition("/")
+        if prefix != self.prefix:
+            return
+        self._upsert([{"name": name, "size": size, "updated_at": updated_at}])
+
+    def forget(self, storage_key: str) -> None:
+        """Write-through after our own delete."""
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM objects WHERE bucket = ? AND prefix = ? AND storage_key = ?",
+                (self.bucket, self.prefix, storage_key),
+            )
+            self._db.commit()
+
+    # ---------- refresh ----------
+    def full_refresh(self) -> int:
+        """Re-list everything by name and drop rows that no longer exist. Returns object count."""
+        # Continue from the stored generation, not 0: with a file-backed mirror, rows written by
+        # an earlier process must not already carry the number this sweep keeps.
+        with self._lock:
+            stored = self._db.execute(
+                "SELECT MAX(generation) FROM objects WHERE bucket = ? AND prefix = ?", (self.bucket, self.prefix)
+            ).fetchone()[0]
+        self._generation = max(self._generation, stored or 0) + 1
+        offset, seen = 0, 0
+        while True:
+            items = self.list_raw(self.prefix, PAGE_SIZE, offset, "name", "asc")
+            self._upsert(items)
+            seen += len(items)
+            if len(items) < PAGE_SIZE:
+                break
+            offset += PAGE_SIZE
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM objects WHERE bucket = ? AND prefix = ? AND generation != ?",
+                (self.bucket, self.prefix, self._generation),
+            )
+            self._db.commit()
+        self.refreshed_at = self.full_refreshed_at = time.monotonic()
+        return seen
+
+    def incremental_refresh(self) -> int:
+        """
+        Fetch objects at or after the high-water mark (newest first); `>=` so uploads sharing the
+        mark's timestamp aren't skipped (the upsert is idempotent). Returns the count strictly newer.
+        """
+        if not self.full_refreshed_at:
+            return self.full_refresh()
+        high_water, offset, changed = self._high_water, 0, 0
+        while True:
+            items = self.list_raw(self.prefix, PAGE_SIZE, offset, "updated_at", "desc")
+            fresh = [i for i in items if (i.get("updated_at") or i.get("created_at") or "") >= high_water]
+            self._upsert(fresh)
+            changed += sum(1 for i in fresh if (i.get("updated_at") or i.get("created_at") or "") > high_water)
+            if len(fresh) < len(items) or len(items) < PAGE_SIZE:
+                break
+            offset += PAGE_SIZE
+        self.refreshed_at = time.monotonic()
+        return changed
+
+    def ensure_fresh(self) -> bool:
+        """
+        Refresh if older than TTL_SEC. Returns True if the mirror may be served,
+        False if it is too stale (> MAX_STALE_SEC) and the caller should use the live API.
+        """
+        age = time.monotonic() - self.refreshed_at if self.refreshed_at else float("inf")
+        if age <= TTL_SEC:
+            return True
+        if self._refresh_lock.acquire(blocking=False):
+            try:
+                if not self.full_refreshed_at or time.monotonic() - self.full_refreshed_at > FULL_REFRESH_SEC:
+                    self.full_refresh()
+                else:
+                    self.incremental_refresh()
+                return True
+            except Exception:
+                pass
+            finally:
+                self._refresh_lock.release()
+        # Another session is refreshing, or the refresh failed: serve last-known data if recent enough.
+        return age <= MAX_STALE_SEC
+
+    # ---------- reads ----------
+    def list(self, page: int = 1, page_size: int = 20, search: str = "") -> List[Dict[str, Any]]:
+        sql = "SELECT name, public_url, size, updated_at, storage_key FROM objects WHERE bucket = ? AND prefix = ?"
+        params: List[Any] = [self.bucket, self.prefix]
+        if search:
+            sql += " AND name LIKE ?"
+            params.append(f"%{search}%")
+        sql += " ORDER BY name LIMIT ? OFFSET ?"
+        params += [int(page_size), (int(page) - 1) * int(page_size)]
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [
+            {"name": n, "public_url": u, "size": s, "updated_at": t, "storage_key": k}
+            for n, u, s, t, k in rows
+        ]
+
+
+_MIRRORS: Dict[Tuple[str, str], BucketMirror] = {}
+_MIRRORS_LOCK = threading.Lock()
+
+
+def get_mirror(bucket: str, prefix: str, list_raw: RawLister, base_url: str) -> BucketMirror:
+    """Process-wide mirror per (bucket, prefix)."""
+    with _MIRRORS_LOCK:
+        m = _MIRRORS.get((bucket, prefix))
+        if m is None:
+            m = _MIRRORS[(bucket, prefix)] = BucketMirror(bucket, prefix, list_raw, base_url)
+        return m
+
+
+def existing_mirror(bucket: str, prefix: str) -> Optional[BucketMirror]:
+    return _MIRRORS.get((bucket, prefix))
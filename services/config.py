@@ -1,19 +1,33 @@
 # services/config.py
-import os, io, base64, json
+# Provider SDKs (openai, google-auth, streamlit) are imported on first use, not here:
+# this module is imported by everything, so whatever it imports is paid before first paint.
+import os, io, sys, base64, json, threading
 from pathlib import Path
+from typing import List
 
-import streamlit as st
 from dotenv import dotenv_values, load_dotenv, find_dotenv
-from google.oauth2 import service_account
-from openai import OpenAI
 
-# ---- load .env (Cloud via DOTENV_B64, local via .env file) ----
-def _load_env_portable():
+
+_SECRETS_FILES = (Path(".streamlit/secrets.toml"), Path.home() / ".streamlit" / "secrets.toml")
+
+
+def _secret(name: str):
+    # Outside `streamlit run` (API, CLIs, benchmarks) only pay for importing streamlit if there
+    # is a secrets file to read.
+    if "streamlit" not in sys.modules and not any(p.exists() for p in _SECRETS_FILES):
+        return None
     # Accessing st.secrets can raise if no secrets.toml exists locally — guard it.
     try:
-        b64 = st.secrets.get("DOTENV_B64")
+        import streamlit as st
+
+        return st.secrets.get(name)
     except Exception:
-        b64 = None
+        return None
+
+
+# ---- load .env (Cloud via DOTENV_B64, local via .env file) ----
+def _load_env_portable():
+    b64 = _secret("DOTENV_B64")
 
     if b64:
         raw = base64.b64decode(b64).decode("utf-8")
@@ -33,11 +47,34 @@ _load_env_portable()  # must run before any os.getenv below
 
 # ---- OpenAI ----
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if not OPENAI_API_KEY:
-    raise RuntimeError("OPENAI_API_KEY חסר ב-secrets/.env")
-
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-oai = OpenAI(api_key=OPENAI_API_KEY)
+
+_OPENAI = None
+_OPENAI_LOCK = threading.Lock()
+
+
+def get_openai():
+    """The OpenAI client, built on first use; raises if OPENAI_API_KEY is missing."""
+    global _OPENAI
+    if _OPENAI is None:
+        with _OPENAI_LOCK:
+            if _OPENAI is None:
+                if not OPENAI_API_KEY:
+                    raise RuntimeError("OPENAI_API_KEY חסר ב-secrets/.env")
+                from openai import OpenAI
+
+                _OPENAI = OpenAI(api_key=OPENAI_API_KEY)
+    return _OPENAI
+
+
+class _LazyOpenAI:
+    """Stands in for the client at module level (`oai.chat.completions...`) without building it on import."""
+
+    def __getattr__(self, name):
+        return getattr(get_openai(), name)
+
+
+oai = _LazyOpenAI()
 
 
 # ---- Google Cloud credentials ----
@@ -46,6 +83,8 @@ def build_gcp_credentials():
     Prefer JSON-in-env (works on Streamlit Cloud),
     optionally support a secrets table, then local file path for dev.
     """
+    from google.oauth2 import service_account
+
     # 1) JSON string in env (from DOTENV_B64/.env)
     js = os.getenv("GCP_SERVICE_ACCOUNT_JSON")
     if js:
@@ -55,10 +94,7 @@ def build_gcp_credentials():
             raise RuntimeError("GCP_SERVICE_ACCOUNT_JSON קיים אבל אינו JSON תקין") from e
 
     # 2) (optional) secrets table if you ever used [gcp_service_account] in secrets.toml
-    try:
-        tbl = st.secrets.get("gcp_service_account")
-    except Exception:
-        tbl = None
+    tbl = _secret("gcp_service_account")
     if tbl:
         return service_account.Credentials.from_service_account_info(dict(tbl))
 
@@ -79,9 +115,64 @@ def get_gcp_creds():
     return _GCP_CREDS
 
 
+def config_problems() -> List[str]:
+    """
+    Missing settings, checked from the environment only (no imports, no network), so the UI can
+    warn instead of failing on import. The affected feature still raises when it is used.
+    """
+    problems = []
+    if not OPENAI_API_KEY:
+        problems.append("OPENAI_API_KEY חסר ב-secrets/.env")
+    if not (
+        os.getenv("GCP_SERVICE_ACCOUNT_JSON")
+        or os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+        or _secret("gcp_service_account")
+    ):
+        problems.append("GCP credentials לא נמצאו (GCP_SERVICE_ACCOUNT_JSON)")
+    return problems
+
+
 # ---- App constants (keep yours) ----
 CHARS_PER_MIN        = int(os.getenv("CHARS_PER_MIN", "660"))
 AVG_CHARS_PER_TOKEN  = float(os.getenv("AVG_CHARS_PER_TOKEN", "2.8"))
 MAXTOK_BUFFER        = float(os.getenv("MAXTOK_BUFFER", "0.25"))
 MIN_TOKENS_FLOOR     = int(os.getenv("MIN_TOKENS_FLOOR", "512"))
 MIN_CHARS_FLOOR      = int(os.getenv("MIN_CHARS_FLOOR", "600"))
+
+
+# ---- Database pool & query instrumentation (defined in services/db_config.py) ----
+from services.db_config import (  # noqa: E402
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE_SEC,
+    DB_POOL_TIMEOUT_SEC,
+    DB_SLOW_QUERY_MS,
+    DB_SLOW_QUERY_LOG,
+)
+
+
+# ---- Background generation jobs ----
+JOB_WORKERS          = int(os.getenv("JOB_WORKERS", "2"))       # concurrent generations per process
+JOB_MAX_PENDING      = int(os.getenv("JOB_MAX_PENDING", "20"))  # queued + running before submit() refuses
+JOB_RETENTION_SEC    = int(os.getenv("JOB_RETENTION_SEC", "3600"))
+
+
+# ---- Search click fan-out (counter / cache lookup / speculative wiki) ----
+SEARCH_FANOUT_WORKERS      = int(os.getenv("SEARCH_FANOUT_WORKERS", "8"))
+SEARCH_COUNTER_TIMEOUT_SEC = float(os.getenv("SEARCH_COUNTER_TIMEOUT_SEC", "2"))
+SEARCH_CACHE_TIMEOUT_SEC   = float(os.getenv("SEARCH_CACHE_TIMEOUT_SEC", "5"))
+SEARCH_WIKI_TIMEOUT_SEC    = float(os.getenv("SEARCH_WIKI_TIMEOUT_SEC", "8"))
+
+
+# ---- Provider rate limits (per process; <= 0 disables a limit) ----
+OPENAI_RPM              = float(os.getenv("OPENAI_RPM", "500"))      # requests / minute
+OPENAI_TPM              = float(os.getenv("OPENAI_TPM", "200000"))   # prompt + completion tokens / minute
+TTS_RPM                 = float(os.getenv("TTS_RPM", "1000"))        # synthesize calls / minute
+TTS_CPM                 = float(os.getenv("TTS_CPM", "150000"))      # SSML characters / minute
+RATE_LIMIT_MAX_WAIT_SEC = float(os.getenv("RATE_LIMIT_MAX_WAIT_SEC", "20"))  # longer queue -> reject up front
+
+
+# ---- Cost metering (USD list prices used for estimates in the admin view) ----
+PRICE_OPENAI_PROMPT_PER_1M      = float(os.getenv("PRICE_OPENAI_PROMPT_PER_1M", "0.15"))
+PRICE_OPENAI_COMPLETION_PER_1M  = float(os.getenv("PRICE_OPENAI_COMPLETION_PER_1M", "0.60"))
+PRICE_TTS_PER_1M_CHARS          = float(os.getenv("PRICE_TTS_PER_1M_CHARS", "16"))  # WaveNet voices
@@ -1,11 +1,37 @@
 import os
-from sqlalchemy import create_engine, text
+import time
+import logging
+import threading
 from dotenv import load_dotenv, find_dotenv
 
 # Load .env locally (on Streamlit Cloud your config already injected env vars)
 load_dotenv(find_dotenv(usecwd=True), override=False)
 
-engine = None  # set below once we can build it safely
+log = logging.getLogger(__name__)
+
+# The engine is built lazily on first use (see get_engine) so importing this module
+# never opens a connection or runs DDL. Schema changes live in services/migrations.py.
+_ENGINE = None
+_ENGINE_LOCK = threading.Lock()
+_LAST_FAILURE = 0.0  # monotonic time of the last failed build; 0 = never failed
+
+# "mysql" (TiDB, default) or "sqlite" (local file; for offline dev, tests and benchmarks).
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql").strip().lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "data/podkids.db")
+
+# After a failed build, wait this long before trying again (keeps a broken config
+# from paying the failure on every call, but lets the app recover without a restart).
+RECONNECT_INTERVAL_SEC = float(os.getenv("DB_RECONNECT_INTERVAL_SEC", "15"))
+
+# Pool & query instrumentation settings (re-exported by services.config).
+from .db_config import (  # noqa: E402  (after load_dotenv)
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE_SEC,
+    DB_POOL_TIMEOUT_SEC,
+    DB_SLOW_QUERY_MS,
+    DB_SLOW_QUERY_LOG,
+)
 
 
 def _compose_tidb_url() -> str:
@@ -23,55 +49,129 @@ def _compose_tidb_url() -> str:
     return f"mysql+pymysql://{user}:{pwd}@{host}:{port}/{db}?charset=utf8mb4"
 
 
+def _make_sqlite_engine(path: str):
+    from sqlalchemy import create_engine, event
+    from .db_metrics import TimedQueuePool, instrument_engine
+
+    if path != ":memory:":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    eng = create_engine(
+        f"sqlite:///{path}",
+        future=True,
+        connect_args={"check_same_thread": False},  # Streamlit reruns hop threads
+        poolclass=TimedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT_SEC,
+    )
+
+    @event.listens_for(eng, "connect")
+    def _pragmas(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")  # readers don't block the single writer
+        cur.execute("PRAGMA busy_timeout=5000")
+        cur.close()
+
+    instrument_engine(eng, slow_query_ms=DB_SLOW_QUERY_MS, slow_log_path=DB_SLOW_QUERY_LOG)
+
+    # A local file costs no network round-trip, so bring it up to date on first use.
+    from .migrations import migrate
+
+    migrate(engine=eng)
+    return eng
+
+
 def _make_engine():
+    from sqlalchemy import create_engine
+    from .db_metrics import TimedQueuePool, instrument_engine
+
+    if DB_BACKEND == "sqlite":
+        return _make_sqlite_engine(SQLITE_PATH)
+    if DB_BACKEND != "mysql":
+        raise RuntimeError(f"Unknown DB_BACKEND {DB_BACKEND!r} (expected 'mysql' or 'sqlite').")
+
     url = _compose_tidb_url()
     ssl_args = {
         "ssl_disabled": False,
         "ssl_verify_cert": True,
         "ssl_verify_identity": True,
     }
-    return create_engine(url, pool_pre_ping=True, future=True, connect_args={"ssl": ssl_args})
+    # pool_pre_ping transparently replaces connections dropped during a DB outage.
+    eng = create_engine(
+        url,
+        pool_pre_ping=True,
+        future=True,
+        connect_args={"ssl": ssl_args},
+        poolclass=TimedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_recycle=DB_POOL_RECYCLE_SEC,
+        pool_timeout=DB_POOL_TIMEOUT_SEC,
+    )
+    return instrument_engine(
+        eng,
+        slow_query_ms=DB_SLOW_QUERY_MS,
+        slow_log_path=DB_SLOW_QUERY_LOG,
+    )
+
+
+def get_engine():
+    """
+    Return the shared engine, building it on first use.
+    Returns None if the DB is misconfigured; the build is retried after
+    RECONNECT_INTERVAL_SEC so a fixed config/outage recovers without a restart.
+    """
+    global _ENGINE, _LAST_FAILURE
+    if _ENGINE is not None:
+        return _ENGINE
+    with _ENGINE_LOCK:
+        if _ENGINE is not None:
+            return _ENGINE
+        if _LAST_FAILURE and time.monotonic() - _LAST_FAILURE < RECONNECT_INTERVAL_SEC:
+            return None
+        try:
+            _ENGINE = _make_engine()
+            _LAST_FAILURE = 0.0
+            log.info("DB engine created")
+        except Exception as e:
+            _LAST_FAILURE = time.monotonic()
+            log.warning("DB unavailable (%s); running without database features.", e)
+            return None
+    return _ENGINE
 
 
-def _try_init_engine():
-    """Attempt to create the engine and schema, but never crash the app if DB is misconfigured."""
-    global engine
-    try:
-        engine = _make_engine()
-        init_schema()
-        print("DB connected")
-    except Exception as e:
-        engine = None
-        print(f"DB unavailable: {e}. Running without database features.")
+def reset_engine() -> None:
+    """Dispose the current engine (if any) so the next get_engine() builds a fresh one."""
+    global _ENGINE, _LAST_FAILURE
+    with _ENGINE_LOCK:
+        if _ENGINE is not None:
+            _ENGINE.dispose()
+        _ENGINE = None
+        _LAST_FAILURE = 0.0
 
 
 def init_schema():
-    """Create the 'episodes' table on TiDB/MySQL if it doesn't exist."""
-    ddl = """
-    CREATE TABLE IF NOT EXISTS episodes (
-      id           VARCHAR(36) PRIMARY KEY,
-      topic        TEXT NOT NULL,
-      minutes      DOUBLE NOT NULL,
-      lang         VARCHAR(8) DEFAULT 'he',
-      script       LONGTEXT,
-      duration_sec INT,
-      storage_key  TEXT,
-      public_url   TEXT,
-      rating       INT,
-      created_at   DATETIME DEFAULT CURRENT_TIMESTAMP
-    );
-    """
-    with engine.begin() as conn:
-        conn.execute(text(ddl))
+    """Bring the schema up to date. Kept for old callers; see services/migrations.py."""
+    from .migrations import migrate
+
+    return migrate()
 
 
 def ping():
-    if engine is None:
+    eng = get_engine()
+    if eng is None:
         return None
-    with engine.connect() as conn:
+    from sqlalchemy import text
+
+    with eng.connect() as conn:
         return conn.execute(text("SELECT 1")).scalar()
 
 
-_try_init_engine()
+def __getattr__(name):
+    # Backwards compatibility: `from services.db import engine` resolves lazily.
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
-__all__ = ["engine", "init_schema", "ping"]
+__all__ = ["engine", "get_engine", "reset_engine", "init_schema", "ping"]
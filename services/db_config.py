@@ -0,0 +1,12 @@
+# services/db_config.py
+# Database pool & query instrumentation settings. services/config.py re-exports these; they
+# live in their own module so services/db.py (and the DB CLIs: migrations, init_db,
+# episodes_io) can read them without importing app/provider config.
+import os
+
+DB_POOL_SIZE         = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW      = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE_SEC  = int(os.getenv("DB_POOL_RECYCLE_SEC", "1800"))  # TiDB Serverless drops idle conns
+DB_POOL_TIMEOUT_SEC  = float(os.getenv("DB_POOL_TIMEOUT_SEC", "30"))
+DB_SLOW_QUERY_MS     = float(os.getenv("DB_SLOW_QUERY_MS", "500"))
+DB_SLOW_QUERY_LOG    = os.getenv("DB_SLOW_QUERY_LOG", "")  # JSONL path; empty -> logging only
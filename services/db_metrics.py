@@ -0,0 +1,182 @@
+# services/db_metrics.py
+# Query instrumentation for the SQLAlchemy engine built in services/db.py:
+# per-statement latency histograms + row counts, pool checkout wait, and a slow-query log.
+# Everything is in-process and cheap (a perf_counter pair + a dict lookup per statement).
+
+import os
+import re
+import math
+import json
+import time
+import logging
+import threading
+import datetime as dt
+from typing import Dict, Any
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+from services.metrics import REGISTRY
+
+# Upper bounds in milliseconds; the last bucket catches everything above.
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf"))
+
+slow_log = logging.getLogger("services.db.slow")
+
+_LOCK = threading.Lock()
+
+
+# Latency histograms live in the shared metrics registry (scraped with everything else);
+# rows, errors, max latency and pool gauges are kept here for the admin snapshot.
+QUERY_SECONDS = REGISTRY.histogram(
+    "podkids_db_query_seconds", "SQL statement latency by normalized statement.", ("statement",),
+    buckets=tuple(b / 1000 for b in LATENCY_BUCKETS_MS),
+)
+POOL_WAIT_SECONDS = REGISTRY.histogram(
+    "podkids_db_pool_checkout_seconds", "Time to check a connection out of the pool.",
+    buckets=tuple(b / 1000 for b in LATENCY_BUCKETS_MS),
+)
+
+# statement key -> {"rows": int, "errors": int, "max_ms": float}
+_STATEMENTS: Dict[str, Dict[str, Any]] = {}
+_POOL = {"checked_out": 0, "checkouts": 0, "checkins": 0, "max_wait_ms": 0.0}
+
+
+def _latency(hist, max_ms: float, **labels) -> Dict[str, Any]:
+    """A registry histogram series in milliseconds; the open top bucket reports the observed max."""
+    snap = hist.snapshot().get(tuple(labels[n] for n in hist.labels), {"count": 0, "avg": 0.0})
+
+    def q(p: float) -> float:
+        v = hist.quantile(p, **labels)
+        return round(max_ms, 3) if v == math.inf else v * 1000
+
+    return {
+        "count": snap["count"],
+        "avg_ms": round(snap["avg"] * 1000, 3),
+        "p50_ms": q(0.50),
+        "p95_ms": q(0.95),
+        "p99_ms": q(0.99),
+        "max_ms": round(max_ms, 3),
+    }
+
+
+def _statement_key(statement: str) -> str:
+    """Collapse whitespace so the same text() query always maps to one key."""
+    return re.sub(r"\s+", " ", statement).strip()[:300]
+
+
+def _record_statement(statement: str, ms: float, rows: int | None, error: bool = False) -> None:
+    key = _statement_key(statement)
+    QUERY_SECONDS.observe(ms / 1000, statement=key)
+    with _LOCK:
+        st = _STATEMENTS.get(key)
+        if st is None:
+            st = _STATEMENTS[key] = {"rows": 0, "errors": 0, "max_ms": 0.0}
+        st["max_ms"] = max(st["max_ms"], ms)
+        if rows is not None and rows > 0:
+            st["rows"] += rows
+        if error:
+            st["errors"] += 1
+
+
+def _log_slow(statement: str, ms: float, rows: int | None) -> None:
+    slow_log.warning(json.dumps({
+        "ts": dt.datetime.utcnow().isoformat(timespec="milliseconds"),
+        "ms": round(ms, 2),
+        "rows": rows,
+        "statement": _statement_key(statement),
+    }, ensure_ascii=False))
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits (queue wait + connect + pre-ping)."""
+
+    def connect(self):
+        t0 = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            ms = (time.perf_counter() - t0) * 1000
+            POOL_WAIT_SECONDS.observe(ms / 1000)
+            with _LOCK:
+                _POOL["max_wait_ms"] = max(_POOL["max_wait_ms"], ms)
+
+
+def configure_slow_log(path: str = "") -> None:
+    """Send slow-query lines to `path` (JSONL) in addition to normal logging."""
+    if not path:
+        return
+    for h in slow_log.handlers:
+        if isinstance(h, logging.FileHandler) and h.baseFilename == os.path.abspath(path):
+            return
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    slow_log.addHandler(handler)
+
+
+def instrument_engine(engine, slow_query_ms: float = 500.0, slow_log_path: str = ""):
+    """Attach cursor and pool listeners to `engine`. Safe to call once per engine."""
+    configure_slow_log(slow_log_path)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_query_t0", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        ms = (time.perf_counter() - conn.info["_query_t0"].pop()) * 1000
+        rows = getattr(cursor, "rowcount", None)
+        rows = rows if isinstance(rows, int) and rows >= 0 else None
+        _record_statement(statement, ms, rows)
+        if ms >= slow_query_ms:
+            _log_slow(statement, ms, rows)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(ctx):
+        stack = ctx.connection.info.get("_query_t0") if ctx.connection is not None else None
+        if stack and ctx.statement:
+            ms = (time.perf_counter() - stack.pop()) * 1000
+            _record_statement(ctx.statement, ms, None, error=True)
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_conn, record, proxy):
+        with _LOCK:
+            _POOL["checked_out"] += 1
+            _POOL["checkouts"] += 1
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_conn, record):
+        with _LOCK:
+            _POOL["checked_out"] = max(0, _POOL["checked_out"] - 1)
+            _POOL["checkins"] += 1
+
+    return engine
+
+
+def snapshot() -> Dict[str, Any]:
+    """Point-in-time copy of all stats, safe to render or serialize."""
+    with _LOCK:
+        stmts = {k: dict(v) for k, v in _STATEMENTS.items()}
+        pool = dict(_POOL)
+    statements = {
+        k: {**_latency(QUERY_SECONDS, v["max_ms"], statement=k), "rows": v["rows"], "errors": v["errors"]}
+        for k, v in stmts.items()
+    }
+    return {
+        "statements": statements,
+        "pool": {
+            "checkout_wait": _latency(POOL_WAIT_SECONDS, pool["max_wait_ms"]),
+            "checked_out": pool["checked_out"],
+            "checkouts": pool["checkouts"],
+            "checkins": pool["checkins"],
+        },
+    }
+
+
+def reset() -> None:
+    global _POOL
+    with _LOCK:
+        _STATEMENTS.clear()
+        _POOL = {"checked_out": 0, "checkouts": 0, "checkins": 0, "max_wait_ms": 0.0}
+    QUERY_SECONDS.reset()
+    POOL_WAIT_SECONDS.reset()
@@ -0,0 +1,306 @@
+# services/episodes_io.py
+# Stream the `episodes` table to/from JSONL or Parquet in constant memory.
+#
+#   python -m services.episodes_io export episodes.jsonl
+#   python -m services.episodes_io import episodes.jsonl --upsert --resume
+#
+# Export uses a server-side cursor (stream_results) ordered by id, so it can resume after the
+# last id already written. Import sends batched executemany INSERTs and keeps a checkpoint file
+# next to the input, so a re-run with --resume skips the rows already committed.
+
+import os
+import json
+import time
+import argparse
+import datetime as dt
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import text
+
+from .db import get_engine
+
+COLUMNS = [
+    "id", "topic", "minutes", "lang", "script", "duration_sec",
+    "storage_key", "public_url", "rating", "created_at",
+]
+
+DEFAULT_BATCH = 1000
+
+
+def _fmt_for(path: str, fmt: Optional[str]) -> str:
+    if fmt:
+        return fmt
+    return "parquet" if str(path).lower().endswith(".parquet") else "jsonl"
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as e:
+        raise RuntimeError("Parquet support needs pyarrow (pip install pyarrow).") from e
+    return pyarrow
+
+
+class _Progress:
+    """Rows/s reporter; prints at most every `every_sec` seconds."""
+
+    def __init__(self, label: str, every_sec: float = 2.0, quiet: bool = False):
+        self.label = label
+        self.every_sec = every_sec
+        self.quiet = quiet
+        self.rows = 0
+        self.t0 = time.perf_counter()
+        self._last = self.t0
+
+    def add(self, n: int) -> None:
+        self.rows += n
+        now = time.perf_counter()
+        if not self.quiet and now - self._last >= self.every_sec:
+            self._last = now
+            print(f"{self.label}: {self.rows} rows, {self.rate():.0f} rows/s", flush=True)
+
+    def rate(self) -> float:
+        elapsed = time.perf_counter() - self.t0
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def report(self) -> Dict[str, float]:
+        elapsed = time.perf_counter() - self.t0
+        return {"rows": self.rows, "seconds": round(elapsed, 3), "rows_per_sec": round(self.rate(), 1)}
+
+
+def _to_jsonable(row: Dict) -> Dict:
+    out = {}
+    for k, v in row.items():
+        if isinstance(v, Decimal):
+            v = float(v)
+        elif isinstance(v, (dt.datetime, dt.date)):
+            v = v.isoformat(sep=" ")
+        out[k] = v
+    return out
+
+
+def _from_jsonable(row: Dict) -> Dict:
+    out = {c: row.get(c) for c in COLUMNS}
+    ts = out.get("created_at")
+    if isinstance(ts, str) and ts:
+        out["created_at"] = dt.datetime.fromisoformat(ts)
+    elif not ts:
+        out["created_at"] = dt.datetime.utcnow()
+    return out
+
+
+# ---------- export ----------
+def _stream_rows(engine, after_id: Optional[str], batch_size: int) -> Iterator[List[Dict]]:
+    where = "WHERE id > :after" if after_id else ""
+    sql = text(f"SELECT {', '.join(COLUMNS)} FROM episodes {where} ORDER BY id")
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(
+            sql, {"after": after_id} if after_id else {}
+        )
+        for part in result.mappings().partitions(batch_size):
+            yield [_to_jsonable(dict(r)) for r in part]
+
+
+def _resume_jsonl(path: Path) -> Optional[str]:
+    """
+    Prepare an interrupted JSONL export for appending: truncate any partial last line
+    (a killed write) and return the id of the last complete line, without loading the file.
+    """
+    if not path.exists() or path.stat().st_size == 0:
+        return None
+    with path.open("r+b") as f:
+        end = f.seek(0, os.SEEK_END)
+        pos, tail = end, b""
+        while pos > 0:
+            step = min(64 * 1024, pos)
+            pos -= step
+            f.seek(pos)
+            tail = f.read(step) + tail
+            lines = tail.split(b"\n")
+            # lines[-1] is the unterminated remainder; we need one complete line before it.
+            if len(lines) > 2 or (pos == 0 and len(lines) > 1):
+                break
+        else:
+            lines = [tail]
+        cut = end - len(lines[-1])
+        if cut != end:
+            f.truncate(cut)
+        complete = [l for l in lines[:-1] if l.strip()]
+        if not complete:
+            return None
+        return json.loads(complete[-1].decode("utf-8"))["id"]
+
+
+def export_episodes(
+    path: str,
+    fmt: Optional[str] = None,
+    batch_size: int = DEFAULT_BATCH,
+    resume: bool = False,
+    engine=None,
+    quiet: bool = False,
+) -> Dict[str, float]:
+    """Write every episode row to `path`. Returns the throughput report."""
+    engine = engine or get_engine()
+    if engine is None:
+        raise RuntimeError("Database is not configured.")
+    fmt = _fmt_for(path, fmt)
+    out = Path(path)
+    progress = _Progress("export", quiet=quiet)
+
+    if fmt == "jsonl":
+        after = _resume_jsonl(out) if resume else None
+        with out.open("a" if after else "w", encoding="utf-8") as f:
+            for batch in _stream_rows(engine, after, batch_size):
+                f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in batch))
+                progress.add(len(batch))
+    elif fmt == "parquet":
+        if resume:
+            raise ValueError("--resume is only supported for JSONL exports.")
+        pa = _require_pyarrow()
+        schema = pa.schema([
+            ("id", pa.string()), ("topic", pa.string()), ("minutes", pa.float64()),
+            ("lang", pa.string()), ("script", pa.large_string()), ("duration_sec", pa.int64()),
+            ("storage_key", pa.string()), ("public_url", pa.string()), ("rating", pa.int64()),
+            ("created_at", pa.string()),
+        ])
+        tmp = out.with_suffix(out.suffix + ".tmp")
+        with pa.parquet.ParquetWriter(str(tmp), schema) as writer:
+            for batch in _stream_rows(engine, None, batch_size):
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                progress.add(len(batch))
+        tmp.replace(out)
+    else:
+        raise ValueError(f"Unknown format: {fmt}")
+    return progress.report()
+
+
+# ---------- import ----------
+def _read_batches(path: str, fmt: str, batch_size: int, skip: int) -> Iterator[List[Dict]]:
+    if fmt == "jsonl":
+        batch: List[Dict] = []
+        with open(path, encoding="utf-8") as f:
+            seen = 0  # non-blank rows, matching the checkpoint's rows_done
+            for line in f:
+                if not line.strip():
+                    continue
+                seen += 1
+                if seen <= skip:
+                    continue
+                batch.append(json.loads(line))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+    elif fmt == "parquet":
+        pa = _require_pyarrow()
+        pf = pa.parquet.ParquetFile(path)
+        seen = 0
+        for rb in pf.iter_batches(batch_size=batch_size):
+            rows = rb.to_pylist()
+            if seen + len(rows) <= skip:
+                seen += len(rows)
+                continue
+            rows = rows[max(0, skip - seen):]
+            seen += rb.num_rows
+            yield rows
+    else:
+        raise ValueError(f"Unknown format: {fmt}")
+
+
+def _insert_sql(dialect: str, upsert: bool):
+    cols = ", ".join(COLUMNS)
+    vals = ", ".join(f":{c}" for c in COLUMNS)
+    sql = f"INSERT INTO episodes ({cols}) VALUES ({vals})"
+    if upsert:
+        updates = [c for c in COLUMNS if c != "id"]
+        if dialect in ("mysql", "mariadb"):
+            sql += " ON DUPLICATE KEY UPDATE " + ", ".join(f"{c} = VALUES({c})" for c in updates)
+        elif dialect == "sqlite":
+            sql += " ON CONFLICT(id) DO UPDATE SET " + ", ".join(f"{c} = excluded.{c}" for c in updates)
+        else:
+            raise ValueError(f"--upsert is not supported for dialect {dialect!r}")
+    return text(sql)
+
+
+def _checkpoint_path(path: str) -> Path:
+    return Path(str(path) + ".checkpoint.json")
+
+
+def _read_checkpoint(path: str) -> int:
+    cp = _checkpoint_path(path)
+    if not cp.exists():
+        return 0
+    data = json.loads(cp.read_text(encoding="utf-8"))
+    if data.get("size") != os.path.getsize(path):
+        raise RuntimeError(f"{cp} was written for a different version of {path}; delete it to start over.")
+    return int(data.get("rows_done", 0))
+
+
+def _write_checkpoint(path: str, rows_done: int) -> None:
+    cp = _checkpoint_path(path)
+    tmp = cp.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"rows_done": rows_done, "size": os.path.getsize(path)}), encoding="utf-8")
+    tmp.replace(cp)
+
+
+def import_episodes(
+    path: str,
+    fmt: Optional[str] = None,
+    batch_size: int = DEFAULT_BATCH,
+    upsert: bool = False,
+    resume: bool = False,
+    engine=None,
+    quiet: bool = False,
+) -> Dict[str, float]:
+    """Load rows from `path` into `episodes`, one transaction per batch. Returns the throughput report."""
+    engine = engine or get_engine()
+    if engine is None:
+        raise RuntimeError("Database is not configured.")
+    fmt = _fmt_for(path, fmt)
+    skip = _read_checkpoint(path) if resume else 0
+    sql = _insert_sql(engine.dialect.name, upsert)
+    progress = _Progress("import", quiet=quiet)
+
+    done = skip
+    for batch in _read_batches(path, fmt, batch_size, skip):
+        with engine.begin() as conn:
+            conn.execute(sql, [_from_jsonable(r) for r in batch])
+        done += len(batch)
+        _write_checkpoint(path, done)
+        progress.add(len(batch))
+
+    _checkpoint_path(path).unlink(missing_ok=True)
+    report = progress.report()
+    report["skipped"] = skip
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk export/import of the episodes table.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    for name in ("export", "import"):
+        p = sub.add_parser(name)
+        p.add_argument("path")
+        p.add_argument("--format", choices=["jsonl", "parquet"], default=None,
+                       help="default: inferred from the file extension")
+        p.add_argument("--batch-size", type=int, default=DEFAULT_BATCH)
+        p.add_argument("--resume", action="store_true")
+        if name == "import":
+            p.add_argument("--upsert", action="store_true", help="update rows whose id already exists")
+
+    args = parser.parse_args(argv)
+    if args.cmd == "export":
+        report = export_episodes(args.path, args.format, args.batch_size, resume=args.resume)
+    else:
+        report = import_episodes(args.path, args.format, args.batch_size, upsert=args.upsert, resume=args.resume)
+    print(f"{args.cmd} done: " + ", ".join(f"{k}={v}" for k, v in report.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
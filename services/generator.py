@@ -2,6 +2,9 @@
 # Generate opening + body only; append fixed closing to avoid mid-script endings.
 
 import re
+from services import metering, ratelimit
+from services.tracing import span, traced
+from services.metrics import OPENAI_TOKENS, PROVIDER_ERRORS
 from services.config import (
     oai,
     OPENAI_MODEL,
@@ -13,6 +16,50 @@ from services.config import (
 )
 
 
+def _estimate_tokens(messages, max_tokens: int) -> int:
+    """Upper-bound guess for the rate limiter: prompt by characters, completion by its cap."""
+    return _text_tokens(m.get("content") or "" for m in messages) + int(max_tokens or 0)
+
+
+def _text_tokens(texts) -> int:
+    return int(sum(len(t) for t in texts) / AVG_CHARS_PER_TOKEN)
+
+
+def _complete(**kwargs):
+    """
+    One chat completion: admitted by the shared OpenAI rate limiter (may wait, or raise
+    ratelimit.AdmissionRejected), and counted in the metrics registry (tokens, provider errors).
+    The reserved token estimate is always settled: to the reported usage, to a character-based
+    guess when the response has no usage, or refunded in full when the call fails, so an
+    outage or error burst doesn't drain the bucket with tokens that were never spent.
+    """
+    estimate = _estimate_tokens(kwargs.get("messages", []), kwargs.get("max_tokens", 0))
+    ratelimit.OPENAI.acquire(requests=1, tokens=estimate)
+    try:
+        resp = oai.chat.completions.create(**kwargs)
+    except Exception:
+        ratelimit.OPENAI.settle(tokens=-estimate)
+        PROVIDER_ERRORS.inc(provider="openai")
+        raise
+    usage = getattr(resp, "usage", None)
+    prompt = completion = 0
+    if usage is not None:
+        prompt = getattr(usage, "prompt_tokens", 0) or 0
+        completion = getattr(usage, "completion_tokens", 0) or 0
+        OPENAI_TOKENS.inc(prompt, kind="prompt")
+        OPENAI_TOKENS.inc(completion, kind="completion")
+        ratelimit.OPENAI.settle(tokens=prompt + completion - estimate)
+    else:
+        try:
+            content = [c.message.content or "" for c in resp.choices]
+        except Exception:
+            content = []
+        spent = _text_tokens(m.get("content") or "" for m in kwargs.get("messages", [])) + _text_tokens(content)
+        ratelimit.OPENAI.settle(tokens=spent - estimate)
+    metering.record(llm_calls=1, prompt_tokens=prompt, completion_tokens=completion)
+    return resp
+
+
 def _token_cap(for_chars: int) -> int:
     t = max(1, int(for_chars / AVG_CHARS_PER_TOKEN))
     return max(MIN_TOKENS_FLOOR, int(t * (1 + MAXTOK_BUFFER)))
@@ -30,6 +77,7 @@ def _trim_to_sentence(text: str, cap: int) -> str:
     return out
 
 
+@traced("generator.script")
 def generate_kids_podcast_script(
     summary: str,
     topic: str,
@@ -81,17 +129,18 @@ def generate_kids_podcast_script(
         {"role": "user", "content": user_prompt},
     ]
 
-    resp = oai.chat.completions.create(
-        model=OPENAI_MODEL,
-        messages=messages,
-        temperature=0.82,
-        max_tokens=_token_cap(max_chars),
-        presence_penalty=0.6,
-        frequency_penalty=0.35,
-        stop=["\nסיום", "\nסיכום", "\nתודה", "\nלהתראות"],
-    )
-
-    body = (resp.choices[0].message.content or "").strip()
+    with span("openai.completion", call="body", model=OPENAI_MODEL, max_tokens=_token_cap(max_chars)) as sp:
+        resp = _complete(
+            model=OPENAI_MODEL,
+            messages=messages,
+            temperature=0.82,
+            max_tokens=_token_cap(max_chars),
+            presence_penalty=0.6,
+            frequency_penalty=0.35,
+            stop=["\nסיום", "\nסיכום", "\nתודה", "\nלהתראות"],
+        )
+        body = (resp.choices[0].message.content or "").strip()
+        sp.set(chars=len(body))
 
     if len(body) < body_goal:
         need = max(0, body_goal - len(body))
@@ -105,16 +154,19 @@ def generate_kids_podcast_script(
             {"role": "assistant", "content": body},
             {"role": "user", "content": cont_prompt},
         ]
-        resp2 = oai.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=messages,
-            temperature=0.78,
-            max_tokens=_token_cap(max_chars - len(body)),
-            presence_penalty=0.6,
-            frequency_penalty=0.35,
-            stop=["\nסיום", "\nסיכום", "\nתודה", "\nלהתראות"],
-        )
-        addition = (resp2.choices[0].message.content or "").strip()
+        cap = _token_cap(max_chars - len(body))
+        with span("openai.completion", call="continuation", model=OPENAI_MODEL, max_tokens=cap) as sp:
+            resp2 = _complete(
+                model=OPENAI_MODEL,
+                messages=messages,
+                temperature=0.78,
+                max_tokens=cap,
+                presence_penalty=0.6,
+                frequency_penalty=0.35,
+                stop=["\nסיום", "\nסיכום", "\nתודה", "\nלהתראות"],
+            )
+            addition = (resp2.choices[0].message.content or "").strip()
+            sp.set(chars=len(addition))
         if addition:
             body = body + "\n\n" + addition
 
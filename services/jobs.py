@@ -0,0 +1,317 @@
+# services/jobs.py
+# Episode generation as background jobs: wiki → script → split → TTS, run by a bounded worker
+# pool outside Streamlit's script thread. The UI submits, keeps the job id in session state and
+# polls get(); a rerun or closed tab no longer throws the work away.
+# Identical requests in flight share one job (see services/singleflight.py).
+
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services import metering, ratelimit
+from services.audio_profiles import DEFAULT_PROFILE
+from services.config import JOB_WORKERS, JOB_MAX_PENDING, JOB_RETENTION_SEC, CHARS_PER_MIN
+from services.singleflight import Group
+from services.tracing import span, wrap
+from services.metrics import cache_result, tts_avoided
+
+STAGES = ("wiki", "script", "split", "tts")
+
+# Rough share of wall time per stage, for a single overall progress number.
+_STAGE_WEIGHT = {"wiki": 0.05, "script": 0.35, "split": 0.02, "tts": 0.58}
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobQueueFull(RuntimeError):
+    pass
+
+
+class Job:
+    def __init__(self, params: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.status = "queued"       # queued | running | done | failed | cancelled
+        self.stage: Optional[str] = None
+        self.stage_progress = 0.0    # 0..1 within the current stage
+        self.result: Dict[str, Any] = {}  # partial results: summary, script, segments, audio_path
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.subscribers = 1         # sessions waiting on this job (single-flight joiners)
+        self.stage_ms: Dict[str, float] = {}  # wall time per finished stage
+        self._stage_t0: Optional[float] = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    # ---------- called from the worker ----------
+    def enter(self, stage: str) -> None:
+        self.check_cancelled()
+        with self._lock:
+            self._close_stage()
+            self.stage, self.stage_progress = stage, 0.0
+            self._stage_t0 = time.perf_counter()
+
+    def _close_stage(self) -> None:
+        if self.stage is not None and self._stage_t0 is not None:
+            self.stage_ms[self.stage] = (time.perf_counter() - self._stage_t0) * 1000
+            self._stage_t0 = None
+
+    def advance(self, done: int, total: int) -> None:
+        self.check_cancelled()
+        with self._lock:
+            self.stage_progress = done / total if total else 1.0
+
+    def publish(self, **partial) -> None:
+        with self._lock:
+            self.result.update(partial)
+
+    def check_cancelled(self) -> None:
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    # ---------- read side ----------
+    @property
+    def progress(self) -> float:
+        if self.status == "done":
+            return 1.0
+        if self.stage is None:
+            return 0.0
+        idx = STAGES.index(self.stage)
+        before = sum(_STAGE_WEIGHT[s] for s in STAGES[:idx])
+        return min(1.0, before + _STAGE_WEIGHT[self.stage] * self.stage_progress)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "stage": self.stage,
+                "stage_progress": round(self.stage_progress, 3),
+                "progress": round(self.progress, 3),
+                "params": dict(self.params),
+                "result": dict(self.result),
+                "error": self.error,
+                "subscribers": self.subscribers,
+                "stage_ms": {k: round(v, 1) for k, v in self.stage_ms.items()},
+                "created_at": self.created_at,
+                "finished_at": self.finished_at,
+            }
+
+
+def run_generation_pipeline(job: Job) -> None:
+    """The same chain app.py used to run inline, reporting progress and honouring cancel between steps."""
+    # Imported here so importing services.jobs stays cheap.
+    from services.wiki import get_hebrew_summary
+    from services.generator import generate_kids_podcast_script
+    from services.tts import split_text_safe, synthesize_chunks_to_file
+
+    p = job.params
+    job.enter("wiki")
+    # The search click may already have fetched it speculatively (services/search_flow.py).
+    cache_result("wiki_prefetch", p.get("summary") is not None)
+    ok, summary_or_msg = p.get("summary") or get_hebrew_summary(p["topic"])
+    if not ok:
+        raise ValueError(summary_or_msg)
+    job.publish(summary=summary_or_msg)
+
+    job.enter("script")
+    # Don't spend OpenAI tokens on a script whose audio the TTS quota can't take right now.
+    est_chars = p["minutes"] * CHARS_PER_MIN
+    ratelimit.TTS.check(requests=est_chars // 1200 + 1, characters=est_chars)
+    script = generate_kids_podcast_script(
+        summary=summary_or_msg,
+        topic=p["topic"],
+        minutes=p["minutes"],
+        age_label=p["age_label"],
+    )
+    job.publish(script=script)
+
+    job.enter("split")
+    segments = split_text_safe(script, max_chars=1200)
+    job.publish(segments=len(segments))
+
+    job.enter("tts")
+    audio_path = synthesize_chunks_to_file(
+        segments,
+        voice_name=p["voice_name"],
+        filename="podcast.mp3",
+        progress=job.advance,
+        profile=p.get("audio_profile", DEFAULT_PROFILE),
+    )
+    tts_avoided(False)
+    audio_bytes, duration_sec = metering.measure_audio(str(audio_path))
+    job.publish(audio_path=str(audio_path), audio_bytes=audio_bytes, duration_sec=duration_sec)
+
+
+class JobManager:
+    def __init__(
+        self,
+        workers: int = JOB_WORKERS,
+        max_pending: int = JOB_MAX_PENDING,
+        retention_sec: float = JOB_RETENTION_SEC,
+        pipeline: Callable[[Job], None] = run_generation_pipeline,
+    ):
+        self.max_pending = max_pending
+        self.retention_sec = retention_sec
+        self.pipeline = pipeline
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="podcast-job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self.flights = Group()
+
+    @staticmethod
+    def _key(params: Dict[str, Any]):
+        return (
+            params["topic"].strip(),
+            float(params["minutes"]),
+            params["age_label"],
+            params["voice_name"],
+            params.get("audio_profile", DEFAULT_PROFILE),
+        )
+
+    def submit(
+        self,
+        topic: str,
+        minutes: float,
+        age_label: str,
+        voice_name: str,
+        summary: Optional[Tuple[bool, str]] = None,
+        audio_profile: str = DEFAULT_PROFILE,
+    ) -> str:
+        """
+        Queue a generation and return its id. If an identical request is already in flight,
+        return that job's id instead (and count one more subscriber). Raises JobQueueFull past max_pending.
+        summary: an (ok, text) Wikipedia result already fetched by the caller, to skip the wiki stage.
+        audio_profile: output encoding (services/audio_profiles.py), usually negotiated per browser.
+        """
+        params = {
+            "topic": topic,
+            "minutes": minutes,
+            "age_label": age_label,
+            "voice_name": voice_name,
+            "audio_profile": audio_profile,
+        }
+        if summary is not None:
+            params["summary"] = summary
+        job, attached = self.flights.attach(self._key(params), lambda: self._start(params))
+        cache_result("generation", attached)
+        if attached:
+            tts_avoided(True)
+            with job._lock:
+                job.subscribers += 1
+        return job.id
+
+    def _start(self, params: Dict[str, Any]) -> Job:
+        job = Job(params)
+        with self._lock:
+            self._prune()
+            active = sum(1 for j in self._jobs.values() if not j.finished)
+            if active >= self.max_pending:
+                raise JobQueueFull("יותר מדי בקשות בתור כרגע. נסו שוב בעוד מספר דקות.")
+            self._jobs[job.id] = job
+        self._pool.submit(wrap(self._run), job)  # job spans join the submitting request's trace
+        return job
+
+    def _run(self, job: Job) -> None:
+        if job._cancel.is_set():
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            self.flights.forget(self._key(job.params), job)
+            return
+        t0 = time.perf_counter()
+        with metering.metered() as usage:
+            try:
+                job.status = "running"
+                with span("job", topic=job.params["topic"], minutes=job.params["minutes"], job_id=job.id) as sp:
+                    try:
+                        self.pipeline(job)
+                    finally:
+                        sp.set(stage=job.stage)
+                job.status = "done"
+            except JobCancelled:
+                job.status = "cancelled"
+            except Exception as e:
+                job.error = str(e)
+                job.status = "failed"
+            finally:
+                with job._lock:
+                    job._close_stage()
+                job.finished_at = time.time()
+                self.flights.forget(self._key(job.params), job)
+        self._meter(job, usage, (time.perf_counter() - t0) * 1000)
+
+    def _meter(self, job: Job, usage: "metering.Usage", total_ms: float) -> None:
+        """Persist the job's usage row (after the job is visible as finished; never raises)."""
+        p = job.params
+        metering.save_usage(
+            job.id,
+            topic=p["topic"],
+            minutes=p["minutes"],
+            status=job.status,
+            counts=usage.snapshot(),
+            stage_ms=dict(job.stage_ms),
+            total_ms=total_ms,
+            audio_bytes=job.result.get("audio_bytes"),
+            audio_duration_sec=job.result.get("duration_sec"),
+        )
+
+    def job(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.job(job_id)
+        return job.snapshot() if job else None
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Drop one subscriber. The job itself is cancelled (at the next stage/chunk boundary)
+        only when nobody else is waiting on it. Returns True if the job was cancelled.
+        """
+        job = self.job(job_id)
+        if job is None or job.finished:
+            return False
+        with job._lock:
+            job.subscribers = max(0, job.subscribers - 1)
+            if job.subscribers:
+                return False
+        job._cancel.set()
+        # New identical requests must not attach to a job that is winding down.
+        self.flights.forget(self._key(job.params), job)
+        return True
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [j.snapshot() for j in sorted(jobs, key=lambda j: j.created_at)]
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retention_sec
+        for jid in [j.id for j in self._jobs.values() if j.finished and (j.finished_at or 0) < cutoff]:
+            del self._jobs[jid]
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+_MANAGER: Optional[JobManager] = None
+_MANAGER_LOCK = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Process-wide manager shared by every Streamlit session."""
+    global _MANAGER
+    if _MANAGER is None:
+        with _MANAGER_LOCK:
+            if _MANAGER is None:
+                _MANAGER = JobManager()
+    return _MANAGER
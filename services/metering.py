@@ -0,0 +1,211 @@
+# services/metering.py
+# Per-generation cost and resource metering, persisted to generation_usage (migration 3).
+#
+# A job runs under metered(); generator._complete and tts.iter_synthesized_audio call record()
+# for each provider call, which adds to the job's Usage through a contextvar (no-op outside a
+# job). When the job ends, JobManager saves the row whether it succeeded, failed or was
+# cancelled, so unsaved generations are counted too; save_on_five_stars links the row to the
+# saved episode. Writes never raise: metering must not fail a generation.
+
+import os
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from services.config import (
+    PRICE_OPENAI_PROMPT_PER_1M,
+    PRICE_OPENAI_COMPLETION_PER_1M,
+    PRICE_TTS_PER_1M_CHARS,
+)
+
+log = logging.getLogger(__name__)
+
+COUNTERS = ("llm_calls", "prompt_tokens", "completion_tokens", "tts_requests", "tts_characters")
+STAGE_COLUMNS = ("wiki", "script", "split", "tts")
+
+
+class Usage:
+    def __init__(self):
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        self._lock = threading.Lock()
+
+    def add(self, **counts: int) -> None:
+        with self._lock:
+            for k, n in counts.items():
+                self.counts[k] += int(n or 0)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+
+_CURRENT: contextvars.ContextVar[Optional[Usage]] = contextvars.ContextVar("usage", default=None)
+
+
+@contextmanager
+def metered() -> Iterator[Usage]:
+    """Collect record() calls made in this context (and in work submitted via tracing.wrap)."""
+    usage = Usage()
+    token = _CURRENT.set(usage)
+    try:
+        yield usage
+    finally:
+        _CURRENT.reset(token)
+
+
+def record(**counts: int) -> None:
+    """Add provider usage (e.g. llm_calls=1, prompt_tokens=812) to the running generation, if any."""
+    usage = _CURRENT.get()
+    if usage is not None:
+        usage.add(**counts)
+
+
+def measure_audio(path: str) -> Tuple[Optional[int], Optional[float]]:
+    """(bytes, duration seconds) of an MP3 or Ogg Opus file; None for whatever can't be read."""
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return None, None
+    try:
+        import mutagen
+
+        return size, float(mutagen.File(path).info.length)
+    except Exception:
+        return size, None
+
+
+def estimate_cost(prompt_tokens: float, completion_tokens: float, tts_characters: float) -> float:
+    """USD at the configured list prices."""
+    return (
+        prompt_tokens * PRICE_OPENAI_PROMPT_PER_1M
+        + completion_tokens * PRICE_OPENAI_COMPLETION_PER_1M
+        + tts_characters * PRICE_TTS_PER_1M_CHARS
+    ) / 1_000_000
+
+
+# ---------- persistence ----------
+def save_usage(
+    usage_id: str,
+    topic: str,
+    minutes: float,
+    status: str,
+    counts: Dict[str, int],
+    stage_ms: Dict[str, float],
+    total_ms: float,
+    audio_bytes: Optional[int] = None,
+    audio_duration_sec: Optional[float] = None,
+) -> bool:
+    from sqlalchemy import text
+    from services.db import get_engine
+
+    row: Dict[str, Any] = {
+        "id": usage_id,
+        "topic": topic,
+        "minutes": minutes,
+        "status": status,
+        "audio_bytes": audio_bytes,
+        "audio_duration_sec": audio_duration_sec,
+        "total_ms": int(total_ms),
+        **{k: int(counts.get(k, 0)) for k in COUNTERS},
+        **{f"{s}_ms": (int(stage_ms[s]) if s in stage_ms else None) for s in STAGE_COLUMNS},
+    }
+    cols = ", ".join(row)
+    sql = text(f"INSERT INTO generation_usage ({cols}) VALUES ({', '.join(':' + c for c in row)})")
+    try:
+        engine = get_engine()
+        if engine is None:
+            return False
+        with engine.begin() as conn:
+            conn.execute(sql, row)
+        return True
+    except Exception:
+        log.warning("could not save usage for %s", usage_id, exc_info=True)
+        return False
+
+
+def link_episode(usage_id: str, episode_id: str) -> bool:
+    """Point a generation's usage row at the episode it was saved as."""
+    from sqlalchemy import text
+    from services.db import get_engine
+
+    try:
+        engine = get_engine()
+        if engine is None:
+            return False
+        with engine.begin() as conn:
+            conn.execute(
+                text("UPDATE generation_usage SET episode_id = :episode_id WHERE id = :usage_id"),
+                {"episode_id": episode_id, "usage_id": usage_id},
+            )
+        return True
+    except Exception:
+        log.warning("could not link usage %s to episode %s", usage_id, episode_id, exc_info=True)
+        return False
+
+
+# ---------- aggregates (admin view) ----------
+DAILY_SQL = """
+    SELECT DATE(created_at) AS day,
+           COUNT(*) AS generations,
+           SUM(CASE WHEN status = 'done' THEN 1 ELSE 0 END) AS completed,
+           SUM(CASE WHEN episode_id IS NOT NULL THEN 1 ELSE 0 END) AS saved,
+           SUM(llm_calls) AS llm_calls,
+           SUM(prompt_tokens) AS prompt_tokens,
+           SUM(completion_tokens) AS completion_tokens,
+           SUM(tts_requests) AS tts_requests,
+           SUM(tts_characters) AS tts_characters,
+           SUM(COALESCE(audio_duration_sec, 0)) AS audio_sec,
+           SUM(COALESCE(audio_bytes, 0)) AS audio_bytes,
+           AVG(script_ms) AS avg_script_ms,
+           AVG(tts_ms) AS avg_tts_ms,
+           AVG(total_ms) AS avg_total_ms
+    FROM generation_usage
+    WHERE created_at >= :since
+    GROUP BY DATE(created_at)
+    ORDER BY day
+"""
+
+
+def _finish(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Numeric types across drivers (Decimal/None) plus derived cost figures."""
+    out = {k: (float(v) if v is not None and k != "day" else v) for k, v in row.items()}
+    out["day"] = str(row["day"])
+    cost = estimate_cost(out["prompt_tokens"] or 0, out["completion_tokens"] or 0, out["tts_characters"] or 0)
+    audio_min = (out["audio_sec"] or 0) / 60
+    out["cost_usd"] = round(cost, 4)
+    # Failed/cancelled generations cost money but produce no audio, so they raise this number.
+    out["cost_per_audio_min"] = round(cost / audio_min, 4) if audio_min else None
+    return out
+
+
+def usage_by_day(days: int = 30) -> List[Dict[str, Any]]:
+    """Per-day totals for the last `days` days, oldest first; [] if the DB is unavailable."""
+    import datetime as dt
+    from sqlalchemy import text
+    from services.db import get_engine
+
+    since = (dt.datetime.utcnow() - dt.timedelta(days=days)).strftime("%Y-%m-%d 00:00:00")
+    try:
+        engine = get_engine()
+        if engine is None:
+            return []
+        with engine.connect() as conn:
+            rows = conn.execute(text(DAILY_SQL), {"since": since}).mappings().all()
+    except Exception:
+        log.warning("usage query failed", exc_info=True)
+        return []
+    return [_finish(dict(r)) for r in rows]
+
+
+def usage_totals(days: int = 30) -> Dict[str, Any]:
+    """usage_by_day folded into one summary row."""
+    rows = usage_by_day(days)
+    keys = ("generations", "completed", "saved", "llm_calls", "prompt_tokens", "completion_tokens",
+            "tts_requests", "tts_characters", "audio_sec", "audio_bytes")
+    total = {k: sum((r[k] or 0) for r in rows) for k in keys}
+    cost = estimate_cost(total["prompt_tokens"], total["completion_tokens"], total["tts_characters"])
+    total["cost_usd"] = round(cost, 4)
+    total["cost_per_audio_min"] = round(cost / (total["audio_sec"] / 60), 4) if total["audio_sec"] else None
+    return total
@@ -0,0 +1,335 @@
+# services/metrics.py
+# In-process metrics registry: labelled counters and histograms, rendered in the Prometheus
+# text format and served from a side port by a daemon thread (METRICS_PORT), so a standard
+# scraper can watch the Streamlit deployment. Recording is a lock + dict update.
+#
+# Stage latencies come from tracing: every finished span is observed in
+# podkids_span_seconds{span="..."} (see services/tracing.py).
+
+import os
+import math
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+METRICS_PORT = os.getenv("METRICS_PORT", "")  # empty -> no endpoint
+METRICS_ADDR = os.getenv("METRICS_ADDR", "0.0.0.0")
+
+# Seconds; spans from a 1 ms cache hit up to a multi-minute TTS run.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, math.inf)
+
+log = logging.getLogger(__name__)
+
+LabelKey = Tuple[str, ...]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labels)
+
+    def _fmt_labels(self, key: LabelKey, extra: str = "") -> str:
+        parts = [f'{n}="{_escape(v)}"' for n, v in zip(self.labels, key)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, n: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + n
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._fmt_labels(k)} {_num(v)}" for k, v in items]
+
+    def snapshot(self) -> Dict[LabelKey, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets) if buckets[-1] == math.inf else tuple(buckets) + (math.inf,)
+        self._series: Dict[LabelKey, list] = {}  # key -> [bucket counts..., count, sum]
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    s[i] += 1
+                    break
+            s[-2] += 1
+            s[-1] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def quantile(self, q: float, **labels) -> float:
+        """Upper bound of the bucket holding the q-th observation (0 if empty)."""
+        with self._lock:
+            s = self._series.get(self._key(labels))
+            s = list(s) if s else None
+        if not s or not s[-2]:
+            return 0.0
+        rank, seen = q * s[-2], 0
+        for bound, n in zip(self.buckets, s):
+            seen += n
+            if seen >= rank:
+                return bound
+        return math.inf
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        out = []
+        for key, s in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, s):
+                cumulative += n
+                le = 'le="%s"' % ("+Inf" if bound == math.inf else _num(bound))
+                out.append(f"{self.name}_bucket{self._fmt_labels(key, le)} {cumulative}")
+            out.append(f"{self.name}_count{self._fmt_labels(key)} {s[-2]}")
+            out.append(f"{self.name}_sum{self._fmt_labels(key)} {_num(s[-1])}")
+        return out
+
+    def snapshot(self) -> Dict[LabelKey, Dict[str, float]]:
+        with self._lock:
+            keys = list(self._series)
+        out = {}
+        for key in keys:
+            labels = dict(zip(self.labels, key))
+            with self._lock:
+                count, total = self._series[key][-2], self._series[key][-1]
+            out[key] = {
+                "count": count,
+                "avg": total / count if count else 0.0,
+                "p50": self.quantile(0.50, **labels),
+                "p95": self.quantile(0.95, **labels),
+                "p99": self.quantile(0.99, **labels),
+            }
+        return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+def _num(v: float) -> str:
+    if v == math.inf:
+        return "+Inf"
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], List[str]]] = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, help, labels, **kw):
+        with self._lock:
+            m = self._metrics.get(name)
+            if m is None:
+                m = self._metrics[name] = cls(name, help, labels, **kw)
+            elif not isinstance(m, cls) or m.labels != tuple(labels):
+                raise ValueError(f"metric {name} already registered with a different type/labels")
+            return m
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help, labels)
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labels, buckets=buckets)
+
+    def add_collector(self, fn: Callable[[], List[str]]) -> None:
+        """fn() returns ready-made exposition lines (incl. # TYPE), evaluated on every scrape."""
+        with self._lock:
+            if fn not in self._collectors:
+                self._collectors.append(fn)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+            collectors = list(self._collectors)
+        lines: List[str] = []
+        for m in metrics:
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            lines.extend(m.samples())
+        for fn in collectors:
+            try:
+                lines.extend(fn())
+            except Exception:
+                log.exception("metrics collector failed")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Zero every series (tests)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for m in metrics:
+            m.reset()
+
+
+REGISTRY = Registry()
+
+# ---------- the app's metrics ----------
+SEARCHES = REGISTRY.counter("podkids_searches_total", "Search clicks handled.")
+# cache="episode"        saved-episode lookup on a search click
+# cache="wiki_prefetch"  generation job whose Wikipedia summary the search click already fetched
+#                        (hit) vs. fetched in the job (miss); there is no wiki cache as such
+# cache="generation"     submit() joined an identical in-flight job (single-flight)
+# cache="listing"        sidebar listing served from memory
+# cache="audio"          local audio file bytes served from the in-process memo
+# cache="tts"            TTS work avoided: a saved-episode hit or a joined job is a hit, a
+#                        completed TTS run a miss (hit / (hit + miss) = share of requests not synthesized)
+CACHE_REQUESTS = REGISTRY.counter(
+    "podkids_cache_requests_total",
+    "Cache lookups by cache (episode, wiki_prefetch, generation, listing, audio, tts) and result (hit, miss).",
+    ("cache", "result"),
+)
+SPAN_SECONDS = REGISTRY.histogram("podkids_span_seconds", "Duration of traced stages.", ("span",))
+OPENAI_TOKENS = REGISTRY.counter("podkids_openai_tokens_total", "OpenAI tokens used.", ("kind",))
+TTS_CHARACTERS = REGISTRY.counter("podkids_tts_characters_total", "Characters sent to Google TTS.")
+PROVIDER_ERRORS = REGISTRY.counter(
+    "podkids_provider_errors_total", "Failed calls to external providers.", ("provider",)
+)
+RATE_LIMITED = REGISTRY.counter(
+    "podkids_ratelimit_total",
+    "Provider calls through the local rate limiter by result (admitted, delayed, rejected).",
+    ("provider", "result"),
+)
+
+
+def cache_result(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def tts_avoided(avoided: bool) -> None:
+    """A request served without synthesizing (True), or a finished TTS run (False)."""
+    cache_result("tts", avoided)
+
+
+def _db_collector() -> List[str]:
+    """Aggregate view of services.db_metrics (per-statement detail stays in the admin view)."""
+    from services import db_metrics
+
+    snap = db_metrics.snapshot()
+    queries = sum(s["count"] for s in snap["statements"].values())
+    errors = sum(s["errors"] for s in snap["statements"].values())
+    return [
+        "# HELP podkids_db_queries_total SQL statements executed.",
+        "# TYPE podkids_db_queries_total counter",
+        f"podkids_db_queries_total {queries}",
+        "# HELP podkids_db_query_errors_total SQL statements that raised.",
+        "# TYPE podkids_db_query_errors_total counter",
+        f"podkids_db_query_errors_total {errors}",
+        "# HELP podkids_db_pool_checked_out Connections currently checked out of the pool.",
+        "# TYPE podkids_db_pool_checked_out gauge",
+        f"podkids_db_pool_checked_out {snap['pool']['checked_out']}",
+    ]
+
+
+REGISTRY.add_collector(_db_collector)
+
+
+# ---------- scrape endpoint ----------
+class _Handler(BaseHTTPRequestHandler):
+    registry: Registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_SERVER: Optional[ThreadingHTTPServer] = None
+_SERVER_LOCK = threading.Lock()
+
+
+def start_http_server(port: Optional[int] = None, addr: str = METRICS_ADDR) -> Optional[ThreadingHTTPServer]:
+    """
+    Serve /metrics from a daemon thread. Idempotent (Streamlit re-runs app.py on every
+    interaction); returns None if disabled or the port can't be bound, never raises.
+    """
+    global _SERVER
+    if port is None:
+        if not METRICS_PORT:
+            return None
+        port = int(METRICS_PORT)
+    with _SERVER_LOCK:
+        if _SERVER is not None:
+            return _SERVER
+        try:
+            server = ThreadingHTTPServer((addr, port), _Handler)
+        except OSError as e:
+            log.warning("metrics endpoint not started on %s:%s: %s", addr, port, e)
+            return None
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        _SERVER = server
+        return server
+
+
+def stop_http_server() -> None:
+    global _SERVER
+    with _SERVER_LOCK:
+        if _SERVER is not None:
+            _SERVER.shutdown()
+            _SERVER.server_close()
+            _SERVER = None
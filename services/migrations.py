@@ -0,0 +1,213 @@
+# services/migrations.py
+# Versioned schema migrations. Run explicitly (python -m services.migrations or init_db.py),
+# never on import, so app cold starts don't pay a DDL round-trip.
+#
+# Historically two DDLs existed: db.init_schema (TEXT topic, DOUBLE minutes, LONGTEXT, DATETIME)
+# and schema.ensure_schema (VARCHAR(255) topic, DECIMAL(3,1) minutes, MEDIUMTEXT, TIMESTAMP,
+# utf8mb4_unicode_ci, idx_topic_minutes). The schema.py shape is canonical; migration 2
+# converts tables that were created by the old db.init_schema.
+#
+# Each step branches on conn.dialect.name so the same versions apply to the local SQLite
+# backend (DB_BACKEND=sqlite), which has no charset clauses, MODIFY or information_schema.
+
+import argparse
+import sys
+from typing import Callable, List, Tuple
+
+from sqlalchemy import text
+
+from .db import get_engine
+
+MIGRATIONS_TABLE = "schema_migrations"
+
+
+EPISODES_COLUMNS = """
+  id              CHAR(36) PRIMARY KEY,
+  topic           VARCHAR(255) NOT NULL,
+  minutes         DECIMAL(3,1) NOT NULL,
+  lang            VARCHAR(8) DEFAULT 'he',
+  script          MEDIUMTEXT,
+  duration_sec    INT,
+  storage_key     TEXT,
+  public_url      VARCHAR(512),
+  rating          TINYINT,
+  created_at      TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+"""
+
+
+def _is_sqlite(conn) -> bool:
+    return conn.dialect.name == "sqlite"
+
+
+def _create_episodes(conn):
+    if _is_sqlite(conn):
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS episodes ({EPISODES_COLUMNS})"))
+        return
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS episodes ({EPISODES_COLUMNS}) "
+        "CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci"
+    ))
+
+
+def _index_exists(conn, table: str, index: str) -> bool:
+    if _is_sqlite(conn):
+        row = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND tbl_name = :table AND name = :index"),
+            {"table": table, "index": index},
+        ).fetchone()
+        return row is not None
+    row = conn.execute(
+        text(
+            """
+            SELECT 1 FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = :table AND index_name = :index
+            LIMIT 1
+            """
+        ),
+        {"table": table, "index": index},
+    ).fetchone()
+    return row is not None
+
+
+def _reconcile_episodes(conn):
+    # No-op on tables already created with the canonical DDL; converts the legacy
+    # db.init_schema shape otherwise. Fails loudly if a topic is longer than 255 chars.
+    if _is_sqlite(conn):
+        # SQLite tables only ever come from migration 1, so only the index is missing.
+        if not _index_exists(conn, "episodes", "idx_topic_minutes"):
+            conn.execute(text("CREATE INDEX idx_topic_minutes ON episodes(topic, minutes)"))
+        return
+    conn.execute(text("ALTER TABLE episodes CONVERT TO CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci"))
+    conn.execute(text(
+        """
+        ALTER TABLE episodes
+          MODIFY id           CHAR(36) NOT NULL,
+          MODIFY topic        VARCHAR(255) NOT NULL,
+          MODIFY minutes      DECIMAL(3,1) NOT NULL,
+          MODIFY script       MEDIUMTEXT,
+          MODIFY public_url   VARCHAR(512),
+          MODIFY rating       TINYINT,
+          MODIFY created_at   TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        """
+    ))
+    if not _index_exists(conn, "episodes", "idx_topic_minutes"):
+        conn.execute(text("CREATE INDEX idx_topic_minutes ON episodes(topic, minutes)"))
+
+
+USAGE_COLUMNS = """
+  id                  CHAR(36) PRIMARY KEY,
+  episode_id          CHAR(36),
+  topic               VARCHAR(255) NOT NULL,
+  minutes             DECIMAL(3,1) NOT NULL,
+  status              VARCHAR(16) NOT NULL,
+  llm_calls           INT NOT NULL DEFAULT 0,
+  prompt_tokens       INT NOT NULL DEFAULT 0,
+  completion_tokens   INT NOT NULL DEFAULT 0,
+  tts_requests        INT NOT NULL DEFAULT 0,
+  tts_characters      INT NOT NULL DEFAULT 0,
+  audio_bytes         BIGINT,
+  audio_duration_sec  DOUBLE,
+  wiki_ms             INT,
+  script_ms           INT,
+  split_ms            INT,
+  tts_ms              INT,
+  total_ms            INT,
+  created_at          TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+"""
+
+
+def _create_generation_usage(conn):
+    # One row per generation job (saved or not); see services/metering.py.
+    if _is_sqlite(conn):
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS generation_usage ({USAGE_COLUMNS})"))
+    else:
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS generation_usage ({USAGE_COLUMNS}) "
+            "CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci"
+        ))
+    if not _index_exists(conn, "generation_usage", "idx_usage_created"):
+        conn.execute(text("CREATE INDEX idx_usage_created ON generation_usage(created_at)"))
+
+
+# (version, description, apply(conn)) — append only; never edit a released entry.
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "create episodes table", _create_episodes),
+    (2, "reconcile legacy episodes column types + idx_topic_minutes", _reconcile_episodes),
+    (3, "create generation_usage table (per-generation cost metering)", _create_generation_usage),
+]
+
+
+def _ensure_migrations_table(conn):
+    conn.execute(text(
+        f"""
+        CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (
+          version     INT PRIMARY KEY,
+          description VARCHAR(255) NOT NULL,
+          applied_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    ))
+
+
+def current_version(engine=None) -> int:
+    """Highest applied migration version (0 for a fresh database)."""
+    engine = engine or get_engine()
+    if engine is None:
+        raise RuntimeError("Database is not configured; cannot read migration state.")
+    with engine.begin() as conn:
+        _ensure_migrations_table(conn)
+        v = conn.execute(text(f"SELECT MAX(version) FROM {MIGRATIONS_TABLE}")).scalar()
+    return int(v or 0)
+
+
+def migrate(target: int | None = None, engine=None) -> List[int]:
+    """
+    Apply pending migrations up to `target` (default: latest), one transaction each.
+    Returns the list of versions applied in this run.
+    """
+    engine = engine or get_engine()
+    if engine is None:
+        raise RuntimeError("Database is not configured; cannot run migrations.")
+
+    applied: List[int] = []
+    have = current_version(engine)
+    for version, description, apply in MIGRATIONS:
+        if version <= have or (target is not None and version > target):
+            continue
+        # MySQL/TiDB DDL auto-commits, so every step must be safe to re-run if the
+        # version row below fails to write.
+        with engine.begin() as conn:
+            apply(conn)
+            conn.execute(
+                text(f"INSERT INTO {MIGRATIONS_TABLE} (version, description) VALUES (:v, :d)"),
+                {"v": version, "d": description},
+            )
+        applied.append(version)
+    return applied
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Apply versioned DB schema migrations.")
+    parser.add_argument("--target", type=int, default=None, help="stop after this version")
+    parser.add_argument("--status", action="store_true", help="print current/latest version and exit")
+    args = parser.parse_args(argv)
+
+    latest = MIGRATIONS[-1][0]
+    if get_engine() is None:
+        print("Database is not configured (no engine); nothing was migrated.", file=sys.stderr)
+        return 1
+    if args.status:
+        print(f"schema version {current_version()} (latest {latest})")
+        return 0
+
+    applied = migrate(target=args.target)
+    if applied:
+        print(f"Applied migrations: {', '.join(map(str, applied))}")
+    else:
+        print("Schema already up to date.")
+    print(f"schema version {current_version()} (latest {latest})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
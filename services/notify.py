@@ -0,0 +1,160 @@
+# services/notify.py
+# Fire-and-forget notifications (Pushover) off the request path.
+# submit() never blocks: messages go into a bounded queue drained by one daemon worker,
+# which coalesces bursts into a single push and retries transient failures with backoff.
+
+import os
+import time
+import logging
+import queue
+import threading
+from typing import Callable, Dict, List, Optional
+
+QUEUE_CAPACITY = int(os.getenv("NOTIFY_QUEUE_CAPACITY", "100"))
+COALESCE_WINDOW_SEC = float(os.getenv("NOTIFY_COALESCE_SEC", "2"))
+MAX_RETRIES = int(os.getenv("NOTIFY_MAX_RETRIES", "3"))
+BACKOFF_SEC = float(os.getenv("NOTIFY_BACKOFF_SEC", "1"))
+
+Sink = Callable[[str], None]  # raises on failure
+
+log = logging.getLogger(__name__)
+
+
+def _retryable(exc: Exception) -> bool:
+    """Network errors, 5xx and 429 are worth retrying; other 4xx (bad token/user key) never succeed."""
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    return not (isinstance(status, int) and 400 <= status < 500 and status != 429)
+
+
+class PushoverSink:
+    """Send a message to Pushover; no-op when PUSHOVER_APP_TOKEN/PUSHOVER_USER_KEY are unset."""
+
+    def __init__(self, app_token: Optional[str] = None, user_key: Optional[str] = None, timeout: float = 5):
+        self.app_token = app_token or os.getenv("PUSHOVER_APP_TOKEN")
+        self.user_key = user_key or os.getenv("PUSHOVER_USER_KEY")
+        self.timeout = timeout
+
+    def __call__(self, msg: str) -> None:
+        if not (self.app_token and self.user_key):
+            return
+        import requests
+
+        r = requests.post(
+            "https://api.pushover.net/1/messages.json",
+            data={"token": self.app_token, "user": self.user_key, "message": msg},
+            timeout=self.timeout,
+        )
+        r.raise_for_status()
+
+
+class MemorySink:
+    """Local stand-in: records messages (tests, dev without Pushover)."""
+
+    def __init__(self):
+        self.messages: List[str] = []
+
+    def __call__(self, msg: str) -> None:
+        self.messages.append(msg)
+
+
+class Dispatcher:
+    def __init__(
+        self,
+        sink: Sink,
+        capacity: int = QUEUE_CAPACITY,
+        coalesce_window_sec: float = COALESCE_WINDOW_SEC,
+        max_retries: int = MAX_RETRIES,
+        backoff_sec: float = BACKOFF_SEC,
+    ):
+        self.sink = sink
+        self.coalesce_window_sec = coalesce_window_sec
+        self.max_retries = max_retries
+        self.backoff_sec = backoff_sec
+        self._q: "queue.Queue[str]" = queue.Queue(maxsize=capacity)
+        self._stats = {"submitted": 0, "sent": 0, "coalesced": 0, "dropped": 0, "failed": 0}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="notify-dispatcher", daemon=True)
+        self._thread.start()
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self._stats[key] += n
+
+    def submit(self, msg: str) -> bool:
+        """Enqueue without blocking. Returns False if the queue is full (message dropped)."""
+        try:
+            self._q.put_nowait(msg)
+        except queue.Full:
+            self._count("dropped")
+            return False
+        self._count("submitted")
+        return True
+
+    def _collect(self) -> List[str]:
+        """Block for one message, then take whatever else arrives within the coalesce window."""
+        batch = [self._q.get()]
+        deadline = time.monotonic() + self.coalesce_window_sec
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _deliver(self, msg: str) -> bool:
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.sink(msg)
+                return True
+            except Exception as e:
+                if not _retryable(e):
+                    log.warning("notification dropped, not retryable: %s", e)
+                    return False
+                if attempt < self.max_retries:
+                    time.sleep(self.backoff_sec * (2 ** attempt))
+        return False
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            # Bursts become one push; the newest line carries the latest state.
+            msg = batch[0] if len(batch) == 1 else "\n".join(batch[-5:]) + (
+                f"\n(+{len(batch) - 5} more)" if len(batch) > 5 else ""
+            )
+            self._count("coalesced", len(batch) - 1)
+            self._count("sent" if self._deliver(msg) else "failed")
+            for _ in batch:
+                self._q.task_done()
+
+    def join(self) -> None:
+        """Wait until everything submitted so far was delivered or given up on."""
+        self._q.join()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, queued=self._q.qsize())
+
+
+_DISPATCHER: Optional[Dispatcher] = None
+_DISPATCHER_LOCK = threading.Lock()
+
+
+def get_dispatcher() -> Dispatcher:
+    global _DISPATCHER
+    if _DISPATCHER is None:
+        with _DISPATCHER_LOCK:
+            if _DISPATCHER is None:
+                _DISPATCHER = Dispatcher(PushoverSink())
+    return _DISPATCHER
+
+
+def set_sink(sink: Sink) -> None:
+    """Swap where notifications go (e.g. MemorySink in tests) without restarting the worker."""
+    get_dispatcher().sink = sink
+
+
+def send_async(msg: str) -> bool:
+    return get_dispatcher().submit(msg)
@@ -0,0 +1,102 @@
+# services/ogg_opus.py
+# Join the per-chunk OGG_OPUS files Google TTS returns into one Ogg Opus stream.
+#
+# Unlike MP3 frames, Ogg files can't just be concatenated: the result would be a "chained"
+# stream that several browsers stop playing after the first link. OggOpusJoiner remuxes pages
+# instead. It keeps the first chunk's headers and serial number and drops the OpusHead/OpusTags
+# pages of later chunks. Page sequence numbers are renumbered, granule positions are shifted so
+# time keeps running, and only the final page is flagged end-of-stream. Pages are rewritten
+# with a fresh CRC; packet data is never touched.
+# (Later chunks keep their few ms of encoder pre-roll, which is inaudible between sentences.)
+
+import struct
+from typing import Iterator, List, Optional, Tuple
+
+_HEADER = struct.Struct("<4sBBqIIIB")  # capture, version, type, granule, serial, seq, crc, segments
+_BOS, _EOS = 0x02, 0x04
+_NO_GRANULE = -1  # page on which no packet ends
+
+
+def _crc_table() -> List[int]:
+    table = []
+    for i in range(256):
+        r = i << 24
+        for _ in range(8):
+            r = ((r << 1) ^ 0x04C11DB7) if r & 0x80000000 else (r << 1)
+        table.append(r & 0xFFFFFFFF)
+    return table
+
+
+_CRC = _crc_table()
+
+
+def ogg_crc(data: bytes) -> int:
+    crc = 0
+    for b in data:
+        crc = ((crc << 8) & 0xFFFFFFFF) ^ _CRC[((crc >> 24) & 0xFF) ^ b]
+    return crc
+
+
+Page = Tuple[int, int, int, int, bytes, bytes]  # (type, granule, serial, seq, lacing, body)
+
+
+def read_pages(data: bytes) -> Iterator[Page]:
+    pos = 0
+    while pos < len(data):
+        if data[pos:pos + 4] != b"OggS":
+            raise ValueError(f"not an Ogg page at byte {pos}")
+        _, _, typ, granule, serial, seq, _, nseg = _HEADER.unpack_from(data, pos)
+        lacing = data[pos + _HEADER.size: pos + _HEADER.size + nseg]
+        start = pos + _HEADER.size + nseg
+        end = start + sum(lacing)
+        yield typ, granule, serial, seq, bytes(lacing), data[start:end]
+        pos = end
+
+
+def write_page(typ: int, granule: int, serial: int, seq: int, lacing: bytes, body: bytes) -> bytes:
+    head = _HEADER.pack(b"OggS", 0, typ, granule, serial, seq, 0, len(lacing)) + lacing
+    crc = ogg_crc(head + body)
+    return head[:22] + struct.pack("<I", crc) + head[26:] + body
+
+
+class OggOpusJoiner:
+    """feed() each chunk's Ogg Opus bytes in order, then finish(); the outputs concatenate to one stream."""
+
+    def __init__(self):
+        self._serial: Optional[int] = None
+        self._seq = 0
+        self._offset = 0        # granule (48 kHz samples) at the end of the chunks fed so far
+        self._pending: Optional[List] = None  # last page, held back so finish() can flag EOS
+
+    def _emit(self, typ: int, granule: int, lacing: bytes, body: bytes) -> bytes:
+        out = b""
+        if self._pending is not None:
+            out = write_page(*self._pending)
+        self._pending = [typ & ~_EOS, granule, self._serial, self._seq, lacing, body]
+        self._seq += 1
+        return out
+
+    def feed(self, data: bytes) -> bytes:
+        first = self._serial is None
+        out, headers_left, last_granule = [], 2, 0  # OpusHead + OpusTags, each ending its own page
+        for typ, granule, serial, _, lacing, body in read_pages(data):
+            if self._serial is None:
+                self._serial = serial
+            if headers_left > 0:
+                headers_left -= sum(1 for n in lacing if n < 255)
+                if first:
+                    out.append(self._emit(typ, granule, lacing, body))
+                continue
+            if granule != _NO_GRANULE:
+                last_granule = granule
+                granule += self._offset
+            out.append(self._emit(typ & ~_BOS, granule, lacing, body))
+        self._offset += last_granule
+        return b"".join(out)
+
+    def finish(self) -> bytes:
+        if self._pending is None:
+            return b""
+        self._pending[0] |= _EOS
+        page, self._pending = write_page(*self._pending), None
+        return page
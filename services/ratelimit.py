@@ -0,0 +1,132 @@
+# services/ratelimit.py
+# Per-provider token buckets (OpenAI requests + tokens per minute, TTS requests + characters per
+# minute), shared by every session and job in the process.
+#
+# acquire() reserves capacity up front and sleeps until it is available, so calls queue in
+# arrival order. If the projected wait is longer than max_wait_sec the call is rejected
+# immediately (AdmissionRejected) without consuming anything, rather than running into the
+# provider's own 429 halfway through a generation.
+#
+# Limits are per process; with several replicas, divide the provider quota between them.
+
+import time
+import threading
+from typing import Callable, Dict, Optional
+
+from services.config import (
+    OPENAI_RPM,
+    OPENAI_TPM,
+    TTS_RPM,
+    TTS_CPM,
+    RATE_LIMIT_MAX_WAIT_SEC,
+)
+from services.metrics import RATE_LIMITED
+
+
+class AdmissionRejected(RuntimeError):
+    def __init__(self, provider: str, wait_sec: float):
+        self.provider = provider
+        self.wait_sec = wait_sec
+        super().__init__(
+            f"יש כרגע עומס על השירות ({provider}) — ההמתנה הצפויה כ-{int(wait_sec) + 1} שניות. נסו שוב בעוד דקה."
+        )
+
+
+class TokenBucket:
+    """`per_minute` units refilled continuously, up to `burst` (default: one minute's worth)."""
+
+    def __init__(self, per_minute: float, burst: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst if burst is not None else per_minute)
+        self._clock = clock
+        self._tokens = self.capacity  # may go negative: capacity already promised to queued callers
+        self._stamp = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def wait_for(self, n: float) -> float:
+        """Seconds until `n` units would be available, counting earlier reservations (no lock: caller holds it)."""
+        self._refill()
+        n = min(n, self.capacity)  # a single call bigger than the bucket waits for a full bucket, not forever
+        short = n - self._tokens
+        return max(0.0, short / self.rate)
+
+    def take(self, n: float) -> None:
+        self._refill()
+        self._tokens -= min(n, self.capacity)
+
+    def give_back(self, n: float) -> None:
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + n)
+
+
+class Limiter:
+    def __init__(
+        self,
+        provider: str,
+        per_minute: Dict[str, float],
+        max_wait_sec: float = RATE_LIMIT_MAX_WAIT_SEC,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """per_minute: {"requests": 500, "tokens": 200_000}; a limit <= 0 means unlimited."""
+        self.provider = provider
+        self.max_wait_sec = max_wait_sec
+        self._buckets = {k: TokenBucket(v, clock=clock) for k, v in per_minute.items() if v and v > 0}
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._stats = {"admitted": 0, "delayed": 0, "rejected": 0, "waited_sec": 0.0}
+
+    def _wait(self, amounts: Dict[str, float]) -> float:
+        return max((self._buckets[k].wait_for(n) for k, n in amounts.items() if k in self._buckets), default=0.0)
+
+    def check(self, **amounts: float) -> float:
+        """Projected wait for these amounts without reserving; raises AdmissionRejected past max_wait_sec."""
+        with self._lock:
+            wait = self._wait(amounts)
+        if wait > self.max_wait_sec:
+            raise AdmissionRejected(self.provider, wait)
+        return wait
+
+    def acquire(self, **amounts: float) -> float:
+        """Reserve the amounts (e.g. requests=1, tokens=1800) and sleep until they are available."""
+        with self._lock:
+            wait = self._wait(amounts)
+            if wait > self.max_wait_sec:
+                self._stats["rejected"] += 1
+                RATE_LIMITED.inc(provider=self.provider, result="rejected")
+                raise AdmissionRejected(self.provider, wait)
+            for k, n in amounts.items():
+                if k in self._buckets:
+                    self._buckets[k].take(n)
+            self._stats["admitted"] += 1
+            if wait > 0:
+                self._stats["delayed"] += 1
+                self._stats["waited_sec"] += wait
+        RATE_LIMITED.inc(provider=self.provider, result="delayed" if wait > 0 else "admitted")
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def settle(self, **deltas: float) -> None:
+        """Correct an estimate once the real cost is known: positive charges more, negative refunds."""
+        with self._lock:
+            for k, d in deltas.items():
+                bucket = self._buckets.get(k)
+                if bucket is None or not d:
+                    continue
+                if d > 0:
+                    bucket.take(d)
+                else:
+                    bucket.give_back(-d)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._stats)
+
+
+OPENAI = Limiter("openai", {"requests": OPENAI_RPM, "tokens": OPENAI_TPM})
+TTS = Limiter("google_tts", {"requests": TTS_RPM, "characters": TTS_CPM})
@@ -0,0 +1,205 @@
+# services/reconcile.py
+# Find and delete MP3s in the Supabase bucket that no `episodes` row points to
+# (e.g. upload succeeded but save_on_five_stars failed, or an admin delete lost the storage call).
+#
+#   python -m services.reconcile                # dry run: report orphans only
+#   python -m services.reconcile --delete       # actually remove them
+#
+# Both sides are consumed as sorted streams and diffed as a merge-join, so memory is bounded
+# by (concurrency x page size) + one DB batch regardless of bucket size.
+
+import os
+import time
+import argparse
+import datetime as dt
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import bindparam, text
+
+from .db import get_engine
+from . import store
+
+
+def iter_bucket_objects(
+    prefix: str = "audio",
+    page_size: int = 100,
+    concurrency: int = 4,
+    list_page: Callable[..., List[Dict]] = store.list_bucket_mp3s_live,
+) -> Iterator[Dict]:
+    """
+    Yield bucket objects in name order, fetching `concurrency` pages at a time.
+    Stops at the first short page. Storage lists names ascending by default.
+    Always reads the live API (never the local mirror). A failed page comes back as [] and ends the scan early, which
+    can only under-report orphans, never delete a referenced object.
+    """
+    page = 1
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while True:
+            pages = list(range(page, page + concurrency))
+            results = list(pool.map(lambda p: list_page(page=p, page_size=page_size, prefix=prefix), pages))
+            for items in results:
+                yield from items
+                if len(items) < page_size:
+                    return
+            page += concurrency
+
+
+def iter_db_storage_keys(prefix: str = "audio", batch_size: int = 1000, engine=None) -> Iterator[str]:
+    """
+    Yield distinct non-null storage keys in ascending (code point) order, one keyset-paginated
+    batch at a time. MySQL/TiDB compare with utf8mb4_bin: the default *_ci collations sort
+    case-insensitively and would not match Python's order, which the merge-join relies on.
+    """
+    engine = engine or get_engine()
+    if engine is None:
+        # Never diff against an empty DB side: every object would look orphaned.
+        raise RuntimeError("Database is not configured; refusing to reconcile.")
+    col = "storage_key COLLATE utf8mb4_bin" if engine.dialect.name in ("mysql", "mariadb") else "storage_key"
+    sql = text(
+        f"""
+        SELECT DISTINCT storage_key FROM episodes
+        WHERE storage_key IS NOT NULL AND storage_key LIKE :prefix AND {col} > :after
+        ORDER BY {col}
+        LIMIT :limit
+        """
+    )
+    after = ""
+    while True:
+        with engine.connect() as conn:
+            keys = [r[0] for r in conn.execute(sql, {"prefix": f"{prefix}/%", "after": after, "limit": batch_size})]
+        for key in keys:
+            if key <= after:
+                raise RuntimeError(f"DB storage keys are not sorted ({after!r} >= {key!r}); aborting.")
+            after = key
+            yield key
+        if len(keys) < batch_size:
+            return
+
+
+def _referenced(keys: List[str], engine) -> set:
+    """Which of `keys` some episodes row still points at (re-checked right before deleting)."""
+    sql = text("SELECT DISTINCT storage_key FROM episodes WHERE storage_key IN :keys").bindparams(
+        bindparam("keys", expanding=True)
+    )
+    with engine.connect() as conn:
+        return {r[0] for r in conn.execute(sql, {"keys": keys})}
+
+
+def _parse_ts(value) -> Optional[dt.datetime]:
+    if not value:
+        return None
+    try:
+        ts = dt.datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return ts if ts.tzinfo else ts.replace(tzinfo=dt.timezone.utc)
+
+
+def reconcile(
+    dry_run: bool = True,
+    prefix: str = "audio",
+    page_size: int = 100,
+    concurrency: int = 4,
+    delete_batch: int = 100,
+    min_age_sec: float = 3600,
+    engine=None,
+    list_page: Callable[..., List[Dict]] = store.list_bucket_mp3s_live,
+    remove: Optional[Callable[[List[str]], None]] = None,
+    progress_every_sec: float = 5.0,
+    quiet: bool = False,
+) -> Dict[str, int]:
+    """
+    Merge-join bucket objects against DB storage keys and delete orphans in batches.
+    Objects younger than `min_age_sec` are skipped: the save flow uploads before it inserts.
+    Each delete batch is re-checked against the DB by exact key first, so a DB stream that
+    turns out to be mis-sorted (the run then aborts) can't have deleted a referenced object.
+    Returns counters: scanned, referenced, orphans, deleted, orphan_bytes, skipped_recent, missing_in_bucket.
+    """
+    if remove is None:
+        def remove(keys):
+            bucket = os.getenv("SUPABASE_BUCKET", "podkids-audio")
+            store._sb().storage.from_(bucket).remove(keys)
+
+    stats = {k: 0 for k in ("scanned", "referenced", "orphans", "deleted", "orphan_bytes",
+                            "skipped_recent", "missing_in_bucket")}
+    cutoff = dt.datetime.now(dt.timezone.utc) - dt.timedelta(seconds=min_age_sec)
+    engine = engine or get_engine()
+    pending: List[str] = []
+    t0 = last = time.perf_counter()
+
+    def flush():
+        if pending and not dry_run:
+            keep = _referenced(pending, engine)
+            keys = [k for k in pending if k not in keep]
+            if keys:
+                remove(keys)
+                stats["deleted"] += len(keys)
+        pending.clear()
+
+    db_keys = iter_db_storage_keys(prefix, engine=engine)
+    cur_db = next(db_keys, None)
+    prev_key = ""
+    for obj in iter_bucket_objects(prefix, page_size, concurrency, list_page):
+        key = obj["storage_key"]
+        if key < prev_key:
+            raise RuntimeError(f"Bucket listing is not sorted ({prev_key!r} > {key!r}); aborting.")
+        prev_key = key
+        stats["scanned"] += 1
+
+        while cur_db is not None and cur_db < key:
+            stats["missing_in_bucket"] += 1
+            cur_db = next(db_keys, None)
+
+        if cur_db == key:
+            stats["referenced"] += 1
+            cur_db = next(db_keys, None)  # keys are DISTINCT and bucket names unique
+        else:
+            ts = _parse_ts(obj.get("updated_at"))
+            if ts is not None and ts > cutoff:
+                stats["skipped_recent"] += 1
+            else:
+                stats["orphans"] += 1
+                stats["orphan_bytes"] += int(obj.get("size") or 0)
+                pending.append(key)
+                if len(pending) >= delete_batch:
+                    flush()
+
+        now = time.perf_counter()
+        if not quiet and now - last >= progress_every_sec:
+            last = now
+            print(f"reconcile: {stats['scanned']} scanned, {stats['orphans']} orphans, "
+                  f"{stats['deleted']} deleted ({stats['scanned'] / (now - t0):.0f} objects/s)", flush=True)
+
+    flush()
+    while cur_db is not None:
+        stats["missing_in_bucket"] += 1
+        cur_db = next(db_keys, None)
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Delete bucket MP3s that no episodes row references.")
+    parser.add_argument("--delete", action="store_true", help="actually delete (default is a dry run)")
+    parser.add_argument("--prefix", default="audio")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--delete-batch", type=int, default=100)
+    parser.add_argument("--min-age-hours", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    stats = reconcile(
+        dry_run=not args.delete,
+        prefix=args.prefix,
+        page_size=args.page_size,
+        concurrency=args.concurrency,
+        delete_batch=args.delete_batch,
+        min_age_sec=args.min_age_hours * 3600,
+    )
+    mode = "deleted" if args.delete else "dry run"
+    print(f"reconcile ({mode}): " + ", ".join(f"{k}={v}" for k, v in stats.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
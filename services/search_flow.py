@@ -0,0 +1,122 @@
+# services/search_flow.py
+# What happens on "חפש 🔎", fanned out: the search counter, the DB cache lookup and a
+# speculative Wikipedia fetch start together, each with its own deadline measured from the
+# click. A cache hit cancels (or abandons) the wiki call; a miss hands its summary to the
+# generation job so the pipeline doesn't fetch it again.
+
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from services.tracing import wrap
+from services.metrics import SEARCHES, cache_result, tts_avoided
+from services.config import (
+    SEARCH_FANOUT_WORKERS,
+    SEARCH_COUNTER_TIMEOUT_SEC,
+    SEARCH_CACHE_TIMEOUT_SEC,
+    SEARCH_WIKI_TIMEOUT_SEC,
+)
+
+_POOL: Optional[ThreadPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = ThreadPoolExecutor(max_workers=SEARCH_FANOUT_WORKERS, thread_name_prefix="search-fanout")
+    return _POOL
+
+
+def _count() -> int:
+    from services.app_state import increment_searches_and_maybe_notify
+
+    return increment_searches_and_maybe_notify(every=10)
+
+
+def _lookup(topic: str, minutes: float):
+    from services.store import get_cached_podcast
+
+    return get_cached_podcast(topic, minutes)
+
+
+def _fetch_summary(topic: str) -> Tuple[bool, str]:
+    from services.wiki import get_hebrew_summary
+
+    return get_hebrew_summary(topic)
+
+
+def _timed(timings: Dict[str, float], name: str, fn: Callable[[], Any]) -> Callable[[], Any]:
+    def run():
+        t0 = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            timings[name] = time.perf_counter() - t0
+
+    return run
+
+
+def _wait(fut: Future, deadline: float) -> Tuple[Any, Optional[str]]:
+    """(result, None) or (None, error message) if it failed or missed the deadline."""
+    try:
+        return fut.result(timeout=max(0.0, deadline - time.monotonic())), None
+    except FutureTimeout:
+        return None, "timeout"
+    except Exception as e:
+        return None, str(e) or type(e).__name__
+
+
+def run_search(
+    topic: str,
+    minutes: float,
+    count: Callable[[], int] = _count,
+    lookup: Callable[[str, float], Any] = _lookup,
+    fetch_summary: Callable[[str], Tuple[bool, str]] = _fetch_summary,
+    counter_timeout: float = SEARCH_COUNTER_TIMEOUT_SEC,
+    cache_timeout: float = SEARCH_CACHE_TIMEOUT_SEC,
+    wiki_timeout: float = SEARCH_WIKI_TIMEOUT_SEC,
+    executor: Optional[ThreadPoolExecutor] = None,
+) -> Dict[str, Any]:
+    """
+    Returns a dict with:
+      cached          – the cached episode dict, or None
+      cache_error     – why the lookup gave no answer ("timeout" or the exception text), or None
+      summary         – (ok, summary_or_msg) from Wikipedia on a cache miss, or None if not ready in time
+      searches_total  – the updated counter, or None if it failed / missed its deadline
+      timings         – seconds per step that finished, plus "total"
+    A step that is late or fails never raises here; the caller falls back as before.
+    """
+    pool = executor or _pool()
+    timings: Dict[str, float] = {}
+    t0 = time.monotonic()
+
+    # wrap(): spans opened on the pool threads nest under the caller's "search" span
+    counter_f = pool.submit(wrap(_timed(timings, "counter", count)))
+    cache_f = pool.submit(wrap(_timed(timings, "cache", lambda: lookup(topic, minutes))))
+    wiki_f = pool.submit(wrap(_timed(timings, "wiki", lambda: fetch_summary(topic))))
+
+    cached, cache_error = _wait(cache_f, t0 + cache_timeout)
+    summary = None
+    if cached:
+        wiki_f.cancel()  # not started yet -> never runs; already running -> result is ignored
+    else:
+        summary, _ = _wait(wiki_f, t0 + wiki_timeout)
+    searches_total, _ = _wait(counter_f, t0 + counter_timeout)
+
+    timings["total"] = time.monotonic() - t0
+    SEARCHES.inc()
+    if cache_error is None:
+        cache_result("episode", bool(cached))
+        if cached:
+            tts_avoided(True)
+    return {
+        "cached": cached,
+        "cache_error": cache_error,
+        "summary": summary,
+        "searches_total": searches_total,
+        "timings": dict(timings),
+    }
@@ -0,0 +1,91 @@
+# services/singleflight.py
+# Process-wide single-flight: concurrent calls with the same key share one execution.
+# Used by the job queue so identical (topic, minutes, age_label) requests attach to the
+# generation already in progress instead of starting another LLM + TTS pipeline.
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: BaseException = None
+        self.waiters = 0
+
+
+class Group:
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "executions": 0, "coalesced": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run fn() once per key at a time. Callers arriving while it runs block and get the
+        same result (or exception). Returns (value, shared) where shared is True for joiners.
+        """
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats["coalesced"] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._stats["executions"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.value, False
+
+    def attach(self, key: Hashable, start: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Non-blocking variant for async work: return the value registered for key if one is
+        in flight, else call start() and register its value until forget(key).
+        Returns (value, attached) where attached is True when an existing flight was joined.
+        """
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats["coalesced"] += 1
+                return call.value, True
+            call = _Call()
+            call.value = start()  # under the lock so two starters can't race
+            self._calls[key] = call
+            self._stats["executions"] += 1
+            return call.value, False
+
+    def forget(self, key: Hashable, value: Any = None) -> None:
+        """
+        End a flight registered by attach(); the next call with this key starts fresh.
+        With value given, only forget if that is still the registered flight.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None or (value is not None and call.value is not value):
+                return
+            del self._calls[key]
+        call.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, inflight=len(self._calls))
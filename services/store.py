@@ -1,83 +1,257 @@
 # services/store.py
 from __future__ import annotations
 
+import io
 import os
+import time
 import uuid
+import base64
+import hashlib
+import functools
 import pathlib
 import mimetypes
-from typing import Optional, Tuple, List, Dict, Any
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional, Tuple, List, Dict, Any, BinaryIO, Union
 
-from sqlalchemy import text
-from .db import engine  # engine is defined in services/db.py
+from .db import get_engine  # engine is built lazily on first use; sqlalchemy is imported inside the queries
+from . import bucket_mirror, metering
+from .tracing import traced
+from .metrics import cache_result, PROVIDER_ERRORS
+from .audio_profiles import AUDIO_EXTENSIONS
 
 # ---------- Supabase (PUBLIC bucket) ----------
-from supabase import create_client, Client
+from . import supabase_client
 
-_SB: Client | None = None
+if TYPE_CHECKING:
+    from supabase import Client
+
+
+def _sb_credentials() -> Tuple[str, str]:
+    # Server side in Streamlit: Service Role is fine for writes. Fall back to anon for read-only.
+    creds = supabase_client.credentials(allow_anon=True)
+    if creds is None:
+        raise RuntimeError("Missing SUPABASE_URL or SUPABASE_*_KEY in environment")
+    return creds
 
 
 def _sb() -> Client:
-    """Lazy-init Supabase client from environment variables."""
-    global _SB
-    if _SB is None:
-        url = os.getenv("SUPABASE_URL")
-        # Server side in Streamlit: Service Role is fine for writes. Fall back to anon for read-only.
-        key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_ANON_KEY")
-        if not url or not key:
-            raise RuntimeError("Missing SUPABASE_URL or SUPABASE_*_KEY in environment")
-        _SB = create_client(url, key)
-    return _SB
-
-
-def upload_mp3_to_supabase(local_path: str) -> Tuple[str, str]:
+    """Shared, pooled Supabase client (see services/supabase_client.py)."""
+    return supabase_client.get_client(allow_anon=True)
+
+
+# Objects above this size go through the resumable (TUS) endpoint in fixed-size chunks;
+# Supabase requires 6 MB chunks. Smaller files are one request with retry.
+RESUMABLE_THRESHOLD = 6 * 1024 * 1024
+TUS_CHUNK_SIZE = 6 * 1024 * 1024
+UPLOAD_RETRIES = 3
+UPLOAD_BACKOFF_SEC = 1.0
+# Storage sends this as "Cache-Control: max-age=<value>". Keys are content hashes, so an
+# object never changes and browsers/CDNs may keep it for a year without revalidating.
+UPLOAD_CACHE_CONTROL = os.getenv("UPLOAD_CACHE_CONTROL", "31536000, immutable")
+
+AudioSource = Union[str, os.PathLike, bytes, bytearray, BinaryIO]
+
+
+def _with_retry(fn, retries: int = UPLOAD_RETRIES):
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if _is_duplicate(e) or attempt == retries:
+                raise
+            time.sleep(UPLOAD_BACKOFF_SEC * (2 ** attempt))
+
+
+def _is_duplicate(exc: Exception) -> bool:
+    status = getattr(exc, "status", None) or getattr(exc, "status_code", None)
+    return str(status) == "409" or "Duplicate" in str(exc) or "already exists" in str(exc)
+
+
+def _hash_source(source: AudioSource):
+    """
+    Return (sha256_hex, size, body, name_hint). `body` is bytes for small payloads or a
+    seekable binary file for large ones, so we never hold a large file in memory.
+    """
+    h = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray)):
+        data = bytes(source)
+        h.update(data)
+        body = data if len(data) <= RESUMABLE_THRESHOLD else io.BytesIO(data)
+        return h.hexdigest(), len(data), body, ""
+
+    if isinstance(source, (str, os.PathLike)):
+        p = pathlib.Path(source)
+        if not p.exists():
+            raise FileNotFoundError(str(source))
+        name_hint = p.name
+        size = p.stat().st_size
+        if size <= RESUMABLE_THRESHOLD:
+            data = p.read_bytes()
+            h.update(data)
+            return h.hexdigest(), size, data, name_hint
+        fh = p.open("rb")
+    else:
+        name_hint = os.path.basename(str(getattr(source, "name", "") or ""))
+        # Arbitrary stream (e.g. straight from the TTS assembler): spool while hashing.
+        fh = tempfile.SpooledTemporaryFile(max_size=RESUMABLE_THRESHOLD)
+        for block in iter(lambda: source.read(1024 * 1024), b""):
+            fh.write(block)
+        fh.seek(0)
+
+    for block in iter(lambda: fh.read(1024 * 1024), b""):
+        h.update(block)
+    size = fh.tell()
+    fh.seek(0)
+    if size <= RESUMABLE_THRESHOLD:
+        data = fh.read()
+        fh.close()
+        return h.hexdigest(), size, data, name_hint
+    return h.hexdigest(), size, fh, name_hint
+
+
+def _object_exists(bucket: str, storage_key: str) -> bool:
+    api = _sb().storage.from_(bucket)
+    try:
+        if hasattr(api, "exists"):  # storage3 >= 0.12 (HEAD request)
+            return bool(api.exists(storage_key))
+        folder, _, name = storage_key.rpartition("/")
+        items = api.list(path=folder, options={"search": name, "limit": 1})
+        return any(i.get("name") == name for i in items or [])
+    except Exception:
+        return False  # unknown -> try the upload; a 409 is treated as "already there"
+
+
+def _tus_upload(bucket: str, storage_key: str, fh: BinaryIO, size: int, content_type: str) -> None:
+    """Chunked, resumable upload via Supabase's TUS endpoint; resumes from the server offset on errors."""
+    import requests
+
+    url, key = _sb_credentials()
+    endpoint = url.rstrip("/") + "/storage/v1/upload/resumable"
+    base = {"Authorization": f"Bearer {key}", "apikey": key, "Tus-Resumable": "1.0.0"}
+    meta = {"bucketName": bucket, "objectName": storage_key, "contentType": content_type, "cacheControl": UPLOAD_CACHE_CONTROL}
+    upload_meta = ",".join(f"{k} {base64.b64encode(v.encode()).decode()}" for k, v in meta.items())
+
+    create = _with_retry(lambda: requests.post(
+        endpoint,
+        headers={**base, "Upload-Length": str(size), "Upload-Metadata": upload_meta, "x-upsert": "false"},
+        timeout=30,
+    ))
+    if create.status_code == 409:
+        return  # same content already stored
+    create.raise_for_status()
+    location = create.headers["Location"]
+
+    offset, failures = 0, 0
+    while offset < size:
+        fh.seek(offset)
+        chunk = fh.read(TUS_CHUNK_SIZE)
+        try:
+            r = requests.patch(
+                location,
+                data=chunk,
+                headers={**base, "Upload-Offset": str(offset), "Content-Type": "application/offset+octet-stream"},
+                timeout=120,
+            )
+            r.raise_for_status()
+            offset = int(r.headers.get("Upload-Offset", offset + len(chunk)))
+            failures = 0
+        except requests.RequestException:
+            failures += 1
+            if failures > UPLOAD_RETRIES:
+                raise
+            time.sleep(UPLOAD_BACKOFF_SEC * (2 ** (failures - 1)))
+            head = requests.head(location, headers=base, timeout=30)
+            head.raise_for_status()
+            offset = int(head.headers["Upload-Offset"])
+
+
+@traced("store.upload_mp3_to_supabase")
+def upload_mp3_to_supabase(source: AudioSource, content_type: Optional[str] = None) -> Tuple[str, str]:
     """
-    Upload an MP3 to a **PUBLIC** Supabase bucket.
+    Upload an episode (MP3 or Ogg Opus) to a **PUBLIC** Supabase bucket.
+    `source` may be a local path, raw bytes, or a binary stream (e.g. from the TTS assembler).
+    The storage key is the content hash (audio/<sha256>.mp3|.ogg), so identical audio is stored
+    once and a repeat save skips the upload entirely. Because a key's bytes never change, the
+    object is served with a long-lived immutable Cache-Control (UPLOAD_CACHE_CONTROL).
     Returns (public_url, storage_key). Public URL will work if the bucket is public.
     """
     bucket = os.getenv("SUPABASE_BUCKET", "podkids-audio")
 
-    p = pathlib.Path(local_path)
-    if not p.exists():
-        raise FileNotFoundError(local_path)
-
-    storage_key = f"audio/{uuid.uuid4().hex}.mp3"
-    content_type = mimetypes.guess_type(p.name)[0] or "audio/mpeg"
-
-    with p.open("rb") as f:
-        # supabase-py v2 expects "contentType" and "upsert" strings in file_options
-        _sb().storage.from_(bucket).upload(
-            storage_key,
-            f,
-            file_options={
-                "contentType": content_type,
-                "upsert": "true",
-            },
-        )
+    digest, size, body, name_hint = _hash_source(source)
+    content_type = content_type or mimetypes.guess_type(name_hint)[0] or "audio/mpeg"
+    storage_key = f"audio/{digest}.{'ogg' if content_type == 'audio/ogg' else 'mp3'}"
+
+    try:
+        if not _object_exists(bucket, storage_key):
+            if isinstance(body, bytes):
+                try:
+                    _with_retry(lambda: _sb().storage.from_(bucket).upload(
+                        storage_key,
+                        body,
+                        # storage3 reads "content-type"/"upsert"; the key is content-addressed, so never overwrite
+                        file_options={
+                            "content-type": content_type,
+                            "cache-control": UPLOAD_CACHE_CONTROL,
+                            "upsert": "false",
+                        },
+                    ))
+                except Exception as e:
+                    if not _is_duplicate(e):
+                        raise
+            else:
+                _tus_upload(bucket, storage_key, body, size, content_type)
+    except Exception:
+        PROVIDER_ERRORS.inc(provider="supabase")
+        raise
+    finally:
+        if not isinstance(body, bytes):
+            body.close()
+
+    mirror = bucket_mirror.existing_mirror(bucket, storage_key.rpartition("/")[0])
+    if mirror is not None:
+        mirror.record(storage_key, size=size)
 
     # Build a public URL (bucket must be public in Supabase dashboard)
     public_url = _sb().storage.from_(bucket).get_public_url(storage_key)
     return public_url, storage_key
 
 
+@traced("store.delete_supabase_object")
 def delete_supabase_object(storage_key: str) -> None:
     """Delete an object by its storage_key (path inside the bucket)."""
     if not storage_key:
         return
     bucket = os.getenv("SUPABASE_BUCKET", "podkids-audio")
     _sb().storage.from_(bucket).remove([storage_key])
+    mirror = bucket_mirror.existing_mirror(bucket, storage_key.rpartition("/")[0])
+    if mirror is not None:
+        mirror.forget(storage_key)
 
 
 # ---------- Optional: list files directly from Storage (for sidebar) ----------
-def list_bucket_mp3s(
+def _list_raw_page(
+    bucket: str, prefix: str, limit: int, offset: int, sort_column: str = "name", order: str = "asc"
+) -> List[Dict[str, Any]]:
+    options: Dict[str, Any] = {
+        "limit": limit,
+        "offset": offset,
+        "sortBy": {"column": sort_column, "order": order},
+    }
+    return _sb().storage.from_(bucket).list(path=prefix, options=options) or []
+
+
+@traced("store.list_bucket_mp3s_live")
+def list_bucket_mp3s_live(
     page: int = 1,
     page_size: int = 20,
     search: str = "",
     prefix: str = "",
 ) -> List[Dict[str, Any]]:
     """
-    List MP3s from the public bucket (no DB required).
-    Use this if you want the sidebar to show whatever is in Storage,
-    even if the DB is empty on a fresh deploy.
+    List MP3s straight from the Storage API (one list call per page).
+    Used when the local mirror is stale, and by jobs that must see the bucket as it is now.
     """
     bucket = os.getenv("SUPABASE_BUCKET", "podkids-audio")
     options: Dict[str, Any] = {"limit": page_size, "offset": (page - 1) * page_size}
@@ -86,7 +260,8 @@ def list_bucket_mp3s(
 
     try:
         items = _sb().storage.from_(bucket).list(path=prefix, options=options)
-        files = [i for i in items if i.get("name", "").lower().endswith(".mp3")]
+        files = [i for i in items if i.get("name", "").lower().endswith(AUDIO_EXTENSIONS)]
+        base_url = _sb_credentials()[0]
         out: List[Dict[str, Any]] = []
         for f in files:
             name = f["name"]
@@ -94,7 +269,7 @@ def list_bucket_mp3s(
             out.append(
                 {
                     "name": name,
-                    "public_url": _sb().storage.from_(bucket).get_public_url(key).replace(" ", "%20"),
+                    "public_url": bucket_mirror.public_url_for(base_url, bucket, key),
                     "size": (f.get("metadata") or {}).get("size") or f.get("size"),
                     "updated_at": f.get("updated_at") or f.get("created_at"),
                     "storage_key": key,
@@ -106,20 +281,54 @@ def list_bucket_mp3s(
         return []
 
 
+@traced("store.list_bucket_mp3s")
+def list_bucket_mp3s(
+    page: int = 1,
+    page_size: int = 20,
+    search: str = "",
+    prefix: str = "",
+) -> List[Dict[str, Any]]:
+    """
+    List MP3s from the public bucket (no DB required).
+    Use this if you want the sidebar to show whatever is in Storage,
+    even if the DB is empty on a fresh deploy.
+    Served from the local metadata mirror (services/bucket_mirror.py); falls back to
+    list_bucket_mp3s_live when the mirror is too stale to serve.
+    """
+    bucket = os.getenv("SUPABASE_BUCKET", "podkids-audio")
+    try:
+        mirror = bucket_mirror.get_mirror(
+            bucket, prefix, functools.partial(_list_raw_page, bucket), _sb_credentials()[0]
+        )
+        if mirror.ensure_fresh():
+            return mirror.list(page=page, page_size=page_size, search=search)
+    except Exception:
+        pass
+    return list_bucket_mp3s_live(page=page, page_size=page_size, search=search, prefix=prefix)
+
+
 # ---------- Core DB helpers ----------
+# Plain SQL shared by both backends (TiDB/MySQL and SQLite >= 3.25 for window functions).
+CACHED_PODCAST_SQL = """
+    SELECT script, public_url, created_at
+    FROM episodes
+    WHERE topic = :topic AND minutes = :minutes AND rating = 5
+    ORDER BY created_at DESC
+    LIMIT 1
+"""
+
+
+@traced("store.get_cached_podcast")
 def get_cached_podcast(topic: str, minutes: float) -> Optional[Dict]:
     """
     Return the latest 5-star episode for the exact (topic, minutes) pair, or None.
     """
-    sql = text(
-        """
-        SELECT script, public_url, created_at
-        FROM episodes
-        WHERE topic = :topic AND minutes = :minutes AND rating = 5
-        ORDER BY created_at DESC
-        LIMIT 1
-        """
-    )
+    from sqlalchemy import text
+
+    sql = text(CACHED_PODCAST_SQL)
+    engine = get_engine()
+    if engine is None:
+        return None
     try:
         with engine.connect() as conn:
             row = conn.execute(sql, {"topic": topic, "minutes": minutes}).fetchone()
@@ -133,6 +342,7 @@ def get_cached_podcast(topic: str, minutes: float) -> Optional[Dict]:
     return {"script": script, "public_url": public_url, "saved_at": str(created_at)}
 
 
+@traced("store.save_on_five_stars")
 def save_on_five_stars(
     topic: str,
     minutes: float,
@@ -140,13 +350,19 @@ def save_on_five_stars(
     stars: int,
     public_url: Optional[str] = None,
     storage_key: Optional[str] = None,
+    duration_sec: Optional[float] = None,
+    usage_id: Optional[str] = None,
 ) -> bool:
     """
     Insert a new episode only when stars == 5.
+    duration_sec is the measured audio length (falls back to minutes * 60); usage_id is the
+    generation job whose generation_usage row should point at the new episode.
     """
     if stars != 5:
         return False
 
+    from sqlalchemy import text
+
     sql = text(
         """
         INSERT INTO episodes
@@ -154,16 +370,20 @@ def save_on_five_stars(
         VALUES (:id, :topic, :minutes, 'he', :script, :duration_sec, :storage_key, :public_url, 5)
         """
     )
+    engine = get_engine()
+    if engine is None:
+        return False
+    episode_id = str(uuid.uuid4())
     try:
         with engine.begin() as conn:  # auto-commit
             conn.execute(
                 sql,
                 {
-                    "id": str(uuid.uuid4()),
+                    "id": episode_id,
                     "topic": topic,
                     "minutes": minutes,
                     "script": script,
-                    "duration_sec": int(minutes * 60),
+                    "duration_sec": int(round(duration_sec if duration_sec else minutes * 60)),
                     "storage_key": storage_key,
                     "public_url": public_url,
                 },
@@ -171,18 +391,27 @@ def save_on_five_stars(
     except Exception:
         # Don’t let DB write issues crash the app; you’ll still have the MP3 in Storage
         return False
+    bump_catalog_version()
+    if usage_id:
+        # separate statement: the episode is saved even if metering isn't migrated yet
+        metering.link_episode(usage_id, episode_id)
     return True
 
 
+@traced("store.delete_episode_admin")
 def delete_episode_admin(topic: str, minutes: float, admin_token: str) -> tuple[bool, str]:
     """
-    Admin delete: remove from DB and also delete the MP3 file from Supabase (if present).
+    Admin delete: remove the row from DB and its audio object from Supabase, unless another
+    episode still points at it (storage keys are content hashes, so rows can share one object;
+    a leftover object is cleaned up later by the orphan reconcile).
     Requires ADMIN_TOKEN (from env) to match the provided token.
     """
     required = os.getenv("ADMIN_TOKEN", "")
     if not required or admin_token != required:
         return False, "Unauthorized (invalid admin token)."
 
+    from sqlalchemy import text
+
     sel = text(
         """
         SELECT id, storage_key FROM episodes
@@ -191,6 +420,9 @@ def delete_episode_admin(topic: str, minutes: float, admin_token: str) -> tuple[
         LIMIT 1
         """
     )
+    engine = get_engine()
+    if engine is None:
+        return False, "Database unavailable."
     try:
         with engine.begin() as conn:
             row = conn.execute(sel, {"topic": topic, "minutes": minutes}).fetchone()
@@ -199,8 +431,12 @@ def delete_episode_admin(topic: str, minutes: float, admin_token: str) -> tuple[
 
             ep_id, storage_key = row
 
-            # Delete the file from Supabase (if exists)
-            if storage_key:
+            # Delete the file from Supabase (if exists and no other episode shares it)
+            shared = storage_key and conn.execute(
+                text("SELECT COUNT(*) FROM episodes WHERE storage_key = :k AND id != :id"),
+                {"k": storage_key, "id": ep_id},
+            ).scalar()
+            if storage_key and not shared:
                 try:
                     delete_supabase_object(storage_key)
                 except Exception:
@@ -211,10 +447,47 @@ def delete_episode_admin(topic: str, minutes: float, admin_token: str) -> tuple[
     except Exception as e:
         return False, f"Delete failed: {e}"
 
+    bump_catalog_version()
     return True, "Deleted successfully."
 
 
 # ---------- Alphabetical listing (for sidebar) ----------
+def listing_query(
+    limit: int = 20,
+    offset: int = 0,
+    collapse_by_minutes: bool = True,
+    search: Optional[str] = None,
+) -> Tuple[str, Dict[str, object]]:
+    """SQL + params behind list_saved_podcasts_alphabetical (exposed for EXPLAIN/benchmarks)."""
+    # LOWER(...) LIKE LOWER(:search) instead of ILIKE, so it runs on MySQL and SQLite alike
+    params: Dict[str, object] = {"limit": int(limit), "offset": int(offset)}
+    search_clause = ""
+    if search:
+        search_clause = " AND LOWER(topic) LIKE LOWER(:search)"
+        params["search"] = f"%{search}%"
+
+    # collapse_by_minutes -> latest row per (lower(topic), minutes); else per lower(topic)
+    partition = "lower(topic), minutes" if collapse_by_minutes else "lower(topic)"
+    sql = f"""
+        WITH ranked AS (
+            SELECT
+                id, topic, minutes, public_url, created_at, rating, script, storage_key,
+                ROW_NUMBER() OVER (
+                    PARTITION BY {partition}
+                    ORDER BY created_at DESC
+                ) AS rn
+            FROM episodes
+            WHERE rating = 5{search_clause}
+        )
+        SELECT id, topic, minutes, public_url, created_at, rating, script, storage_key
+        FROM ranked
+        WHERE rn = 1
+        ORDER BY lower(topic) ASC, minutes ASC
+        LIMIT :limit OFFSET :offset
+    """
+    return sql, params
+
+
 def list_saved_podcasts_alphabetical(
     limit: int = 20,
     offset: int = 0,
@@ -228,61 +501,26 @@ def list_saved_podcasts_alphabetical(
     collapse_by_minutes=True  -> keep the latest row per (lower(topic), minutes)
     collapse_by_minutes=False -> keep the latest row per lower(topic) (minutes collapsed)
     """
-    # ↓↓↓ REPLACED BLOCK (use LOWER(...) LIKE LOWER(:search) instead of ILIKE)
-    params: Dict[str, object] = {"limit": int(limit), "offset": int(offset)}
-    search_clause = ""
-    if search:
-        search_clause = " AND LOWER(topic) LIKE LOWER(:search)"
-        params["search"] = f"%{search}%"
-    # ↑↑↑ END REPLACED BLOCK
-
-    if collapse_by_minutes:
-        sql = text(
-            f"""
-            WITH ranked AS (
-                SELECT
-                    id, topic, minutes, public_url, created_at, rating, script, storage_key,
-                    ROW_NUMBER() OVER (
-                        PARTITION BY lower(topic), minutes
-                        ORDER BY created_at DESC
-                    ) AS rn
-                FROM episodes
-                WHERE rating = 5{search_clause}
-            )
-            SELECT id, topic, minutes, public_url, created_at, rating, script, storage_key
-            FROM ranked
-            WHERE rn = 1
-            ORDER BY lower(topic) ASC, minutes ASC
-            LIMIT :limit OFFSET :offset
-            """
-        )
-    else:
-        sql = text(
-            f"""
-            WITH ranked AS (
-                SELECT
-                    id, topic, minutes, public_url, created_at, rating, script, storage_key,
-                    ROW_NUMBER() OVER (
-                        PARTITION BY lower(topic)
-                        ORDER BY created_at DESC
-                    ) AS rn
-                FROM episodes
-                WHERE rating = 5{search_clause}
-            )
-            SELECT id, topic, minutes, public_url, created_at, rating, script, storage_key
-            FROM ranked
-            WHERE rn = 1
-            ORDER BY lower(topic) ASC, minutes ASC
-            LIMIT :limit OFFSET :offset
-            """
-        )
-
     try:
-        with engine.connect() as conn:
-            rows = conn.execute(sql, params).fetchall()
+        return _query_listing(limit, offset, collapse_by_minutes, search)
     except Exception:
         return []
 
+
+@traced("store.query_listing")
+def _query_listing(limit: int, offset: int, collapse_by_minutes: bool, search: Optional[str]) -> List[Dict]:
+    """Run the listing query; raises on DB errors (callers decide whether to swallow)."""
+    from sqlalchemy import text
+
+    sql, params = listing_query(limit, offset, collapse_by_minutes, search)
+
+    engine = get_engine()
+    if engine is None:
+        # Raise rather than return []: an empty page must not be cached as the catalog.
+        raise RuntimeError("Database unavailable.")
+    with engine.connect() as conn:
+        rows = conn.execute(text(sql), params).fetchall()
+
     out: List[Dict] = []
     for r in rows:
         ep_id, topic, minutes, public_url, created_at, rating, script, storage_key = r
@@ -300,3 +538,71 @@ def list_saved_podcasts_alphabetical(
         )
     return out
 
+
+
+# ---------- Cached listing (sidebar) ----------
+# Streamlit re-runs the whole script on every widget change; the sidebar listing only changes
+# when the catalog does. Entries are keyed by (search, cursor, catalog_version): save/delete bump
+# the version, so a render after a write misses and everything older is dropped. The TTL covers
+# writes made by other processes (another replica, the import CLI).
+LISTING_CACHE_MAX = int(os.getenv("LISTING_CACHE_MAX", "256"))
+LISTING_CACHE_TTL_SEC = float(os.getenv("LISTING_CACHE_TTL_SEC", "300"))
+
+_CATALOG_VERSION = 0
+_LISTING_CACHE: "OrderedDict[tuple, Tuple[float, List[Dict]]]" = OrderedDict()
+_LISTING_LOCK = threading.Lock()
+_LISTING_STATS = {"hits": 0, "misses": 0}
+
+
+def catalog_version() -> int:
+    return _CATALOG_VERSION
+
+
+def bump_catalog_version() -> int:
+    """Mark the saved-episode catalog as changed; drops every cached listing page."""
+    global _CATALOG_VERSION
+    with _LISTING_LOCK:
+        _CATALOG_VERSION += 1
+        _LISTING_CACHE.clear()
+        return _CATALOG_VERSION
+
+
+@traced("store.list_saved_podcasts_cached")
+def list_saved_podcasts_cached(
+    limit: int = 20,
+    offset: int = 0,
+    collapse_by_minutes: bool = True,
+    search: Optional[str] = None,
+) -> List[Dict]:
+    """list_saved_podcasts_alphabetical, served from memory until the catalog version changes."""
+    search = (search or "").strip() or None
+    version = _CATALOG_VERSION  # read before querying: a write that lands mid-query can't be cached as current
+    key = (search and search.lower(), (int(limit), int(offset), bool(collapse_by_minutes)), version)
+    now = time.monotonic()
+    with _LISTING_LOCK:
+        hit = _LISTING_CACHE.get(key)
+        if hit is not None and now - hit[0] <= LISTING_CACHE_TTL_SEC:
+            _LISTING_CACHE.move_to_end(key)
+            _LISTING_STATS["hits"] += 1
+            cache_result("listing", True)
+            return list(hit[1])
+        _LISTING_STATS["misses"] += 1
+    cache_result("listing", False)
+
+    try:
+        rows = _query_listing(limit, offset, collapse_by_minutes, search)
+    except Exception:
+        return []  # not cached: the next render retries
+
+    with _LISTING_LOCK:
+        if version == _CATALOG_VERSION:
+            _LISTING_CACHE[key] = (now, rows)
+            _LISTING_CACHE.move_to_end(key)
+            while len(_LISTING_CACHE) > LISTING_CACHE_MAX:
+                _LISTING_CACHE.popitem(last=False)
+    return list(rows)
+
+
+def listing_cache_stats() -> Dict[str, int]:
+    with _LISTING_LOCK:
+        return dict(_LISTING_STATS, entries=len(_LISTING_CACHE), version=_CATALOG_VERSION)
@@ -0,0 +1,98 @@
+# services/supabase_client.py
+# One process-wide Supabase client per (url, key), shared by app_state and store.
+# Reusing the client keeps its HTTP connections alive across Streamlit reruns and sessions
+# instead of paying a fresh TLS handshake per call.
+
+import os
+import threading
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    from supabase import Client, ClientOptions
+
+HTTP_TIMEOUT_SEC = float(os.getenv("SUPABASE_HTTP_TIMEOUT_SEC", "10"))
+STORAGE_TIMEOUT_SEC = int(os.getenv("SUPABASE_STORAGE_TIMEOUT_SEC", "60"))  # uploads are slower
+MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "20"))
+MAX_KEEPALIVE = int(os.getenv("SUPABASE_MAX_KEEPALIVE", "10"))
+
+_CLIENTS: Dict[Tuple[str, str], "Client"] = {}
+_LOCK = threading.Lock()
+
+
+def _setting(name: str) -> Optional[str]:
+    """Env first, then st.secrets (which raises locally when no secrets.toml exists)."""
+    val = os.getenv(name)
+    if val:
+        return val
+    try:
+        import streamlit as st
+
+        return st.secrets.get(name, None)
+    except Exception:
+        return None
+
+
+def credentials(allow_anon: bool = True) -> Optional[Tuple[str, str]]:
+    """(url, key) using the service-role key, or the anon key if allowed. None if missing."""
+    url = _setting("SUPABASE_URL")
+    key = _setting("SUPABASE_SERVICE_ROLE_KEY") or (_setting("SUPABASE_ANON_KEY") if allow_anon else None)
+    if not (url and key):
+        return None
+    return url, key
+
+
+def create_client(url: str, key: str, options=None) -> "Client":
+    # supabase (postgrest, storage3, gotrue, realtime) is imported with the first client, not at startup
+    from supabase import create_client as _create
+
+    return _create(url, key, options=options)
+
+
+def _options() -> "ClientOptions":
+    from supabase import ClientOptions
+
+    kwargs = dict(
+        postgrest_client_timeout=HTTP_TIMEOUT_SEC,
+        storage_client_timeout=STORAGE_TIMEOUT_SEC,
+        auto_refresh_token=False,  # server-side key, no user session to refresh
+        persist_session=False,
+    )
+    if "httpx_client" in getattr(ClientOptions, "__dataclass_fields__", {}):
+        # supabase-py >= 2.19: share one pooled keep-alive HTTP client across REST and Storage.
+        import httpx
+
+        kwargs["httpx_client"] = httpx.Client(
+            timeout=httpx.Timeout(HTTP_TIMEOUT_SEC, write=STORAGE_TIMEOUT_SEC, read=STORAGE_TIMEOUT_SEC),
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE),
+            follow_redirects=True,
+        )
+    return ClientOptions(**kwargs)
+
+
+def get_client(allow_anon: bool = True) -> "Client":
+    """Shared client; raises RuntimeError if credentials are missing."""
+    creds = credentials(allow_anon)
+    if creds is None:
+        raise RuntimeError("Missing SUPABASE_URL or SUPABASE_*_KEY in environment")
+    client = _CLIENTS.get(creds)
+    if client is not None:
+        return client
+    with _LOCK:
+        client = _CLIENTS.get(creds)
+        if client is None:
+            client = _CLIENTS[creds] = create_client(*creds, options=_options())
+    return client
+
+
+def try_get_client(allow_anon: bool = True) -> Optional["Client"]:
+    """Like get_client, but None if credentials are missing or the client can't be built (UI stays up)."""
+    try:
+        return get_client(allow_anon)
+    except Exception:
+        return None
+
+
+def reset() -> None:
+    """Drop cached clients (tests/benchmarks, or after rotating keys)."""
+    with _LOCK:
+        _CLIENTS.clear()
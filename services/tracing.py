@@ -0,0 +1,222 @@
+# services/tracing.py
+# Lightweight per-request tracing: nested spans with attributes, kept in a ring buffer of
+# recent traces (for the admin waterfall) and optionally appended to a JSONL file.
+#
+#   with span("search", topic=topic):
+#       with span("wiki.summary") as sp:
+#           ...
+#           sp.set(ok=True)
+#
+# The current span lives in a contextvar; work handed to a thread pool keeps its parent
+# only if submitted through wrap() / contextvars.copy_context().run.
+# Span durations also feed podkids_span_seconds (services/metrics.py).
+
+import os
+import json
+import time
+import uuid
+import logging
+import functools
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from services.metrics import SPAN_SECONDS
+
+TRACE_ENABLED = os.getenv("TRACE_ENABLED", "1") == "1"
+TRACE_LOG = os.getenv("TRACE_LOG", "")              # JSONL path; empty -> memory only
+TRACE_RECENT = int(os.getenv("TRACE_RECENT", "50"))  # traces kept for the admin view
+MAX_SPANS_PER_TRACE = 500
+
+export_log = logging.getLogger("services.tracing.export")
+export_log.propagate = False  # one JSON object per line, not mixed into app logs
+
+_CURRENT: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar("trace_span", default=None)
+_TRACES: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+_LOCK = threading.Lock()
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attrs", "start", "_t0", "duration_ms", "status", "error")
+
+    def __init__(self, name: str, parent: Optional["Span"], attrs: Dict[str, Any]):
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.attrs = attrs
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "error": self.error,
+            "attrs": self.attrs,
+        }
+
+
+class _NoopSpan:
+    trace_id = span_id = parent_id = None
+
+    def set(self, **attrs) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+def configure_export(path: str = TRACE_LOG) -> None:
+    """Append finished spans to `path` as JSONL."""
+    if not path:
+        return
+    for h in export_log.handlers:
+        if isinstance(h, logging.FileHandler) and h.baseFilename == os.path.abspath(path):
+            return
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    export_log.addHandler(handler)
+    export_log.setLevel(logging.INFO)
+
+
+def _finish(sp: Span) -> None:
+    rec = sp.as_dict()
+    with _LOCK:
+        spans = _TRACES.get(sp.trace_id)
+        if spans is None:
+            spans = _TRACES[sp.trace_id] = []
+            while len(_TRACES) > TRACE_RECENT:
+                _TRACES.popitem(last=False)
+        if len(spans) < MAX_SPANS_PER_TRACE:
+            spans.append(rec)
+    SPAN_SECONDS.observe(sp.duration_ms / 1000, span=sp.name)
+    if export_log.handlers:
+        export_log.info(json.dumps(rec, ensure_ascii=False, default=str))
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Any]:
+    """Time a block as a child of the current span (or a new trace). Exceptions are recorded and re-raised."""
+    if not TRACE_ENABLED:
+        yield _NOOP
+        return
+    sp = Span(name, _CURRENT.get(), attrs)
+    token = _CURRENT.set(sp)
+    try:
+        yield sp
+    except BaseException as e:
+        sp.status, sp.error = "error", f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        sp.duration_ms = round((time.perf_counter() - sp._t0) * 1000, 3)
+        _CURRENT.reset(token)
+        _finish(sp)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """
+    Decorator form of span(), named after the function unless `name` is given. Only records
+    inside an existing trace, so hot helpers called on every rerun (is_enabled, the sidebar
+    listing) don't each start a trace of their own.
+    """
+
+    def deco(fn):
+        span_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _CURRENT.get() is None:
+                return fn(*args, **kwargs)
+            with span(span_name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return deco
+
+
+def current_span():
+    return _CURRENT.get() or _NOOP
+
+
+def wrap(fn: Callable) -> Callable:
+    """Bind fn to the caller's context, so spans it opens on another thread nest under the current one."""
+    ctx = contextvars.copy_context()
+    return functools.partial(ctx.run, fn)
+
+
+# ---------- read side (admin view) ----------
+def recent_traces(limit: int = 10) -> List[Dict[str, Any]]:
+    """Newest first: {trace_id, name, attrs, start, duration_ms, spans}; name/attrs come from the root span."""
+    with _LOCK:
+        items = [(tid, list(spans)) for tid, spans in _TRACES.items()]
+    out = []
+    for tid, spans in reversed(items[-limit:] if limit else items):
+        root = next((s for s in spans if s["parent_id"] is None), None)
+        start = min(s["start"] for s in spans)
+        end = max(s["start"] + (s["duration_ms"] or 0) / 1000 for s in spans)
+        out.append({
+            "trace_id": tid,
+            "name": root["name"] if root else spans[0]["name"],
+            "attrs": root["attrs"] if root else {},
+            "start": start,
+            "duration_ms": round((end - start) * 1000, 3),
+            "spans": spans,
+        })
+    return out
+
+
+def waterfall(spans: List[Dict[str, Any]], width: int = 40) -> List[Dict[str, Any]]:
+    """Spans in tree order with depth, offset from trace start and a text bar for rendering."""
+    if not spans:
+        return []
+    t0 = min(s["start"] for s in spans)
+    total = max((s["start"] - t0) * 1000 + (s["duration_ms"] or 0) for s in spans) or 1.0
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    ids = {s["span_id"] for s in spans}
+    for s in sorted(spans, key=lambda s: s["start"]):
+        parent = s["parent_id"] if s["parent_id"] in ids else None  # parent still running or dropped -> top level
+        children.setdefault(parent, []).append(s)
+
+    rows: List[Dict[str, Any]] = []
+
+    def walk(parent, depth):
+        for s in children.get(parent, []):
+            offset = (s["start"] - t0) * 1000
+            dur = s["duration_ms"] or 0
+            lead = int(offset / total * width)
+            bar = " " * lead + "█" * max(1, int(round(dur / total * width)))
+            rows.append({
+                "name": "  " * depth + s["name"],
+                "offset_ms": round(offset, 1),
+                "duration_ms": round(dur, 1),
+                "status": s["status"],
+                "bar": bar[:width],
+                "attrs": s["attrs"],
+            })
+            walk(s["span_id"], depth + 1)
+
+    walk(None, 0)
+    return rows
+
+
+def reset() -> None:
+    with _LOCK:
+        _TRACES.clear()
+
+
+configure_export(TRACE_LOG)
@@ -1,21 +1,36 @@
 # services/tts.py
 import os
-import uuid
 import re
 import textwrap
-from google.cloud import texttospeech
+import threading
+from services import metering, ratelimit
 from services.config import get_gcp_creds  # use lazy creds from config
+from services.audio_cache import get_audio_cache
+from services.audio_profiles import DEFAULT_PROFILE, get_profile
+from services.ogg_opus import OggOpusJoiner
+from services.tracing import span, traced
+from services.metrics import TTS_CHARACTERS, PROVIDER_ERRORS
 
-# Cache the TTS client across Streamlit reruns (and still work outside Streamlit)
-try:
-    import streamlit as st
 
-    @st.cache_resource
-    def get_tts_client():
-        return texttospeech.TextToSpeechClient(credentials=get_gcp_creds())
-except Exception:
-    def get_tts_client():
-        return texttospeech.TextToSpeechClient(credentials=get_gcp_creds())
+def _tts():
+    """google.cloud.texttospeech, imported on first synthesis (grpc + protobufs are slow to load)."""
+    from google.cloud import texttospeech
+
+    return texttospeech
+
+
+# One client per process, shared across Streamlit reruns and sessions; built on first use.
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_tts_client():
+    global _CLIENT
+    if _CLIENT is None:
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                _CLIENT = _tts().TextToSpeechClient(credentials=get_gcp_creds())
+    return _CLIENT
 
 
 def _clean_for_tts(text: str) -> str:
@@ -67,33 +82,80 @@ def _build_ssml(text: str) -> str:
     return f"<speak><prosody rate=\"90%\" pitch=\"-2st\">{body}</prosody></speak>"
 
 
-def synthesize_chunks_to_file(chunks, voice_name: str, filename: str = "podcast.mp3") -> str:
+def iter_synthesized_audio(chunks, voice_name: str, progress=None, profile: str = DEFAULT_PROFILE):
     """
-    Synthesize a list of text chunks to a single MP3 file.
-    Example voice_name: "he-IL-Wavenet-A" / "he-IL-Wavenet-B"
+    Yield the audio bytes for each text chunk as soon as it is synthesized, encoded per
+    `profile` (services/audio_profiles.py). The pieces concatenate into one valid file, so
+    callers can stream them to a file, a buffer or an upload: MP3 frames join as they are,
+    and Ogg Opus chunks are remuxed into a single stream (plus a final end-of-stream page).
+    progress(done, total) is called after each chunk; raising from it stops synthesis.
+    The whole batch is admitted by the TTS rate limiter before the first call, so a busy quota
+    fails fast (ratelimit.AdmissionRejected) instead of half-way through an episode.
     """
+    chunks = list(chunks)
+    ssml_chunks = [_build_ssml(chunk.strip()) for chunk in chunks]
+    ratelimit.TTS.acquire(requests=len(chunks), characters=sum(len(s) for s in ssml_chunks))
     client = get_tts_client()
+    texttospeech = _tts()
 
     voice = texttospeech.VoiceSelectionParams(
         language_code="he-IL",
         name=voice_name,
     )
-    audio_config = texttospeech.AudioConfig(
-        audio_encoding=texttospeech.AudioEncoding.MP3,
-        speaking_rate=1,  # default speed
-    )
+    prof = get_profile(profile)
+    config = {"audio_encoding": getattr(texttospeech.AudioEncoding, prof.encoding), "speaking_rate": 1}
+    if prof.sample_rate_hz:
+        config["sample_rate_hertz"] = prof.sample_rate_hz
+    audio_config = texttospeech.AudioConfig(**config)
+    joiner = OggOpusJoiner() if prof.encoding == "OGG_OPUS" else None
 
-    os.makedirs("audio", exist_ok=True)
-    out_path = f"audio/{uuid.uuid4()}_{filename}"
+    for i, (chunk, ssml) in enumerate(zip(chunks, ssml_chunks), start=1):
+        # span covers the API call only, not the consumer's time between yields
+        with span("tts.chunk", index=i, of=len(chunks), chars=len(chunk), voice=voice_name) as sp:
+            TTS_CHARACTERS.inc(len(ssml))  # Google bills SSML characters, tags included
+            try:
+                resp = client.synthesize_speech(
+                    input=texttospeech.SynthesisInput(ssml=ssml),
+                    voice=voice,
+                    audio_config=audio_config,
+                )
+            except Exception:
+                PROVIDER_ERRORS.inc(provider="google_tts")
+                raise
+            metering.record(tts_requests=1, tts_characters=len(ssml))
+            sp.set(bytes=len(resp.audio_content))
+        yield joiner.feed(resp.audio_content) if joiner else resp.audio_content
+        if progress is not None:
+            progress(i, len(chunks))
+    if joiner:
+        yield joiner.finish()
+
+
+def synthesize_chunks_to_bytes(chunks, voice_name: str, progress=None, profile: str = DEFAULT_PROFILE) -> bytes:
+    """Synthesize a list of text chunks to one in-memory file (e.g. to upload without a temp file)."""
+    return b"".join(iter_synthesized_audio(chunks, voice_name, progress=progress, profile=profile))
+
+
+@traced("tts.synthesize_to_file")
+def synthesize_chunks_to_file(
+    chunks, voice_name: str, filename: str = "podcast.mp3", progress=None, profile: str = DEFAULT_PROFILE
+) -> str:
+    """
+    Synthesize a list of text chunks to a single audio file (.mp3 or .ogg, per `profile`).
+    Example voice_name: "he-IL-Wavenet-A" / "he-IL-Wavenet-B"
+    """
+    cache = get_audio_cache()
+    out_path = cache.new_path(f"{os.path.splitext(filename)[0]}.{get_profile(profile).ext}")
 
-    with open(out_path, "wb") as f:
-        for chunk in chunks:
-            ssml = _build_ssml(chunk.strip())
-            resp = client.synthesize_speech(
-                input=texttospeech.SynthesisInput(ssml=ssml),
-                voice=voice,
-                audio_config=audio_config,
-            )
-            f.write(resp.audio_content)
+    try:
+        with open(out_path, "wb") as f:
+            for audio in iter_synthesized_audio(chunks, voice_name, progress=progress, profile=profile):
+                f.write(audio)
+    except Exception:
+        # don't leave half-written files behind in audio/
+        if os.path.exists(out_path):
+            os.remove(out_path)
+        raise
 
+    cache.register(out_path)  # enforce the audio/ size cap; pinned (in-use) files are kept
     return out_path
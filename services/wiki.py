@@ -1,12 +1,25 @@
 # services/wiki.py
 import re
 import warnings
-import wikipedia
+from services.tracing import span
+from services.metrics import PROVIDER_ERRORS
 
 # Silence BeautifulSoup parser warning emitted by wikipedia package
 warnings.filterwarnings("ignore", category=UserWarning, module="wikipedia")
 
-wikipedia.set_lang("he")
+_LANG_SET = False
+
+
+def _wikipedia():
+    """The wikipedia package (pulls in requests + BeautifulSoup), imported on first lookup."""
+    global _LANG_SET
+    import wikipedia
+
+    if not _LANG_SET:
+        wikipedia.set_lang("he")
+        _LANG_SET = True
+    return wikipedia
+
 
 def is_mixed_he_en(s: str) -> bool:
     has_he = re.search(r"[\u0590-\u05FF]", s) is not None
@@ -14,12 +27,20 @@ def is_mixed_he_en(s: str) -> bool:
     return has_he and has_en
 
 def get_hebrew_summary(topic: str, sentences: int = 6):
+    with span("wiki.summary", topic=topic) as sp:
+        ok, text = _get_hebrew_summary(topic, sentences)
+        sp.set(ok=ok, chars=len(text))
+        return ok, text
+
+def _get_hebrew_summary(topic: str, sentences: int):
     if is_mixed_he_en(topic):
         return False, "הטקסט מכיל עברית ואנגלית — נסו בעברית בלבד."
+    wikipedia = _wikipedia()
     try:
         summary = wikipedia.summary(topic, sentences=sentences)
         return True, summary.strip()
     except (wikipedia.DisambiguationError, wikipedia.PageError):
         return False, "לא נמצא ערך מתאים או הערך לא חד-משמעי."
     except Exception:
+        PROVIDER_ERRORS.inc(provider="wikipedia")
         return False, "אירעה שגיאה בשליפת ויקיפדיה. נסו ערך אחר."
@@ -0,0 +1,13 @@
+-- Atomic search counter for services/app_state.py (one round-trip, no lost updates).
+-- Upserts the row, so the client no longer needs a separate "ensure row" INSERT.
+create or replace function public.increment_searches(p_id text default 'main', p_by integer default 1)
+returns bigint
+language sql
+as $$
+  insert into public.app_state (id, searches_total, last_notified_at)
+  values (p_id, p_by, now())
+  on conflict (id) do update
+    set searches_total   = public.app_state.searches_total + excluded.searches_total,
+        last_notified_at = now()
+  returning searches_total;
+$$;
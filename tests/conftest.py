@@ -34,6 +34,7 @@ texttospeech = types.ModuleType("google.cloud.texttospeech")
 
 class _DummyAudioEncoding:
     MP3 = "MP3"
+    OGG_OPUS = "OGG_OPUS"
 
 class _DummyVoiceSelectionParams:
     def __init__(self, **kwargs): ...
@@ -0,0 +1,92 @@
+import importlib
+import threading
+
+import pytest
+
+pytest.importorskip("fastapi")
+from fastapi.testclient import TestClient  # noqa: E402
+
+
+@pytest.fixture
+def api(monkeypatch, tmp_path):
+    jobs = importlib.import_module("services.jobs")
+    mod = importlib.import_module("api")
+    release = threading.Event()
+
+    def pipeline(job):
+        job.enter("wiki")
+        job.publish(summary="תקציר")
+        release.wait(5)
+        job.enter("tts")
+        path = tmp_path / f"{job.id}.mp3"
+        path.write_bytes(b"ID3" + b"\0" * 200_000)
+        job.publish(script="תסריט", audio_path=str(path))
+
+    manager = jobs.JobManager(workers=1, max_pending=2, pipeline=pipeline)
+    monkeypatch.setattr(jobs, "_MANAGER", manager)
+    saved = {("חלל", 2.5): {"script": "s", "public_url": "https://x/audio/a.mp3", "saved_at": "t"}}
+    monkeypatch.setattr(mod, "get_cached_podcast", lambda topic, minutes: saved.get((topic, minutes)))
+    with TestClient(mod.app) as client:
+        yield client, release
+    release.set()
+    manager.shutdown()
+
+
+def test_lookup_and_cached_generate(api):
+    client, _ = api
+    assert client.get("/episodes/lookup", params={"topic": "חלל", "minutes": 2.5}).json()["public_url"].endswith("a.mp3")
+    assert client.get("/episodes/lookup", params={"topic": "ים", "minutes": 2.5}).status_code == 404
+    r = client.post("/generate", json={"topic": "חלל", "minutes": 2.5})
+    assert r.status_code == 200 and r.json()["cached"] is True
+    assert client.post("/generate", json={"topic": "Space חלל"}).status_code == 422
+
+
+def test_generate_job_progress_and_streamed_audio(api):
+    client, release = api
+    r = client.post("/generate", json={"topic": "ים", "minutes": 5})
+    assert r.status_code == 202
+    job = r.json()["job"]
+    # identical request joins the same job
+    assert client.post("/generate", json={"topic": "ים", "minutes": 5}).json()["job"]["id"] == job["id"]
+    assert client.get(f"/jobs/{job['id']}/audio").status_code == 409
+
+    release.set()
+    for _ in range(200):
+        job = client.get(f"/jobs/{job['id']}").json()
+        if job["status"] == "done":
+            break
+        threading.Event().wait(0.02)
+    assert job["status"] == "done" and job["result"] == {"summary": "תקציר", "script": "תסריט"}
+    assert "audio_path" not in job["result"]
+
+    with client.stream("GET", job["audio_url"]) as resp:
+        assert resp.status_code == 200 and resp.headers["content-type"] == "audio/mpeg"
+        body = b"".join(resp.iter_bytes())
+    assert body.startswith(b"ID3") and len(body) == 200_003
+    assert client.get("/jobs/nope").status_code == 404
+
+
+def test_queue_full_is_429(api):
+    client, _ = api
+    assert client.post("/generate", json={"topic": "א"}).status_code == 202
+    assert client.post("/generate", json={"topic": "ב"}).status_code == 202
+    r = client.post("/generate", json={"topic": "ג"})
+    assert r.status_code == 429 and r.headers["retry-after"] == "30"
+
+
+def test_cancel_needs_own_subscription_and_is_idempotent(api):
+    client, _ = api
+    first = client.post("/generate", json={"topic": "הרים"}).json()
+    second = client.post("/generate", json={"topic": "הרים"}).json()
+    job_id = first["job"]["id"]
+    assert second["job"]["id"] == job_id and first["subscription"] != second["subscription"]
+
+    assert client.delete(f"/jobs/{job_id}", params={"subscription": "forged"}).status_code == 403
+    assert client.delete(f"/jobs/{job_id}").status_code == 422
+    # repeating one client's DELETE can't cancel the job the other client joined
+    for _ in range(3):
+        r = client.delete(f"/jobs/{job_id}", params={"subscription": first["subscription"]})
+        assert r.status_code == 200 and r.json()["cancelled"] is False
+    assert client.get(f"/jobs/{job_id}").json()["status"] != "cancelled"
+    r = client.delete(f"/jobs/{job_id}", params={"subscription": second["subscription"]})
+    assert r.json() == {"cancelled": True, "unsubscribed": True}
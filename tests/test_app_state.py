@@ -0,0 +1,109 @@
+import importlib
+import threading
+
+
+class _FakeRPC:
+    def __init__(self, sb, by):
+        self.sb, self.by = sb, by
+
+    def execute(self):
+        with self.sb.lock:
+            self.sb.total += self.by
+            self.sb.calls += 1
+            return type("R", (), {"data": self.sb.total})()
+
+
+class _FakeSB:
+    def __init__(self):
+        self.total = 0
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def rpc(self, name, params):
+        assert name == "increment_searches"
+        return _FakeRPC(self, params["p_by"])
+
+
+def _setup(monkeypatch):
+    app_state = importlib.import_module("services.app_state")
+    sb = _FakeSB()
+    pushes = []
+    monkeypatch.setattr(app_state, "_client", lambda: sb)
+    monkeypatch.setattr(app_state, "_send_push", pushes.append)
+    return app_state, sb, pushes
+
+
+def test_concurrent_increments_are_atomic_and_notify_once(monkeypatch):
+    app_state, sb, pushes = _setup(monkeypatch)
+    threads = [
+        threading.Thread(target=lambda: [app_state.increment_searches_and_maybe_notify(every=10, buffered=False) for _ in range(5)])
+        for _ in range(6)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sb.total == 30 and sb.calls == 30
+    assert pushes == [f"App reached {n} searches." for n in (10, 20, 30)]
+
+
+def test_buffered_mode_flushes_in_one_call_and_notifies_each_multiple_once(monkeypatch):
+    app_state, sb, pushes = _setup(monkeypatch)
+    buf = app_state._CounterBuffer(flush_sec=3600, flush_events=1000)
+    monkeypatch.setattr(app_state, "_BUFFER", buf)
+
+    estimates = [app_state.increment_searches_and_maybe_notify(every=10, buffered=True) for _ in range(25)]
+    assert estimates[-1] == 25 and sb.calls == 0
+
+    buf.flush()
+    assert sb.total == 25 and sb.calls == 1
+    assert pushes == ["App reached 10 searches.", "App reached 20 searches."]
+
+    for _ in range(5):
+        app_state.increment_searches_and_maybe_notify(every=10, buffered=True)
+    buf.flush()
+    assert pushes[-1] == "App reached 30 searches." and len(pushes) == 3
+
+
+def test_buffered_estimate_starts_from_stored_total_and_keeps_increments_without_client(monkeypatch):
+    app_state, sb, pushes = _setup(monkeypatch)
+    sb.total = 100
+    monkeypatch.setattr(app_state, "get_state", lambda: {"searches_total": 100})
+    buf = app_state._CounterBuffer(flush_sec=3600, flush_events=1000)
+    monkeypatch.setattr(app_state, "_BUFFER", buf)
+
+    assert [app_state.increment_searches_and_maybe_notify(every=10, buffered=True) for _ in range(3)] == [101, 102, 103]
+
+    monkeypatch.setattr(app_state, "_client", lambda: None)
+    buf.flush()
+    assert buf.pending == 3  # not dropped
+    monkeypatch.setattr(app_state, "_client", lambda: sb)
+    buf.flush()
+    assert sb.total == 103 and buf.pending == 0
+
+
+def test_kill_switch_is_cached_and_keeps_last_known_value(monkeypatch):
+    app_state = importlib.import_module("services.app_state")
+    flag = app_state._EnabledFlag(ttl_sec=3600)
+    monkeypatch.setattr(app_state, "_ENABLED", flag)
+    calls = []
+
+    def fake_state():
+        calls.append(1)
+        return {"app_enabled": False}
+
+    monkeypatch.setattr(app_state, "get_state", fake_state)
+    assert app_state.is_enabled() is False
+    assert app_state.is_enabled() is False
+    assert len(calls) == 1  # served from cache
+
+    def down():
+        raise RuntimeError("supabase unreachable")
+
+    monkeypatch.setattr(app_state, "get_state", down)
+    flag.refresh()
+    assert app_state.is_enabled() is False  # last-known-good
+
+    flag.set(True)
+    assert app_state.is_enabled() is True
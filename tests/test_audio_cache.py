@@ -0,0 +1,55 @@
+import importlib
+import os
+import time
+
+
+def _write(cache, name, size, age=0):
+    path = os.path.join(cache.directory, name)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    if age:
+        t = time.time() - age
+        os.utime(path, (t, t))
+    return path
+
+
+def test_size_cap_evicts_lru_but_keeps_pinned(tmp_path):
+    ac = importlib.import_module("services.audio_cache")
+    cache = ac.AudioCache(directory=str(tmp_path), max_bytes=250, max_age_sec=3600)
+    oldest = _write(cache, "a.mp3", 100, age=30)
+    older = _write(cache, "b.mp3", 100, age=20)
+    cache.pin("session-1", oldest)
+    newest = _write(cache, "c.mp3", 100)
+
+    removed = cache.register(newest)
+    assert removed == [older]
+    assert os.path.exists(oldest) and os.path.exists(newest)
+
+    # released pin -> evictable again once over the cap
+    cache.pin("session-1", None)
+    _write(cache, "d.mp3", 100)
+    assert cache.evict() == [oldest]
+
+
+def test_age_eviction_and_expired_pins(tmp_path):
+    ac = importlib.import_module("services.audio_cache")
+    cache = ac.AudioCache(directory=str(tmp_path), max_bytes=10**9, max_age_sec=0.2, pin_ttl_sec=0.1)
+    stale = _write(cache, "old.mp3", 10)
+    cache.pin("gone-session", stale)  # tab closed: the lease is never renewed
+    time.sleep(0.3)
+    fresh = _write(cache, "new.mp3", 10)
+    assert cache.register(fresh) == [stale]
+    assert os.path.exists(fresh)
+
+
+def test_read_bytes_is_memoized_and_bounded(tmp_path):
+    ac = importlib.import_module("services.audio_cache")
+    cache = ac.AudioCache(directory=str(tmp_path), memo_max_bytes=150)
+    a = _write(cache, "a.mp3", 100)
+    b = _write(cache, "b.mp3", 100)
+
+    assert cache.read_bytes(a) == b"x" * 100
+    assert cache.read_bytes(a) == b"x" * 100  # served from memory
+    cache.read_bytes(b)  # pushes a out of the 150-byte memo
+    s = cache.stats()
+    assert (s["memo_hits"], s["memo_misses"], s["memo_bytes"]) == (1, 2, 100)
@@ -0,0 +1,102 @@
+import importlib
+import struct
+
+import pytest
+
+CHROME = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36"
+ANDROID = "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Mobile Safari/537.36"
+SAFARI_17 = "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_5) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.5 Safari/605.1.15"
+SAFARI_18_4 = "Mozilla/5.0 (Macintosh; Intel Mac OS X 15_4) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/18.4 Safari/605.1.15"
+IOS_CHROME = "Mozilla/5.0 (iPhone; CPU iPhone OS 17_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) CriOS/126.0 Mobile/15E148 Safari/604.1"
+
+
+@pytest.mark.parametrize(
+    "ua, preferred, expected",
+    [
+        (CHROME, "auto", "opus"),
+        (ANDROID, "auto", "opus_16k"),
+        (SAFARI_17, "auto", "mp3"),
+        (SAFARI_18_4, "opus_16k", "opus_16k"),
+        (IOS_CHROME, "opus", "mp3"),  # WebKit underneath
+        ("", "opus", "mp3"),
+        (CHROME, "mp3_16k", "mp3_16k"),
+        (CHROME, "nonsense", "mp3"),
+    ],
+)
+def test_negotiation_falls_back_to_mp3_where_opus_cannot_play(ua, preferred, expected):
+    ap = importlib.import_module("services.audio_profiles")
+    assert ap.negotiate(ua, preferred) == expected
+
+
+def test_accept_header_overrides_user_agent():
+    ap = importlib.import_module("services.audio_profiles")
+    assert ap.negotiate("python-httpx/0.27", "opus", accept="audio/ogg; codecs=opus, audio/mpeg;q=0.5") == "opus"
+
+
+# ---------- Ogg Opus joining ----------
+def _stream(ogg, serial, packets_per_page, granule_step=960):
+    """A minimal Ogg Opus file as TTS returns it: OpusHead page, OpusTags page, audio pages, EOS."""
+    head = b"OpusHead" + struct.pack("<BBHIhB", 1, 1, 312, 24000, 0, 0)
+    tags = b"OpusTags" + struct.pack("<I", 4) + b"test" + struct.pack("<I", 0)
+    out = [ogg.write_page(0x02, 0, serial, 0, bytes([len(head)]), head), ogg.write_page(0, 0, serial, 1, bytes([len(tags)]), tags)]
+    granule = 0
+    for i, n in enumerate(packets_per_page):
+        granule += n * granule_step
+        packets = [bytes([0xFC]) + bytes([i]) * 20 for _ in range(n)]  # 20 ms CELT frames
+        typ = 0x04 if i == len(packets_per_page) - 1 else 0
+        out.append(ogg.write_page(typ, granule, serial, i + 2, bytes(len(p) for p in packets), b"".join(packets)))
+    return b"".join(out), granule
+
+
+def test_joined_chunks_form_one_valid_stream():
+    ogg = importlib.import_module("services.ogg_opus")
+    a, ga = _stream(ogg, 111, [50, 50])
+    b, gb = _stream(ogg, 222, [25, 25, 10])
+
+    joiner = ogg.OggOpusJoiner()
+    data = joiner.feed(a) + joiner.feed(b) + joiner.finish()
+    pages = list(ogg.read_pages(data))
+
+    assert {p[2] for p in pages} == {111}
+    assert [p[3] for p in pages] == list(range(len(pages)))
+    assert len(pages) == 2 + 2 + 3  # one set of headers, all audio pages
+    assert sum(1 for p in pages if p[0] & 0x02) == 1 and pages[0][0] & 0x02
+    assert [bool(p[0] & 0x04) for p in pages] == [False] * (len(pages) - 1) + [True]
+    assert pages[-1][1] == ga + gb
+    assert sum(p[5].startswith(b"OpusHead") for p in pages) == 1
+    for typ, granule, serial, seq, lacing, body in pages:  # CRCs were rewritten
+        raw = ogg.write_page(typ, granule, serial, seq, lacing, body)
+        assert raw in data
+
+
+def test_joined_stream_duration_matches_the_chunks(tmp_path):
+    mutagen = pytest.importorskip("mutagen.oggopus")
+    ogg = importlib.import_module("services.ogg_opus")
+    joiner = ogg.OggOpusJoiner()
+    parts = [_stream(ogg, 7 + i, [50] * 3)[0] for i in range(4)]  # 4 x 3 s
+    path = tmp_path / "ep.ogg"
+    path.write_bytes(b"".join(joiner.feed(p) for p in parts) + joiner.finish())
+
+    assert mutagen.OggOpus(str(path)).info.length == pytest.approx(12 - 312 / 48000)
+
+
+def test_tts_writes_one_ogg_file_for_opus_profiles(monkeypatch, tmp_path):
+    tts = importlib.import_module("services.tts")
+    ogg = importlib.import_module("services.ogg_opus")
+    audio_cache = importlib.import_module("services.audio_cache")
+    monkeypatch.setattr(audio_cache, "_CACHE", audio_cache.AudioCache(directory=str(tmp_path)))
+    configs = []
+
+    class Client:
+        def synthesize_speech(self, input=None, voice=None, audio_config=None):
+            return type("R", (), {"audio_content": _stream(ogg, 9, [50])[0]})()
+
+    monkeypatch.setattr(tts, "get_tts_client", Client)
+    monkeypatch.setattr(tts._tts(), "AudioConfig", lambda **kw: configs.append(kw))
+
+    path = tts.synthesize_chunks_to_file(["שלום.", "עולם."], "he-IL-Wavenet-B", profile="opus_16k")
+
+    assert path.endswith(".ogg")
+    assert configs == [{"audio_encoding": "OGG_OPUS", "speaking_rate": 1, "sample_rate_hertz": 16000}]
+    pages = list(ogg.read_pages(open(path, "rb").read()))
+    assert len({p[2] for p in pages}) == 1 and pages[-1][1] == 2 * 50 * 960
@@ -0,0 +1,98 @@
+import importlib
+
+
+class _FakeStorage:
+    def __init__(self):
+        self.objects = {}  # name -> updated_at
+        self.calls = 0
+
+    def list_raw(self, prefix, limit, offset, sort_column, order):
+        self.calls += 1
+        items = [{"name": n, "updated_at": t, "metadata": {"size": 1}} for n, t in self.objects.items()]
+        items.sort(key=lambda i: i[sort_column], reverse=(order == "desc"))
+        return items[offset: offset + limit]
+
+
+def _mirror(monkeypatch, fake):
+    bm = importlib.import_module("services.bucket_mirror")
+    monkeypatch.setattr(bm, "PAGE_SIZE", 2)
+    return bm, bm.BucketMirror("podkids-audio", "audio", fake.list_raw, "https://sb.example", path=":memory:")
+
+
+def test_incremental_refresh_picks_up_new_objects_and_full_refresh_sweeps(monkeypatch):
+    fake = _FakeStorage()
+    fake.objects = {f"{i}.mp3": f"2024-01-0{i}T00:00:00" for i in range(1, 6)}
+    bm, m = _mirror(monkeypatch, fake)
+
+    assert m.incremental_refresh() == 5  # first refresh is a full one
+    fake.objects["9.mp3"] = "2024-02-01T00:00:00"
+    fake.calls = 0
+    assert m.incremental_refresh() == 1
+    assert fake.calls == 2  # stopped past the high-water mark (objects *at* it are re-read)
+
+    del fake.objects["1.mp3"]
+    m.full_refresh()
+    names = [r["name"] for r in m.list(page_size=10)]
+    assert names == ["2.mp3", "3.mp3", "4.mp3", "5.mp3", "9.mp3"]
+    assert m.list(page=2, page_size=2)[0]["public_url"] == (
+        "https://sb.example/storage/v1/object/public/podkids-audio/audio/4.mp3"
+    )
+    assert [r["name"] for r in m.list(search="9")] == ["9.mp3"]
+
+
+def test_stale_mirror_falls_back_when_refresh_fails(monkeypatch):
+    fake = _FakeStorage()
+    fake.objects = {"a.mp3": "2024-01-01T00:00:00"}
+    bm, m = _mirror(monkeypatch, fake)
+    assert m.ensure_fresh()
+
+    def boom(*a):
+        raise RuntimeError("storage down")
+
+    m.list_raw = boom
+    monkeypatch.setattr(bm, "TTL_SEC", -1)
+    assert m.ensure_fresh()  # refresh failed but data is recent: serve last-known
+    monkeypatch.setattr(bm, "MAX_STALE_SEC", -1)
+    assert not m.ensure_fresh()  # too stale: caller should use the live API
+
+
+def test_write_through_record_and_forget(monkeypatch):
+    fake = _FakeStorage()
+    bm, m = _mirror(monkeypatch, fake)
+    m.full_refresh()
+    m.record("audio/new.mp3", size=10)
+    m.record("other/skip.mp3")
+    assert [r["storage_key"] for r in m.list()] == ["audio/new.mp3"]
+    m.forget("audio/new.mp3")
+    assert m.list() == []
+
+
+def test_same_timestamp_upload_is_not_skipped(monkeypatch):
+    fake = _FakeStorage()
+    fake.objects = {"a.mp3": "2024-01-01T00:00:00"}
+    bm, m = _mirror(monkeypatch, fake)
+    m.full_refresh()
+    fake.objects["b.mp3"] = "2024-01-01T00:00:00"  # same second as the high-water mark
+    m.incremental_refresh()
+    assert [r["name"] for r in m.list()] == ["a.mp3", "b.mp3"]
+
+
+def test_file_mirror_is_scoped_by_prefix_and_sweeps_across_processes(monkeypatch, tmp_path):
+    bm = importlib.import_module("services.bucket_mirror")
+    path = str(tmp_path / "mirror.db")
+    audio, other = _FakeStorage(), _FakeStorage()
+    audio.objects = {"a.mp3": "2024-01-01", "b.mp3": "2024-01-02"}
+    other.objects = {"x.mp3": "2024-01-01"}
+    m1 = bm.BucketMirror("podkids-audio", "audio", audio.list_raw, "https://sb.example", path=path)
+    m2 = bm.BucketMirror("podkids-audio", "other", other.list_raw, "https://sb.example", path=path)
+    m1.full_refresh()
+    m2.full_refresh()
+    assert [r["storage_key"] for r in m1.list()] == ["audio/a.mp3", "audio/b.mp3"]
+    assert [r["storage_key"] for r in m2.list()] == ["other/x.mp3"]
+
+    # A new process (generation counter back at 0) still sweeps objects deleted meanwhile.
+    del audio.objects["b.mp3"]
+    restarted = bm.BucketMirror("podkids-audio", "audio", audio.list_raw, "https://sb.example", path=path)
+    restarted.full_refresh()
+    assert [r["storage_key"] for r in restarted.list()] == ["audio/a.mp3"]
+    assert [r["storage_key"] for r in m2.list()] == ["other/x.mp3"]
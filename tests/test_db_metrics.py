@@ -0,0 +1,59 @@
+import importlib
+import json
+
+from sqlalchemy import create_engine, text
+
+
+def _engine(tmp_path, dbm, **kw):
+    eng = create_engine(f"sqlite:///{tmp_path / 'm.db'}", poolclass=dbm.TimedQueuePool, future=True)
+    return dbm.instrument_engine(eng, **kw)
+
+
+def test_statement_latency_rows_and_pool_are_recorded(tmp_path):
+    dbm = importlib.import_module("services.db_metrics")
+    dbm.reset()
+    eng = _engine(tmp_path, dbm)
+
+    with eng.begin() as conn:
+        conn.execute(text("CREATE TABLE t (x INT)"))
+        conn.execute(text("INSERT INTO t (x) VALUES (:x)"), [{"x": i} for i in range(3)])
+    with eng.connect() as conn:
+        conn.execute(text("SELECT   x\n FROM t")).fetchall()
+
+    snap = dbm.snapshot()
+    ins = snap["statements"]["INSERT INTO t (x) VALUES (?)"]
+    assert ins["count"] == 1 and ins["rows"] == 3
+    assert "SELECT x FROM t" in snap["statements"]  # whitespace normalized
+    assert snap["pool"]["checkouts"] == 2
+    assert snap["pool"]["checked_out"] == 0
+    assert snap["pool"]["checkout_wait"]["count"] == 2
+
+
+def test_slow_queries_are_written_to_log(tmp_path):
+    dbm = importlib.import_module("services.db_metrics")
+    dbm.reset()
+    log_path = tmp_path / "slow.jsonl"
+    eng = _engine(tmp_path, dbm, slow_query_ms=0.0, slow_log_path=str(log_path))
+
+    with eng.connect() as conn:
+        conn.execute(text("SELECT 1")).scalar()
+
+    for h in list(dbm.slow_log.handlers):
+        h.flush()
+        dbm.slow_log.removeHandler(h)
+    lines = [json.loads(l) for l in log_path.read_text(encoding="utf-8").splitlines()]
+    assert any(l["statement"] == "SELECT 1" for l in lines)
+
+
+def test_latency_uses_shared_registry():
+    dbm = importlib.import_module("services.db_metrics")
+    metrics = importlib.import_module("services.metrics")
+    dbm.reset()
+    for ms in [0.5] * 90 + [300] * 10:
+        dbm._record_statement("SELECT 1", ms, 1)
+    s = dbm.snapshot()["statements"]["SELECT 1"]
+    assert s["count"] == 100 and s["rows"] == 100
+    assert s["p50_ms"] == 1
+    assert s["p99_ms"] == 500
+    assert s["max_ms"] == 300
+    assert 'podkids_db_query_seconds_count{statement="SELECT 1"} 100' in metrics.REGISTRY.render()
@@ -0,0 +1,99 @@
+import importlib
+
+from sqlalchemy import create_engine, text
+
+DDL = """
+CREATE TABLE episodes (
+  id CHAR(36) PRIMARY KEY, topic VARCHAR(255) NOT NULL, minutes DECIMAL(3,1) NOT NULL,
+  lang VARCHAR(8) DEFAULT 'he', script TEXT, duration_sec INT, storage_key TEXT,
+  public_url VARCHAR(512), rating TINYINT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+def _engine(path, rows=0):
+    eng = create_engine(f"sqlite:///{path}", future=True)
+    with eng.begin() as conn:
+        conn.execute(text(DDL))
+        for i in range(rows):
+            conn.execute(
+                text("INSERT INTO episodes (id, topic, minutes, script, rating) VALUES (:id, :t, 5.0, 'ס', 5)"),
+                {"id": f"{i:08d}", "t": f"נושא {i}"},
+            )
+    return eng
+
+
+def test_jsonl_roundtrip_and_resume(tmp_path):
+    io = importlib.import_module("services.episodes_io")
+    src = _engine(tmp_path / "src.db", rows=25)
+    out = tmp_path / "eps.jsonl"
+
+    # Simulate an interrupted export: first 10 rows already on disk.
+    io.export_episodes(str(out), batch_size=7, engine=src, quiet=True)
+    lines = out.read_text(encoding="utf-8").splitlines()
+    out.write_text("\n".join(lines[:10]) + "\n", encoding="utf-8")
+    report = io.export_episodes(str(out), batch_size=7, resume=True, engine=src, quiet=True)
+    assert report["rows"] == 15
+    assert out.read_text(encoding="utf-8").splitlines() == lines
+
+    dst = _engine(tmp_path / "dst.db")
+    report = io.import_episodes(str(out), batch_size=10, engine=dst, quiet=True)
+    assert report["rows"] == 25 and report["rows_per_sec"] > 0
+    with dst.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM episodes")).scalar() == 25
+
+
+def test_resume_after_partial_last_line_and_blank_lines(tmp_path):
+    io = importlib.import_module("services.episodes_io")
+    src = _engine(tmp_path / "src.db", rows=6)
+    out = tmp_path / "eps.jsonl"
+    io.export_episodes(str(out), engine=src, quiet=True)
+    lines = out.read_text(encoding="utf-8").splitlines()
+
+    # Export killed mid-write: three full rows, then half of the fourth.
+    out.write_text("\n".join(lines[:3]) + "\n" + lines[3][:15], encoding="utf-8")
+    report = io.export_episodes(str(out), resume=True, engine=src, quiet=True)
+    assert report["rows"] == 3
+    assert out.read_text(encoding="utf-8").splitlines() == lines
+
+    # Blank lines don't count towards the checkpoint's rows_done.
+    out.write_text("\n\n".join(lines) + "\n", encoding="utf-8")
+    dst = _engine(tmp_path / "dst.db")
+    io._write_checkpoint(str(out), 4)
+    report = io.import_episodes(str(out), resume=True, engine=dst, quiet=True)
+    assert report["rows"] == 2
+    with dst.connect() as conn:
+        ids = [r[0] for r in conn.execute(text("SELECT id FROM episodes ORDER BY id"))]
+    assert ids == ["00000004", "00000005"]
+
+
+def test_import_resumes_from_checkpoint_and_upserts(tmp_path):
+    io = importlib.import_module("services.episodes_io")
+    src = _engine(tmp_path / "src.db", rows=12)
+    out = tmp_path / "eps.jsonl"
+    io.export_episodes(str(out), engine=src, quiet=True)
+
+    dst = _engine(tmp_path / "dst.db")
+    io._write_checkpoint(str(out), 5)
+    report = io.import_episodes(str(out), batch_size=4, resume=True, engine=dst, quiet=True)
+    assert report["skipped"] == 5 and report["rows"] == 7
+    assert not io._checkpoint_path(str(out)).exists()
+
+    # Re-importing everything with --upsert is idempotent.
+    io.import_episodes(str(out), upsert=True, engine=dst, quiet=True)
+    io.import_episodes(str(out), upsert=True, engine=dst, quiet=True)
+    with dst.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM episodes")).scalar() == 12
+
+
+def test_parquet_roundtrip(tmp_path):
+    io = importlib.import_module("services.episodes_io")
+    src = _engine(tmp_path / "src.db", rows=9)
+    out = tmp_path / "eps.parquet"
+    assert io.export_episodes(str(out), batch_size=4, engine=src, quiet=True)["rows"] == 9
+
+    dst = _engine(tmp_path / "dst.db")
+    assert io.import_episodes(str(out), batch_size=4, engine=dst, quiet=True)["rows"] == 9
+    with dst.connect() as conn:
+        topics = [r[0] for r in conn.execute(text("SELECT topic FROM episodes ORDER BY id"))]
+    assert topics[0] == "נושא 0"
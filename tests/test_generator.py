@@ -116,3 +116,20 @@ def test_closing_preserved_when_trimming(monkeypatch):
     closing = parts[-1]
     assert closing.strip()
     assert long_body.split()[0] in script  # body retained in trimmed form
+
+
+def test_openai_client_is_built_on_first_use(monkeypatch):
+    config = importlib.import_module("services.config")
+    monkeypatch.setattr(config, "_OPENAI", None)
+    monkeypatch.setattr(config, "OPENAI_API_KEY", None)
+
+    assert "OPENAI_API_KEY חסר ב-secrets/.env" in config.config_problems()
+    try:
+        config.oai.chat
+    except RuntimeError as e:
+        assert "OPENAI_API_KEY" in str(e)
+    else:
+        raise AssertionError("expected the missing key to surface on first use")
+
+    monkeypatch.setattr(config, "OPENAI_API_KEY", "test-key")
+    assert config.oai.chat is config.get_openai().chat
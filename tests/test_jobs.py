@@ -0,0 +1,96 @@
+import importlib
+import threading
+import time
+
+
+def _wait(manager, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        snap = manager.get(job_id)
+        if snap["status"] in ("done", "failed", "cancelled"):
+            return snap
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def test_pipeline_stages_progress_and_partial_results(monkeypatch):
+    jobs = importlib.import_module("services.jobs")
+    wiki = importlib.import_module("services.wiki")
+    gen = importlib.import_module("services.generator")
+    tts = importlib.import_module("services.tts")
+
+    monkeypatch.setattr(wiki, "get_hebrew_summary", lambda topic: (True, f"תקציר {topic}"))
+    monkeypatch.setattr(gen, "generate_kids_podcast_script", lambda **kw: "מילה " * 800)
+    seen = []
+
+    def fake_synth(segments, voice_name, filename, progress, profile="mp3"):
+        for i in range(len(segments)):
+            progress(i + 1, len(segments))
+            seen.append(round(running[0].progress, 3))
+        return "audio/x.mp3"
+
+    monkeypatch.setattr(tts, "synthesize_chunks_to_file", fake_synth)
+    running = []
+
+    def pipeline(job):
+        running.append(job)
+        jobs.run_generation_pipeline(job)
+
+    metrics = importlib.import_module("services.metrics")
+    tts_runs = metrics.CACHE_REQUESTS.value(cache="tts", result="miss")
+    fetched_in_job = metrics.CACHE_REQUESTS.value(cache="wiki_prefetch", result="miss")
+    manager = jobs.JobManager(workers=1, pipeline=pipeline)
+    job_id = manager.submit("חלל", 2.5, "7-12", "he-IL-Wavenet-B")
+    snap = _wait(manager, job_id)
+    assert metrics.CACHE_REQUESTS.value(cache="tts", result="miss") == tts_runs + 1
+    assert metrics.CACHE_REQUESTS.value(cache="wiki_prefetch", result="miss") == fetched_in_job + 1
+
+    assert snap["status"] == "done", snap["error"]
+    assert snap["progress"] == 1.0
+    assert snap["result"]["summary"] == "תקציר חלל"
+    assert snap["result"]["audio_path"] == "audio/x.mp3"
+    assert snap["result"]["segments"] == len(seen) > 1
+    assert seen == sorted(seen) and seen[-1] == 1.0
+
+
+def test_cancel_stops_at_next_boundary_and_failures_are_reported():
+    jobs = importlib.import_module("services.jobs")
+    started, release = threading.Event(), threading.Event()
+
+    def pipeline(job):
+        job.enter("wiki")
+        started.set()
+        release.wait(5)
+        job.enter("script")  # raises JobCancelled
+        job.publish(script="never")
+
+    manager = jobs.JobManager(workers=1, pipeline=pipeline)
+    job_id = manager.submit("t", 2.5, "7-12", "v")
+    started.wait(5)
+    assert manager.cancel(job_id)
+    release.set()
+    snap = _wait(manager, job_id)
+    assert snap["status"] == "cancelled" and "script" not in snap["result"]
+
+    def broken(job):
+        raise ValueError("לא נמצא ערך מתאים")
+
+    manager.pipeline = broken
+    snap = _wait(manager, manager.submit("t", 2.5, "7-12", "v"))
+    assert snap["status"] == "failed" and snap["error"] == "לא נמצא ערך מתאים"
+
+
+def test_submit_refuses_past_max_pending():
+    jobs = importlib.import_module("services.jobs")
+    release = threading.Event()
+    manager = jobs.JobManager(workers=1, max_pending=2, pipeline=lambda job: release.wait(5))
+    manager.submit("a", 2.5, "7-12", "v")
+    manager.submit("b", 2.5, "7-12", "v")
+    try:
+        manager.submit("c", 2.5, "7-12", "v")
+        raise AssertionError("expected JobQueueFull")
+    except jobs.JobQueueFull:
+        pass
+    finally:
+        release.set()
+        manager.shutdown()
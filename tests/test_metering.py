@@ -0,0 +1,88 @@
+import importlib
+
+import pytest
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh, migrated SQLite DB behind services.db.get_engine()."""
+    db = importlib.import_module("services.db")
+    monkeypatch.setattr(db, "DB_BACKEND", "sqlite")
+    monkeypatch.setattr(db, "SQLITE_PATH", str(tmp_path / "podkids.db"))
+    db.reset_engine()
+    yield db
+    db.reset_engine()
+
+
+def _rows(db):
+    from sqlalchemy import text
+
+    with db.get_engine().connect() as conn:
+        return [dict(r) for r in conn.execute(text("SELECT * FROM generation_usage ORDER BY topic")).mappings()]
+
+
+def test_jobs_record_usage_and_stage_times_saved_or_not(db):
+    jobs = importlib.import_module("services.jobs")
+    metering = importlib.import_module("services.metering")
+
+    def pipeline(job):
+        job.enter("wiki")
+        job.enter("script")
+        metering.record(llm_calls=1, prompt_tokens=900, completion_tokens=2100)
+        metering.record(llm_calls=1, prompt_tokens=1400, completion_tokens=400)
+        job.enter("tts")
+        metering.record(tts_requests=2, tts_characters=2600)
+        if job.params["topic"] == "נכשל":
+            raise RuntimeError("TTS down")
+        job.publish(audio_path="x.mp3", audio_bytes=2_400_000, duration_sec=150.0)
+
+    manager = jobs.JobManager(workers=2, pipeline=pipeline)
+    ok = manager.submit("חלל", 2.5, "7-12", "v")
+    manager.submit("נכשל", 2.5, "7-12", "v")
+    manager.shutdown()  # waits for the workers, including the usage writes
+
+    done, failed = sorted(_rows(db), key=lambda r: r["status"])
+    assert done["id"] == ok and done["status"] == "done" and failed["status"] == "failed"
+    assert (done["llm_calls"], done["prompt_tokens"], done["completion_tokens"]) == (2, 2300, 2500)
+    assert (done["tts_requests"], done["tts_characters"]) == (2, 2600)
+    assert (done["audio_bytes"], done["audio_duration_sec"]) == (2_400_000, 150.0)
+    assert done["wiki_ms"] is not None and done["tts_ms"] is not None and done["split_ms"] is None
+    assert failed["audio_bytes"] is None and failed["tts_characters"] == 2600
+    assert set(manager.get(ok)["stage_ms"]) == {"wiki", "script", "tts"}
+
+
+def test_record_outside_a_job_is_a_no_op():
+    metering = importlib.import_module("services.metering")
+    metering.record(llm_calls=1)  # no metered() context
+    with metering.metered() as usage:
+        metering.record(tts_characters=10)
+        metering.record(tts_characters=5)
+    assert usage.snapshot()["tts_characters"] == 15
+
+
+def test_save_links_usage_and_stores_measured_duration(db, monkeypatch):
+    metering = importlib.import_module("services.metering")
+    store = importlib.import_module("services.store")
+    monkeypatch.setattr(metering, "PRICE_OPENAI_PROMPT_PER_1M", 1.0)
+    monkeypatch.setattr(metering, "PRICE_OPENAI_COMPLETION_PER_1M", 2.0)
+    monkeypatch.setattr(metering, "PRICE_TTS_PER_1M_CHARS", 10.0)
+
+    counts = {"llm_calls": 1, "prompt_tokens": 1_000_000, "completion_tokens": 500_000, "tts_characters": 100_000}
+    assert metering.save_usage("a" * 32, "חלל", 2.5, "done", counts, {"tts": 900}, 1200, 1000, 120.0)
+    assert metering.save_usage("b" * 32, "ים", 2.5, "failed", {"llm_calls": 1, "prompt_tokens": 1_000_000}, {}, 50)
+    assert store.save_on_five_stars("חלל", 2.5, "תסריט", 5, public_url="u", duration_sec=151.4, usage_id="a" * 32)
+
+    from sqlalchemy import text
+
+    with db.get_engine().connect() as conn:
+        episode_id, duration = conn.execute(text("SELECT id, duration_sec FROM episodes")).one()
+    assert duration == 151
+    linked = {r["id"]: r["episode_id"] for r in _rows(db)}
+    assert linked == {"a" * 32: episode_id, "b" * 32: None}
+
+    (day,) = metering.usage_by_day(7)
+    # (1M prompt * $1 + 0.5M completion * $2 + 0.1M chars * $10) + the failed run's 1M prompt * $1
+    assert day["generations"] == 2 and day["completed"] == 1 and day["saved"] == 1
+    assert day["cost_usd"] == pytest.approx(4.0)
+    assert day["cost_per_audio_min"] == pytest.approx(2.0)  # 2 minutes of audio
+    assert metering.usage_totals(7)["cost_usd"] == pytest.approx(4.0)
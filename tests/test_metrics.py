@@ -0,0 +1,77 @@
+import importlib
+import threading
+import urllib.request
+
+import pytest
+
+
+@pytest.fixture
+def metrics():
+    mod = importlib.import_module("services.metrics")
+    mod.REGISTRY.reset()
+    yield mod
+    mod.REGISTRY.reset()
+
+
+def test_counters_and_histograms_render_as_prometheus_text(metrics):
+    reg = metrics.Registry()
+    hits = reg.counter("t_cache_total", "Cache lookups.", ("cache", "result"))
+    lat = reg.histogram("t_stage_seconds", "Stage time.", ("stage",), buckets=(0.1, 1))
+    hits.inc(cache="episode", result="hit")
+    hits.inc(2, cache="episode", result="miss")
+    for v in (0.05, 0.5, 0.7, 3):
+        lat.observe(v, stage="tts")
+
+    text = reg.render()
+    assert "# TYPE t_cache_total counter" in text
+    assert 't_cache_total{cache="episode",result="miss"} 2' in text
+    assert 't_stage_seconds_bucket{stage="tts",le="0.1"} 1' in text
+    assert 't_stage_seconds_bucket{stage="tts",le="1"} 3' in text
+    assert 't_stage_seconds_bucket{stage="tts",le="+Inf"} 4' in text
+    assert 't_stage_seconds_count{stage="tts"} 4' in text
+    assert lat.quantile(0.5, stage="tts") == 1
+    with pytest.raises(ValueError):
+        hits.inc(cache="episode")  # missing label
+
+
+def test_services_record_into_the_registry(metrics):
+    tracing = importlib.import_module("services.tracing")
+    sf = importlib.import_module("services.search_flow")
+    sf.run_search("חלל", 2.5, count=lambda: 1, lookup=lambda t, m: None, fetch_summary=lambda t: (True, "x"))
+    with tracing.span("wiki.summary"):
+        pass
+
+    assert metrics.SEARCHES.value() == 1
+    assert metrics.CACHE_REQUESTS.value(cache="episode", result="miss") == 1
+    assert metrics.SPAN_SECONDS.snapshot()[("wiki.summary",)]["count"] == 1
+
+
+def test_side_port_endpoint_serves_metrics(metrics):
+    server = metrics.start_http_server(port=0, addr="127.0.0.1")
+    try:
+        assert metrics.start_http_server(port=0, addr="127.0.0.1") is server  # idempotent across reruns
+        metrics.SEARCHES.inc()
+        url = f"http://127.0.0.1:{server.server_port}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as resp:
+            body = resp.read().decode()
+            assert resp.headers["Content-Type"].startswith("text/plain")
+        assert "podkids_searches_total 1" in body
+        assert "podkids_db_queries_total" in body
+    finally:
+        metrics.stop_http_server()
+
+
+def test_tts_avoidance_counts_episode_hits_and_joined_jobs(metrics):
+    sf = importlib.import_module("services.search_flow")
+    jobs = importlib.import_module("services.jobs")
+    sf.run_search("חלל", 2.5, count=lambda: 1, lookup=lambda t, m: {"script": "s"}, fetch_summary=lambda t: (True, "x"))
+    release = threading.Event()
+    manager = jobs.JobManager(workers=1, pipeline=lambda job: release.wait(5))
+    try:
+        manager.submit("ים", 2.5, "7-12", "v")
+        manager.submit("ים", 2.5, "7-12", "v")  # joins the in-flight job: no second TTS run
+    finally:
+        release.set()
+        manager.shutdown()
+    assert metrics.CACHE_REQUESTS.value(cache="tts", result="hit") == 2
+    assert metrics.CACHE_REQUESTS.value(cache="tts", result="miss") == 0
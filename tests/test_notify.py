@@ -0,0 +1,79 @@
+import importlib
+import time
+
+
+def test_submit_never_waits_on_a_slow_sink():
+    notify = importlib.import_module("services.notify")
+
+    def slow(msg):
+        time.sleep(0.3)
+
+    d = notify.Dispatcher(slow, coalesce_window_sec=0)
+    t0 = time.perf_counter()
+    assert d.submit("App reached 10 searches.")
+    assert time.perf_counter() - t0 < 0.05
+    d.join()
+    assert d.stats()["sent"] == 1
+
+
+def test_bursts_are_coalesced_and_failures_retried():
+    notify = importlib.import_module("services.notify")
+    sink = notify.MemorySink()
+    failures = {"left": 2}
+
+    def flaky(msg):
+        if failures["left"]:
+            failures["left"] -= 1
+            raise RuntimeError("pushover 503")
+        sink(msg)
+
+    d = notify.Dispatcher(flaky, coalesce_window_sec=0.2, backoff_sec=0.01)
+    for n in (10, 20, 30):
+        d.submit(f"App reached {n} searches.")
+    d.join()
+
+    assert len(sink.messages) == 1
+    assert "App reached 30 searches." in sink.messages[0]
+    stats = d.stats()
+    assert stats["sent"] == 1 and stats["coalesced"] == 2 and stats["failed"] == 0
+
+
+def test_full_queue_drops_instead_of_blocking():
+    notify = importlib.import_module("services.notify")
+    gate = []
+
+    def blocked(msg):
+        while not gate:
+            time.sleep(0.01)
+
+    d = notify.Dispatcher(blocked, capacity=1, coalesce_window_sec=0)
+    d.submit("a")
+    time.sleep(0.05)  # worker picks "a" and blocks in the sink
+    assert d.submit("b")
+    assert not d.submit("c")
+    gate.append(1)
+    d.join()
+    assert d.stats()["dropped"] == 1
+
+
+def test_client_errors_are_not_retried_but_429_is():
+    notify = importlib.import_module("services.notify")
+    calls = []
+
+    class _HTTPError(Exception):
+        def __init__(self, status):
+            super().__init__(f"{status} error")
+            self.response = type("R", (), {"status_code": status})()
+
+    def sink(msg):
+        calls.append(msg)
+        raise _HTTPError(400 if msg == "bad" else 429)
+
+    d = notify.Dispatcher(sink, coalesce_window_sec=0, max_retries=3, backoff_sec=0.001)
+    d.submit("bad")
+    d.join()
+    assert calls == ["bad"] and d.stats()["failed"] == 1
+
+    d.submit("busy")
+    d.join()
+    assert calls.count("busy") == 4
@@ -0,0 +1,125 @@
+import importlib
+
+import pytest
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, sec):
+        self.slept.append(sec)
+        self.now += sec
+
+
+def _limiter(clock, max_wait_sec=10, **per_minute):
+    rl = importlib.import_module("services.ratelimit")
+    return rl, rl.Limiter("test", per_minute, max_wait_sec=max_wait_sec, clock=clock, sleep=clock.sleep)
+
+
+def test_burst_then_queue_in_arrival_order():
+    clock = FakeClock()
+    rl, lim = _limiter(clock, requests=60)  # 1/s, burst of 60
+
+    for _ in range(60):
+        assert lim.acquire(requests=1) == 0
+    assert clock.slept == []
+    # the bucket is empty: each further call waits one more refill interval than the previous one
+    waits = [lim.check(requests=1)]
+    lim._buckets["requests"].take(1)  # someone else queued first
+    waits.append(lim.check(requests=1))
+    assert waits[0] == pytest.approx(1.0) and waits[1] == pytest.approx(2.0)
+    assert lim.acquire(requests=1) == pytest.approx(2.0)
+    assert clock.slept == [pytest.approx(2.0)]
+
+
+def test_rejects_up_front_without_consuming():
+    clock = FakeClock()
+    rl, lim = _limiter(clock, characters=600)  # 10 chars/s, bounded wait of 10 s
+
+    lim.acquire(characters=600)
+    with pytest.raises(rl.AdmissionRejected) as e:
+        lim.acquire(characters=200)  # would wait 20 s
+    assert e.value.provider == "test" and e.value.wait_sec == pytest.approx(20)
+    assert lim.acquire(characters=50) == pytest.approx(5)  # the rejected call reserved nothing
+    assert lim.stats()["rejected"] == 1 and lim.stats()["delayed"] == 1
+
+
+def test_oversized_call_waits_for_a_full_bucket_and_settle_refunds():
+    clock = FakeClock()
+    rl, lim = _limiter(clock, max_wait_sec=60, tokens=1200)
+
+    lim.acquire(tokens=5000)  # bigger than the bucket: admitted once it is full
+    assert lim.check(tokens=600) == pytest.approx(30)
+    lim.settle(tokens=-600)  # the call used less than estimated
+    assert lim.check(tokens=600) == pytest.approx(0)
+
+
+def test_unlimited_when_limit_is_zero():
+    clock = FakeClock()
+    rl, lim = _limiter(clock, requests=0, tokens=0)
+    for _ in range(1000):
+        assert lim.acquire(requests=1, tokens=10**6) == 0
+
+
+def test_tts_batch_is_admitted_before_the_first_call(monkeypatch):
+    tts = importlib.import_module("services.tts")
+    rl = importlib.import_module("services.ratelimit")
+    clock = FakeClock()
+    lim = rl.Limiter("google_tts", {"characters": 60}, max_wait_sec=1, clock=clock, sleep=clock.sleep)
+    monkeypatch.setattr(rl, "TTS", lim)
+
+    calls = []
+
+    class Client:
+        def synthesize_speech(self, **kwargs):
+            calls.append(kwargs["input"])
+            return type("R", (), {"audio_content": b"mp3"})()
+
+    monkeypatch.setattr(tts, "get_tts_client", Client)
+    chunks = ["שלום " * 50, "עולם " * 50]
+    assert list(tts.iter_synthesized_audio(chunks, "he-IL-Wavenet-B")) == [b"mp3", b"mp3"]  # fits a full bucket
+    with pytest.raises(rl.AdmissionRejected):
+        list(tts.iter_synthesized_audio(chunks, "he-IL-Wavenet-B"))  # quota used up: no call is made
+    assert len(calls) == 2
+
+
+def test_failed_or_usage_less_completions_do_not_drain_the_token_bucket(monkeypatch):
+    gen = importlib.import_module("services.generator")
+    rl = importlib.import_module("services.ratelimit")
+    clock = FakeClock()
+    lim = rl.Limiter("openai", {"tokens": 10_000}, max_wait_sec=1, clock=clock, sleep=clock.sleep)
+    monkeypatch.setattr(rl, "OPENAI", lim)
+    messages = [{"role": "user", "content": "א" * 280}]  # ~100 prompt tokens
+
+    class Down:
+        class chat:
+            class completions:
+                @staticmethod
+                def create(**kwargs):
+                    raise RuntimeError("openai 500")
+
+    monkeypatch.setattr(gen, "oai", Down)
+    for _ in range(20):  # 20 x 8100 reserved tokens would overdraw a 10k bucket several times
+        with pytest.raises(RuntimeError, match="openai 500"):  # never AdmissionRejected
+            gen._complete(messages=messages, max_tokens=8000)
+    assert lim._buckets["tokens"]._tokens == pytest.approx(10_000)
+
+    msg = type("M", (), {"content": "ב" * 28})()
+    no_usage = type("R", (), {"usage": None, "choices": [type("C", (), {"message": msg})()]})()
+
+    class Up:
+        class chat:
+            class completions:
+                @staticmethod
+                def create(**kwargs):
+                    return no_usage
+
+    monkeypatch.setattr(gen, "oai", Up)
+    gen._complete(messages=messages, max_tokens=8000)
+    assert lim._buckets["tokens"]._tokens == pytest.approx(10_000 - 110)  # prompt + content, not the cap
+    assert clock.slept == []
@@ -0,0 +1,79 @@
+import importlib
+
+from sqlalchemy import create_engine, text
+
+
+def _engine(tmp_path, keys):
+    migrations = importlib.import_module("services.migrations")
+    eng = create_engine(f"sqlite:///{tmp_path / 'r.db'}", future=True)
+    migrations.migrate(engine=eng)
+    with eng.begin() as conn:
+        for i, key in enumerate(keys):
+            conn.execute(
+                text("INSERT INTO episodes (id, topic, minutes, storage_key, rating) VALUES (:id, 't', 5.0, :k, 5)"),
+                {"id": str(i), "k": key},
+            )
+    return eng
+
+
+def _lister(names, updated_at="2020-01-01T00:00:00Z"):
+    objs = [{"storage_key": f"audio/{n}", "size": 10, "updated_at": updated_at} for n in sorted(names)]
+
+    def list_page(page, page_size, prefix):
+        return objs[(page - 1) * page_size: page * page_size]
+
+    return list_page
+
+
+def test_merge_join_finds_orphans_and_deletes_in_batches(tmp_path):
+    rec = importlib.import_module("services.reconcile")
+    names = [f"{i:03d}.mp3" for i in range(25)]
+    referenced = [f"audio/{n}" for n in names[::3]] + ["audio/zzz.mp3"]  # zzz: row without object
+    eng = _engine(tmp_path, referenced + ["audio/000.mp3"])  # duplicate key from dedup'd uploads
+    removed = []
+
+    stats = rec.reconcile(
+        dry_run=False, page_size=4, concurrency=2, delete_batch=5, engine=eng,
+        list_page=_lister(names), remove=removed.append, quiet=True,
+    )
+
+    orphans = sorted(f"audio/{n}" for i, n in enumerate(names) if i % 3)
+    assert stats["scanned"] == 25
+    assert stats["referenced"] == 9
+    assert stats["orphans"] == stats["deleted"] == len(orphans)
+    assert stats["missing_in_bucket"] == 1
+    assert sorted(k for batch in removed for k in batch) == orphans
+    assert all(len(batch) <= 5 for batch in removed)
+
+
+def test_dry_run_and_recent_objects_are_not_deleted(tmp_path):
+    rec = importlib.import_module("services.reconcile")
+    eng = _engine(tmp_path, [])
+    removed = []
+
+    stats = rec.reconcile(dry_run=True, engine=eng, list_page=_lister(["a.mp3", "b.mp3"]),
+                          remove=removed.append, quiet=True)
+    assert stats["orphans"] == 2 and stats["deleted"] == 0 and removed == []
+
+    fresh = rec.reconcile(dry_run=False, engine=eng, remove=removed.append, quiet=True,
+                          list_page=_lister(["c.mp3"], updated_at="2999-01-01T00:00:00Z"))
+    assert fresh["skipped_recent"] == 1 and removed == []
+
+
+def test_db_keys_out_of_python_order_abort(tmp_path):
+    rec = importlib.import_module("services.reconcile")
+    # A case-insensitive collation (like MySQL's utf8mb4_*_ci) sorts "a" before "B".
+    eng = create_engine(f"sqlite:///{tmp_path / 'ci.db'}", future=True)
+    with eng.begin() as conn:
+        conn.execute(text("CREATE TABLE episodes (id TEXT, storage_key TEXT COLLATE NOCASE)"))
+        conn.execute(text("INSERT INTO episodes VALUES ('1', 'audio/a.mp3'), ('2', 'audio/B.mp3')"))
+    removed = []
+
+    try:
+        rec.reconcile(dry_run=False, engine=eng, list_page=_lister(["B.mp3", "a.mp3", "c.mp3"]),
+                      remove=removed.append, delete_batch=1, quiet=True)
+    except RuntimeError as e:
+        assert "not sorted" in str(e)
+    else:
+        raise AssertionError("expected the unsorted DB stream to abort")
+    assert removed == []
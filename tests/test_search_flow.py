@@ -0,0 +1,80 @@
+import importlib
+import time
+
+
+def _slow(value, sec):
+    def fn(*args):
+        time.sleep(sec)
+        return value
+
+    return fn
+
+
+def test_cache_miss_runs_steps_concurrently_and_returns_summary():
+    sf = importlib.import_module("services.search_flow")
+    t0 = time.perf_counter()
+    out = sf.run_search(
+        "חלל", 2.5,
+        count=_slow(7, 0.2),
+        lookup=_slow(None, 0.2),
+        fetch_summary=_slow((True, "תקציר"), 0.2),
+    )
+    elapsed = time.perf_counter() - t0
+    assert out["cached"] is None and out["cache_error"] is None
+    assert out["summary"] == (True, "תקציר")
+    assert out["searches_total"] == 7
+    assert elapsed < 0.45  # max of the steps, not their 0.6s sum
+    assert set(out["timings"]) == {"counter", "cache", "wiki", "total"}
+
+
+def test_cache_hit_returns_without_waiting_for_wiki():
+    sf = importlib.import_module("services.search_flow")
+    t0 = time.perf_counter()
+    out = sf.run_search(
+        "חלל", 2.5,
+        count=_slow(1, 0.05),
+        lookup=_slow({"script": "s", "public_url": "u"}, 0.05),
+        fetch_summary=_slow((True, "x"), 1.0),
+    )
+    assert time.perf_counter() - t0 < 0.5
+    assert out["cached"]["public_url"] == "u"
+    assert out["summary"] is None
+
+
+def test_deadlines_and_failures_degrade_instead_of_raising():
+    sf = importlib.import_module("services.search_flow")
+
+    def broken(*args):
+        raise RuntimeError("db down")
+
+    t0 = time.perf_counter()
+    out = sf.run_search(
+        "חלל", 2.5,
+        count=_slow(1, 1.0),
+        lookup=broken,
+        fetch_summary=_slow((True, "x"), 1.0),
+        counter_timeout=0.1, cache_timeout=0.1, wiki_timeout=0.2,
+    )
+    assert time.perf_counter() - t0 < 0.5
+    assert out["cache_error"] == "db down"
+    assert out["summary"] is None and out["searches_total"] is None
+
+
+def test_prefetched_summary_skips_the_wiki_call(monkeypatch):
+    jobs = importlib.import_module("services.jobs")
+    wiki = importlib.import_module("services.wiki")
+    gen = importlib.import_module("services.generator")
+    tts = importlib.import_module("services.tts")
+
+    def no_wiki(topic):
+        raise AssertionError("wiki fetched twice")
+
+    monkeypatch.setattr(wiki, "get_hebrew_summary", no_wiki)
+    monkeypatch.setattr(gen, "generate_kids_podcast_script", lambda **kw: "תסריט")
+    monkeypatch.setattr(tts, "synthesize_chunks_to_file", lambda *a, **kw: "podcast.mp3")
+    manager = jobs.JobManager(workers=1)
+    job_id = manager.submit("חלל", 2.5, "7-12", "v", summary=(True, "תקציר"))
+    manager.shutdown()
+    snap = manager.get(job_id)
+    assert snap["status"] == "done", snap["error"]
+    assert snap["result"]["summary"] == "תקציר"
@@ -0,0 +1,83 @@
+import importlib
+import threading
+import time
+
+import pytest
+
+
+def test_do_runs_once_for_concurrent_callers():
+    sf = importlib.import_module("services.singleflight")
+    group = sf.Group()
+    calls, gate = [], threading.Event()
+
+    def work():
+        calls.append(1)
+        gate.wait(5)
+        return "episode"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(group.do("k", work))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    while group.stats()["calls"] < 5:
+        time.sleep(0.01)
+    gate.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert {v for v, _ in results} == {"episode"}
+    assert group.stats() == {"calls": 5, "executions": 1, "coalesced": 4, "inflight": 0}
+    # once finished, the next call runs again
+    assert group.do("k", lambda: "again") == ("again", False)
+
+
+def test_do_shares_exceptions():
+    sf = importlib.import_module("services.singleflight")
+    group = sf.Group()
+    with pytest.raises(ValueError):
+        group.do("k", lambda: (_ for _ in ()).throw(ValueError("boom")))
+    assert group.stats()["inflight"] == 0
+
+
+def test_identical_jobs_share_one_pipeline_and_survive_one_cancel():
+    jobs = importlib.import_module("services.jobs")
+    runs, release = [], threading.Event()
+
+    def pipeline(job):
+        runs.append(job.params["topic"])
+        job.enter("wiki")
+        release.wait(5)
+        job.enter("script")
+        job.publish(script="ok")
+
+    manager = jobs.JobManager(workers=2, pipeline=pipeline)
+    a = manager.submit("חלל", 2.5, "7-12", "v")
+    b = manager.submit(" חלל ", 2.5, "7-12", "v")
+    c = manager.submit("חלל", 5, "7-12", "v")
+    assert a == b != c
+
+    assert not manager.cancel(a)  # one of two subscribers left
+    release.set()
+    deadline = time.time() + 5
+    while not manager.job(b).finished and time.time() < deadline:
+        time.sleep(0.01)
+    assert manager.get(b)["status"] == "done"
+    assert sorted(runs) == ["חלל", "חלל"]  # one per distinct key
+    assert manager.flights.stats()["coalesced"] == 1
+
+    # finished flights are forgotten: the same request now starts a new job
+    assert manager.submit("חלל", 2.5, "7-12", "v") != a
+    manager.shutdown()
+
+
+def test_cancelled_job_is_not_joined():
+    jobs = importlib.import_module("services.jobs")
+    release = threading.Event()
+    manager = jobs.JobManager(workers=1, pipeline=lambda job: release.wait(5))
+    a = manager.submit("t", 2.5, "7-12", "v")
+    assert manager.cancel(a)
+    assert manager.submit("t", 2.5, "7-12", "v") != a
+    release.set()
+    manager.shutdown()
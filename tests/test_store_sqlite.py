@@ -0,0 +1,124 @@
+import importlib
+
+import pytest
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """services.store running against a fresh SQLite file (no external DB)."""
+    db = importlib.import_module("services.db")
+    monkeypatch.setattr(db, "DB_BACKEND", "sqlite")
+    monkeypatch.setattr(db, "SQLITE_PATH", str(tmp_path / "podkids.db"))
+    db.reset_engine()
+    yield importlib.import_module("services.store")
+    db.reset_engine()
+
+
+def _set_created(store, topic, minutes, ts):
+    from sqlalchemy import text
+
+    with store.get_engine().begin() as conn:
+        conn.execute(
+            text("UPDATE episodes SET created_at = :ts WHERE topic = :t AND minutes = :m"),
+            {"ts": ts, "t": topic, "m": minutes},
+        )
+
+
+def test_save_then_lookup_latest(store):
+    assert store.get_cached_podcast("חלל", 5.0) is None
+    assert store.save_on_five_stars("חלל", 5.0, "ישן", stars=5, public_url="u1")
+    _set_created(store, "חלל", 5.0, "2024-01-01 00:00:00")
+    assert store.save_on_five_stars("חלל", 5.0, "חדש", stars=5, public_url="u2")
+    assert not store.save_on_five_stars("חלל", 5.0, "לא נשמר", stars=4)
+
+    cached = store.get_cached_podcast("חלל", 5.0)
+    assert cached["script"] == "חדש" and cached["public_url"] == "u2"
+    assert store.get_cached_podcast("חלל", 2.5) is None
+
+
+def test_listing_collapses_searches_and_paginates(store):
+    for topic, minutes in [("Bees", 2.5), ("ants", 2.5), ("ants", 5.0), ("Cats", 2.5), ("ants", 2.5)]:
+        store.save_on_five_stars(topic, minutes, f"{topic}-{minutes}", stars=5)
+
+    rows = store.list_saved_podcasts_alphabetical(limit=10)
+    assert [(r["topic"], r["minutes"]) for r in rows] == [("ants", 2.5), ("ants", 5.0), ("Bees", 2.5), ("Cats", 2.5)]
+
+    rows = store.list_saved_podcasts_alphabetical(limit=10, collapse_by_minutes=False)
+    assert [r["topic"] for r in rows] == ["ants", "Bees", "Cats"]
+
+    assert [r["topic"] for r in store.list_saved_podcasts_alphabetical(search="BEE")] == ["Bees"]
+    page2 = store.list_saved_podcasts_alphabetical(limit=2, offset=2)
+    assert [r["topic"] for r in page2] == ["Bees", "Cats"]
+
+
+def test_admin_delete(store, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    store.save_on_five_stars("דבורים", 2.5, "s", stars=5)
+
+    assert store.delete_episode_admin("דבורים", 2.5, "wrong")[0] is False
+    assert store.delete_episode_admin("דבורים", 2.5, "secret") == (True, "Deleted successfully.")
+    assert store.get_cached_podcast("דבורים", 2.5) is None
+
+
+def test_admin_delete_keeps_shared_audio_object(store, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    removed = []
+    monkeypatch.setattr(store, "delete_supabase_object", removed.append)
+    key = "audio/" + "ab" * 32 + ".mp3"
+    store.save_on_five_stars("דבורים", 2.5, "s", stars=5, public_url="u", storage_key=key)
+    store.save_on_five_stars("דבורים", 5.0, "s", stars=5, public_url="u", storage_key=key)
+
+    assert store.delete_episode_admin("דבורים", 2.5, "secret")[0]
+    assert removed == []  # the 5-minute episode still plays it
+    assert store.delete_episode_admin("דבורים", 5.0, "secret")[0]
+    assert removed == [key]
+
+
+def test_cached_listing_hits_until_catalog_changes(store, monkeypatch):
+    store.bump_catalog_version()
+    assert store.save_on_five_stars("ants", 2.5, "s", stars=5, public_url="u")
+    calls = []
+    real = store._query_listing
+    monkeypatch.setattr(store, "_query_listing", lambda *a: calls.append(a) or real(*a))
+
+    first = store.list_saved_podcasts_cached(limit=10, search="ANTS ")
+    again = store.list_saved_podcasts_cached(limit=10, search="ants")
+    assert [r["topic"] for r in first] == [r["topic"] for r in again] == ["ants"]
+    assert len(calls) == 1
+
+    # a save bumps the catalog version -> the next render re-queries and sees it
+    assert store.save_on_five_stars("antelope", 2.5, "s", stars=5, public_url="u")
+    assert [r["topic"] for r in store.list_saved_podcasts_cached(limit=10, search="ant")] == ["antelope", "ants"]
+    assert len(calls) == 2
+
+    monkeypatch.setenv("ADMIN_TOKEN", "t")
+    assert store.delete_episode_admin("antelope", 2.5, "t")[0]
+    assert [r["topic"] for r in store.list_saved_podcasts_cached(limit=10, search="ant")] == ["ants"]
+    assert store.listing_cache_stats()["hits"] >= 1
+
+
+def test_cached_listing_does_not_cache_failures(store, monkeypatch):
+    store.bump_catalog_version()
+
+    def broken(*a):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(store, "_query_listing", broken)
+    assert store.list_saved_podcasts_cached() == []
+    assert store.listing_cache_stats()["entries"] == 0
+
+
+def test_cached_listing_is_not_cached_while_db_is_unavailable(store, monkeypatch):
+    store.bump_catalog_version()
+    assert store.save_on_five_stars("ants", 2.5, "s", stars=5, public_url="u")
+    real = store.get_engine
+    monkeypatch.setattr(store, "get_engine", lambda: None)  # outage / reconnect interval
+    assert store.list_saved_podcasts_cached(limit=10) == []
+    assert store.listing_cache_stats()["entries"] == 0
+
+    monkeypatch.setattr(store, "get_engine", real)
+    calls = []
+    query = store._query_listing
+    monkeypatch.setattr(store, "_query_listing", lambda *a: calls.append(a) or query(*a))
+    assert [r["topic"] for r in store.list_saved_podcasts_cached(limit=10)] == ["ants"]
+    assert len(calls) == 1
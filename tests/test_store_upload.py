@@ -0,0 +1,71 @@
+import hashlib
+import importlib
+import io
+
+
+class _FakeBucket:
+    def __init__(self):
+        self.objects = {}
+        self.uploads = 0
+
+    def exists(self, key):
+        return key in self.objects
+
+    def upload(self, key, body, file_options=None):
+        self.uploads += 1
+        self.objects[key] = (bytes(body), dict(file_options or {}))
+
+    def get_public_url(self, key):
+        return f"https://sb.example/storage/v1/object/public/podkids-audio/{key}"
+
+
+def _fake_sb(monkeypatch, store):
+    bucket = _FakeBucket()
+    storage = type("Storage", (), {"from_": lambda self, name: bucket})()
+    monkeypatch.setattr(store, "_sb", lambda: type("SB", (), {"storage": storage})())
+    return bucket
+
+
+def test_identical_audio_is_uploaded_once_under_content_hash(monkeypatch, tmp_path):
+    store = importlib.import_module("services.store")
+    bucket = _fake_sb(monkeypatch, store)
+    audio = b"ID3" + b"\x00" * 1000
+
+    url1, key1 = store.upload_mp3_to_supabase(audio)
+    path = tmp_path / "ep.mp3"
+    path.write_bytes(audio)
+    url2, key2 = store.upload_mp3_to_supabase(str(path))
+    _, key3 = store.upload_mp3_to_supabase(io.BytesIO(audio))
+
+    assert key1 == key2 == key3 == f"audio/{hashlib.sha256(audio).hexdigest()}.mp3"
+    assert url1 == url2 and url1.endswith(key1)
+    assert bucket.uploads == 1
+    assert bucket.objects[key1][1]["content-type"] == "audio/mpeg"
+
+
+def test_large_sources_use_resumable_upload(monkeypatch):
+    store = importlib.import_module("services.store")
+    bucket = _fake_sb(monkeypatch, store)
+    monkeypatch.setattr(store, "RESUMABLE_THRESHOLD", 64)
+    calls = []
+    monkeypatch.setattr(store, "_tus_upload", lambda b, key, fh, size, ct: calls.append((key, fh.read(), size)))
+
+    data = b"x" * 200
+    _, key = store.upload_mp3_to_supabase(io.BytesIO(data))
+
+    assert calls == [(key, data, 200)]
+    assert bucket.uploads == 0
+
+
+def test_opus_uploads_keep_their_type_and_are_cached_immutably(monkeypatch, tmp_path):
+    store = importlib.import_module("services.store")
+    bucket = _fake_sb(monkeypatch, store)
+    path = tmp_path / "ep.ogg"
+    path.write_bytes(b"OggS" + b"\x00" * 500)
+
+    _, key = store.upload_mp3_to_supabase(str(path))
+
+    assert key.endswith(".ogg")
+    opts = bucket.objects[key][1]
+    assert opts["content-type"] == "audio/ogg"
+    assert opts["cache-control"] == "31536000, immutable"
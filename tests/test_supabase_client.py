@@ -0,0 +1,35 @@
+import importlib
+import threading
+
+
+def test_client_is_shared_across_callers_and_threads(monkeypatch):
+    sc = importlib.import_module("services.supabase_client")
+    sc.reset()
+    monkeypatch.setenv("SUPABASE_URL", "http://127.0.0.1:9")
+    monkeypatch.setenv("SUPABASE_SERVICE_ROLE_KEY", "service-key")
+    built = []
+    monkeypatch.setattr(sc, "create_client", lambda url, key, options=None: built.append(key) or object())
+
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(sc.get_client())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(built) == 1
+    assert all(c is seen[0] for c in seen)
+    assert sc.get_client(allow_anon=False) is seen[0]
+    sc.reset()
+
+
+def test_missing_credentials(monkeypatch):
+    sc = importlib.import_module("services.supabase_client")
+    sc.reset()
+    monkeypatch.delenv("SUPABASE_URL", raising=False)
+    monkeypatch.delenv("SUPABASE_SERVICE_ROLE_KEY", raising=False)
+    monkeypatch.setenv("SUPABASE_ANON_KEY", "anon")
+    assert sc.try_get_client() is None
+    monkeypatch.setenv("SUPABASE_URL", "http://127.0.0.1:9")
+    assert sc.credentials(allow_anon=False) is None
+    assert sc.credentials(allow_anon=True) == ("http://127.0.0.1:9", "anon")
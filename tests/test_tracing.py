@@ -0,0 +1,66 @@
+import importlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+
+@pytest.fixture
+def tracing():
+    mod = importlib.import_module("services.tracing")
+    mod.reset()
+    yield mod
+    mod.reset()
+
+
+def test_nested_spans_attributes_and_errors(tracing):
+    with tracing.span("search", topic="חלל") as root:
+        with tracing.span("wiki.summary") as sp:
+            sp.set(ok=True)
+        with pytest.raises(ValueError):
+            with tracing.span("openai.completion", call="body"):
+                raise ValueError("rate limited")
+
+    [trace] = tracing.recent_traces()
+    assert trace["name"] == "search" and trace["attrs"] == {"topic": "חלל"}
+    by_name = {s["name"]: s for s in trace["spans"]}
+    assert by_name["wiki.summary"]["parent_id"] == root.span_id
+    assert by_name["wiki.summary"]["attrs"] == {"ok": True}
+    assert by_name["openai.completion"]["status"] == "error"
+    assert "rate limited" in by_name["openai.completion"]["error"]
+
+    rows = tracing.waterfall(trace["spans"])
+    assert [r["name"] for r in rows] == ["search", "  wiki.summary", "  openai.completion"]
+
+
+def test_traced_only_records_inside_a_trace_and_wrap_crosses_threads(tracing):
+    @tracing.traced("store.lookup")
+    def lookup():
+        return 42
+
+    assert lookup() == 42
+    assert tracing.recent_traces() == []  # no trace of its own on a plain rerun
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        with tracing.span("search") as root:
+            assert pool.submit(tracing.wrap(lookup)).result() == 42
+            pool.submit(lookup).result()  # not wrapped: no parent on the worker thread
+
+    [trace] = tracing.recent_traces()
+    [child] = [s for s in trace["spans"] if s["name"] == "store.lookup"]
+    assert child["parent_id"] == root.span_id
+
+
+def test_jsonl_export(tracing, tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracing.configure_export(str(path))
+    try:
+        with tracing.span("search", topic="ים"):
+            pass
+    finally:
+        for h in list(tracing.export_log.handlers):
+            tracing.export_log.removeHandler(h)
+            h.close()
+    [line] = path.read_text(encoding="utf-8").splitlines()
+    rec = json.loads(line)
+    assert rec["name"] == "search" and rec["attrs"]["topic"] == "ים" and rec["duration_ms"] >= 0